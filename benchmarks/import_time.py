@@ -0,0 +1,102 @@
+"""
+Cold import time of the API module, which bounds how soon uvicorn can bind
+and answer /health. Heavy dependencies (torch, sentence-transformers,
+chromadb, provider SDKs) should load during warm-up, not here.
+
+Each run imports the module in a fresh interpreter; the slowest modules are
+taken from `python -X importtime` of the last run. `--max-seconds` makes the
+command fail when the median exceeds a budget, for use in CI.
+
+    python -m benchmarks.import_time [--runs 5] [--module src.api.main] [--max-seconds 1.0] [--json out.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# Imported by the module only after warm-up; they should not show up below
+HEAVY = ("torch", "sentence_transformers", "chromadb", "transformers", "langchain_huggingface",
+         "langchain_openai", "langchain_anthropic", "langchain_groq", "langgraph")
+
+
+def _import_once(module: str) -> Tuple[float, str]:
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return elapsed, proc.stderr
+
+
+def _packages(importtime: str) -> set:
+    return {line.split("|")[-1].strip().split(".")[0] for line in importtime.splitlines() if "|" in line}
+
+
+def _slowest(importtime: str, top: int, exclude: set) -> List[dict]:
+    """Top-level packages by cumulative import time, from -X importtime output"""
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        package = name.strip().split(".")[0]
+        if package in exclude:
+            continue
+        # Nested imports are indented; the outermost entry of a package carries its cumulative time
+        totals[package] = max(totals.get(package, 0), int(cumulative))
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"package": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def run(module: str, runs: int, top: int = 15) -> dict:
+    # Baseline: interpreter start-up alone, subtracted from every run
+    startup = [_import_once("sys") for _ in range(max(3, runs // 2))]
+    baseline = statistics.median(elapsed for elapsed, _ in startup)
+    seconds, importtime = [], ""
+    for _ in range(runs):
+        elapsed, importtime = _import_once(module)
+        seconds.append(max(0.0, elapsed - baseline))
+    slowest = _slowest(importtime, top, exclude=_packages(startup[0][1]) - {"src"})
+    return {
+        "module": module,
+        "runs": runs,
+        "interpreter_s": round(baseline, 3),
+        "median_s": round(statistics.median(seconds), 3),
+        "min_s": round(min(seconds), 3),
+        "max_s": round(max(seconds), 3),
+        "heavy_imported": sorted(_packages(importtime) & set(HEAVY)),
+        "slowest": slowest,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.api.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, help="Exit non-zero if the median import exceeds this")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.module, args.runs, args.top)
+    print(f"import {results['module']}: median {results['median_s']:.3f}s "
+          f"(min {results['min_s']:.3f}s, max {results['max_s']:.3f}s, "
+          f"interpreter {results['interpreter_s']:.3f}s excluded)")
+    if results["heavy_imported"]:
+        print(f"heavy packages imported eagerly: {', '.join(results['heavy_imported'])}")
+    print(f"{'package':<32}{'cumulative ms':>14}")
+    for row in results["slowest"]:
+        print(f"{row['package']:<32}{row['cumulative_ms']:>14.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.max_seconds is not None and results["median_s"] > args.max_seconds:
+        sys.exit(f"Import time {results['median_s']:.3f}s exceeds budget of {args.max_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
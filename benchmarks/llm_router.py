@@ -0,0 +1,86 @@
+"""
+Tail latency of LLM calls pinned to one provider versus the router's
+hedged `fastest` mode, against stub providers with injected delays.
+
+Each stub answers in a log-normal time and stalls (10x) on a fixed share of
+calls, like a provider under load. Delays are seeded and scaled by
+`--scale` so a run takes seconds.
+
+    python -m benchmarks.llm_router [--calls 300] [--scale 0.01] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from src.agent.llm_router import LLMRouter
+
+SEED = 31
+# provider: (median seconds, stall probability)
+PROVIDERS = {"groq": (1.0, 0.08), "openai": (2.0, 0.04), "anthropic": (2.5, 0.03)}
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class StubProviders:
+    def __init__(self, seed: int, scale: float):
+        self.rng = random.Random(seed)
+        self.scale = scale
+
+    async def __call__(self, provider: str) -> str:
+        median, stall = PROVIDERS[provider]
+        delay = median * self.rng.lognormvariate(0, 0.3)
+        if self.rng.random() < stall:
+            delay *= 10
+        await asyncio.sleep(delay * self.scale)
+        return provider
+
+
+async def _run_mode(mode: str, calls: int, scale: float) -> Dict[str, float]:
+    router = LLMRouter(list(PROVIDERS))
+    stub = StubProviders(SEED, scale)
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await router.route(stub, preferred="groq", mode=mode)
+        latencies.append((time.perf_counter() - started) / scale)
+    return {
+        "p50_s": round(_percentile(latencies, 0.50), 3),
+        "p95_s": round(_percentile(latencies, 0.95), 3),
+        "p99_s": round(_percentile(latencies, 0.99), 3),
+        "hedges": router.stats()["hedges"],
+    }
+
+
+async def run(calls: int, scale: float) -> dict:
+    return {
+        "calls": calls,
+        "pinned": await _run_mode("pinned", calls, scale),
+        "fastest": await _run_mode("fastest", calls, scale),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.calls, args.scale))
+    print(f"{'mode':<9}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'hedges':>8}")
+    for mode in ("pinned", "fastest"):
+        row = results[mode]
+        print(f"{mode:<9}{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}{row['p99_s']:>8.2f}{row['hedges']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Offline load test of the API against local stub services.
+
+Starts `benchmarks.stubs` (Tavily, LLM APIs, a static page corpus) and the
+API via `benchmarks.serve`, waits for /ready, then drives each scenario at
+each concurrency level:
+
+* research      POST /research with unique queries (full agent runs)
+* research_hit  the same queries again (response cache hits)
+* ws            /ws/research, one connection per query, until "complete"
+* batch         POST /research/batch with the same number of fresh queries, split
+                into as many batches as the concurrency level; latency is each
+                result's arrival time, so throughput compares with `research` at c=1
+
+For every run it reports p50/p95/p99 latency, throughput, peak RSS of the
+API process and mean time per graph node (from /metrics), plus the calls the
+stubs served. Time-to-first-token is reported for the WebSocket runs.
+Results can be saved as JSON and compared against an earlier run.
+
+    python -m benchmarks.load [--concurrency 1,8,32] [--requests 48] [--scenarios research,research_hit,ws]
+                              [--llm-ttft 0.4] [--llm-token-delay 0.01] [--json out.json] [--baseline old.json]
+
+Use `--api-url` (and `--api-pid` for RSS) to drive an API that is already
+running instead of starting one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.report import compare, latency_summary, run_metadata, save
+from benchmarks.stubs import add_config_args
+
+SCENARIOS = ("research", "research_hit", "ws", "batch")
+_TEMPLATES = (
+    "What are the latest advances in {topic}?",
+    "How does {topic} compare with the alternatives on cost and efficiency?",
+    "Summarize the main open problems in {topic}",
+    "Which companies lead in {topic} and why?",
+)
+_TOPICS = ("battery chemistry", "sodium ion cells", "grid storage", "heat pumps", "perovskite solar",
+           "green hydrogen", "vector databases", "speculative decoding", "quantization", "kv cache eviction")
+_NODE_METRIC = re.compile(r'^research_node_duration_seconds_(sum|count)\{node="([^"]+)"\} (\S+)$')
+
+
+def queries(count: int, offset: int = 0) -> List[str]:
+    """Distinct research questions; `offset` keeps concurrency levels from sharing cache entries"""
+    out = []
+    for i in range(offset, offset + count):
+        template = _TEMPLATES[i % len(_TEMPLATES)]
+        topic = _TOPICS[(i // len(_TEMPLATES)) % len(_TOPICS)]
+        out.append(f"{template.format(topic=topic)} (run {i})")
+    return out
+
+
+def _rss_mb(pid: Optional[int], field: str = "VmRSS") -> Optional[float]:
+    """Resident (or peak resident, VmHWM) size of a process, Linux only"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class _RssSampler:
+    def __init__(self, pid: Optional[int], interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample(self):
+        while True:
+            rss = _rss_mb(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0.0, rss)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._sample())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def _node_totals(client: httpx.AsyncClient) -> Dict[str, Tuple[float, float]]:
+    """{node: (seconds sum, count)} from the Prometheus endpoint"""
+    totals: Dict[str, List[float]] = {}
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return {}
+    for line in text.splitlines():
+        match = _NODE_METRIC.match(line)
+        if match:
+            kind, node, value = match.groups()
+            totals.setdefault(node, [0.0, 0.0])[0 if kind == "sum" else 1] += float(value)
+    return {node: (s, c) for node, (s, c) in totals.items()}
+
+
+async def _stub_totals(stub_url: str) -> Dict[str, Tuple[int, float]]:
+    """{endpoint: (calls, seconds served)} from the stubs"""
+    async with httpx.AsyncClient(base_url=stub_url) as client:
+        endpoints = (await client.get("/_stats")).json()["endpoints"]
+    return {name: (e["calls"], e["calls"] * e["mean_s"]) for name, e in endpoints.items()}
+
+
+def _node_means(before: dict, after: dict) -> Dict[str, float]:
+    means = {}
+    for node, (total, count) in after.items():
+        total0, count0 = before.get(node, (0.0, 0.0))
+        if count > count0:
+            means[node] = round((total - total0) / (count - count0) * 1000, 2)
+    return means
+
+
+def _stub_calls(before: dict, after: dict) -> Dict[str, dict]:
+    calls = {}
+    for name, (count, seconds) in after.items():
+        count0, seconds0 = before.get(name, (0, 0.0))
+        if count > count0:
+            calls[name] = {"calls": count - count0,
+                           "mean_ms": round((seconds - seconds0) / (count - count0) * 1000, 2)}
+    return calls
+
+
+async def _drive(items: List[str], concurrency: int,
+                 call: Callable[[str], Awaitable[Tuple[str, dict]]]) -> Tuple[List[Tuple[float, str, dict]], float]:
+    """Run `call` over `items` with at most `concurrency` in flight; [(seconds, outcome, extra)], wall time"""
+    pending = list(reversed(items))
+    samples: List[Tuple[float, str, dict]] = []
+
+    async def worker():
+        while pending:
+            item = pending.pop()
+            started = time.perf_counter()
+            try:
+                outcome, extra = await call(item)
+            except Exception as e:
+                outcome, extra = f"error:{type(e).__name__}", {}
+            samples.append((time.perf_counter() - started, outcome, extra))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def _research_call(client: httpx.AsyncClient, provider: str, depth: str):
+    async def call(query: str) -> Tuple[str, dict]:
+        resp = await client.post("/research", json={"query": query, "provider": provider, "depth": depth})
+        if resp.status_code != 200:
+            return f"error:{resp.status_code}", {}
+        return resp.headers.get("X-Cache", "ok"), {}
+    return call
+
+
+def _ws_call(api_url: str, provider: str, depth: str):
+    import websockets
+
+    url = re.sub(r"^http", "ws", api_url.rstrip("/")) + "/ws/research"
+
+    async def call(query: str) -> Tuple[str, dict]:
+        async with websockets.connect(url, max_size=None) as ws:
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"query": query, "provider": provider, "depth": depth}))
+            first_token = None
+            while True:
+                event = json.loads(await ws.recv())
+                if event.get("error"):
+                    return "error:ws", {}
+                if event.get("type") == "token" and first_token is None:
+                    first_token = time.perf_counter() - sent
+                if event.get("type") == "error":
+                    return "error:agent", {}
+                if event.get("type") == "complete":
+                    return "ok", {"ttft": first_token}
+    return call
+
+
+async def _drive_batches(client: httpx.AsyncClient, items: List[str], batches: int, provider: str,
+                         depth: str) -> Tuple[List[Tuple[float, str, dict]], float]:
+    """Send `items` as `batches` concurrent batch requests; samples are NDJSON result arrival times"""
+    samples: List[Tuple[float, str, dict]] = []
+    started = time.perf_counter()
+
+    async def send(queries: List[str]):
+        body = {"queries": queries, "provider": provider, "depth": depth}
+        async with client.stream("POST", "/research/batch", json=body) as resp:
+            if resp.status_code != 200:
+                samples.extend((time.perf_counter() - started, f"error:{resp.status_code}", {}) for _ in queries)
+                return
+            async for line in resp.aiter_lines():
+                event = json.loads(line) if line else {}
+                if event.get("type") in ("result", "error"):
+                    outcome = ("hit" if event.get("cached") else "miss") if event["type"] == "result" \
+                        else f"error:{event.get('status')}"
+                    samples.extend((time.perf_counter() - started, outcome, {}) for _ in event["indices"])
+
+    await asyncio.gather(*(send(items[i::batches]) for i in range(batches)))
+    return samples, time.perf_counter() - started
+
+
+async def run_scenario(name: str, api_url: str, stub_url: Optional[str], concurrency: int, items: List[str],
+                       provider: str, depth: str, api_pid: Optional[int]) -> dict:
+    async with httpx.AsyncClient(base_url=api_url, timeout=httpx.Timeout(600.0)) as client:
+        nodes_before = await _node_totals(client)
+        stubs_before = await _stub_totals(stub_url) if stub_url else {}
+        with _RssSampler(api_pid) as rss:
+            if name == "batch":
+                samples, wall = await _drive_batches(client, items, concurrency, provider, depth)
+            else:
+                call = (_ws_call(api_url, provider, depth) if name == "ws"
+                        else _research_call(client, provider, depth))
+                samples, wall = await _drive(items, concurrency, call)
+        nodes_after = await _node_totals(client)
+        stubs_after = await _stub_totals(stub_url) if stub_url else {}
+
+    ok = [s for s in samples if not s[1].startswith("error")]
+    outcomes: Dict[str, int] = {}
+    for _, outcome, _ in samples:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    result = {
+        **latency_summary([s[0] for s in ok], wall),
+        "wall_s": round(wall, 3),
+        "errors": len(samples) - len(ok),
+        "outcomes": outcomes,
+        "peak_rss_mb": rss.peak,
+        "stages_ms": _node_means(nodes_before, nodes_after),
+        "stub_calls": _stub_calls(stubs_before, stubs_after),
+    }
+    ttfts = [s[2]["ttft"] for s in ok if s[2].get("ttft") is not None]
+    if ttfts:
+        result["ttft"] = latency_summary(ttfts)
+    return result
+
+
+def _spawn(module: str, *args: str, env: Optional[dict] = None, cwd: Optional[str] = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", module, *args], env={**os.environ, **(env or {})}, cwd=cwd)
+
+
+async def _wait_for(url: str, path: str, timeout: float, proc: Optional[subprocess.Popen] = None) -> float:
+    """Seconds until `path` answers 200 (404 counts for /ready on builds without it)"""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while time.perf_counter() - started < timeout:
+            if proc is not None and proc.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {proc.returncode} during start-up")
+            try:
+                resp = await client.get(path)
+                if resp.status_code == 200 or (path == "/ready" and resp.status_code == 404):
+                    return round(time.perf_counter() - started, 3)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{url}{path} not ready after {timeout}s")
+
+
+async def run(args) -> dict:
+    procs: List[subprocess.Popen] = []
+    stub_url = args.stub_url
+    api_url = args.api_url
+    api_pid = args.api_pid
+    results: dict = {"meta": run_metadata(args), "startup": {}, "scenarios": {}}
+    try:
+        if stub_url is None:
+            stub_url = f"http://127.0.0.1:{args.stub_port}"
+            procs.append(_spawn("benchmarks.stubs", "--port", str(args.stub_port), "--pages", str(args.pages),
+                                "--search-latency", str(args.search_latency),
+                                "--page-latency", str(args.page_latency), "--llm-ttft", str(args.llm_ttft),
+                                "--llm-token-delay", str(args.llm_token_delay),
+                                "--llm-tokens", str(args.llm_tokens)))
+            await _wait_for(stub_url, "/_stats", 30, procs[-1])
+        if api_url is None:
+            api_url = f"http://127.0.0.1:{args.port}"
+            workdir = tempfile.mkdtemp(prefix="research-bench-")
+            api = _spawn("benchmarks.serve", "--stub-url", stub_url, "--port", str(args.port),
+                         "--workdir", workdir)
+            procs.append(api)
+            api_pid = api.pid
+            results["startup"]["health_s"] = await _wait_for(api_url, "/health", args.startup_timeout, api)
+            results["startup"]["ready_s"] = await _wait_for(api_url, "/ready", args.startup_timeout, api)
+
+        levels = [int(c) for c in args.concurrency.split(",")]
+        for scenario in args.scenarios.split(","):
+            if scenario not in SCENARIOS:
+                raise SystemExit(f"Unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}")
+            for n, concurrency in enumerate(levels):
+                # research_hit replays the research queries of the same level; ws and batch get fresh ones
+                fresh = {"ws": 1, "batch": 2}.get(scenario, 0)
+                offset = n * args.requests + fresh * len(levels) * args.requests
+                items = queries(args.requests, offset)
+                row = await run_scenario(scenario, api_url, stub_url, concurrency, items,
+                                         args.provider, args.depth, api_pid)
+                results["scenarios"].setdefault(scenario, {})[f"c{concurrency}"] = row
+                print(f"{scenario:<13} c={concurrency:<4} p50 {row.get('p50_ms', 0):>9.1f} ms  "
+                      f"p95 {row.get('p95_ms', 0):>9.1f} ms  p99 {row.get('p99_ms', 0):>9.1f} ms  "
+                      f"{row.get('throughput_rps', 0):>7.2f} req/s  errors {row['errors']}  "
+                      f"rss {row['peak_rss_mb']} MB")
+        results["peak_rss_mb"] = _rss_mb(api_pid, "VmHWM")
+        if stub_url:
+            async with httpx.AsyncClient(base_url=stub_url) as client:
+                results["stubs"] = (await client.get("/_stats")).json()
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=48, help="Requests per scenario and level")
+    parser.add_argument("--provider", default="groq")
+    parser.add_argument("--depth", default="brief")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--api-url", help="Drive this running API instead of starting one")
+    parser.add_argument("--api-pid", type=int, help="PID of --api-url's process, for RSS")
+    parser.add_argument("--stub-url", help="Use these running stubs instead of starting them")
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    add_config_args(parser)
+    parser.add_argument("--json", help="Also write results to this file")
+    parser.add_argument("--baseline", help="Compare against the JSON of an earlier run")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if results["startup"]:
+        print(f"startup: /health after {results['startup']['health_s']}s, "
+              f"/ready after {results['startup']['ready_s']}s")
+    print(f"peak RSS: {results.get('peak_rss_mb')} MB")
+    for scenario, levels in results["scenarios"].items():
+        for level, row in levels.items():
+            if row["stages_ms"]:
+                stages = ", ".join(f"{node} {ms:.0f} ms" for node, ms in row["stages_ms"].items())
+                print(f"{scenario} {level} stages: {stages}")
+    if args.json:
+        save(results, args.json)
+    if args.baseline:
+        compare(args.baseline, results)
+
+
+if __name__ == "__main__":
+    main()
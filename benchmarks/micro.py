@@ -0,0 +1,166 @@
+"""
+Micro-benchmarks of hot paths that run on every request, over the stub
+page corpus so results are comparable between runs:
+
+* cache_key          `src.api.main._cache_key` on varied queries
+* chunking           HTML page -> text chunks (`html_stream.extract_chunks`), and
+                     the recursive splitter on the extracted text when installed
+* similarity_search  `VectorStore.similarity_search` over an indexed corpus,
+                     next to BM25 (`hybrid_search.BM25Index.search`) on the same chunks
+
+A benchmark whose dependencies are missing is reported as skipped.
+
+    python -m benchmarks.micro [--only cache_key,chunking,similarity_search] [--pages 40]
+                               [--json out.json] [--baseline old.json]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmarks.report import compare, latency_summary, run_metadata, save
+from benchmarks.stubs import Corpus, StubConfig
+
+BENCHMARKS = ("cache_key", "chunking", "similarity_search")
+
+
+def _timed(fn: Callable, items: List, unit: str = "us", warmup: int = 3) -> dict:
+    """Per-call latency of `fn(item)` over `items`"""
+    for item in items[:warmup]:
+        fn(item)
+    samples = []
+    started = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - t)
+    return latency_summary(samples, time.perf_counter() - started, unit=unit)
+
+
+def _queries(count: int) -> List[str]:
+    corpus = Corpus(16, 1)
+    aspects = ("cost", "efficiency", "safety", "adoption", "latency", "market size")
+    return [f"  How does {corpus.topic(i)} compare on {aspects[i % len(aspects)]}? #{i} "
+            for i in range(count)]
+
+
+def bench_cache_key(args) -> dict:
+    from src.api.main import _cache_key
+
+    items = [(q, "groq", "brief") for q in _queries(args.iterations)]
+    return {"cache_key": _timed(lambda item: _cache_key(*item), items)}
+
+
+def bench_chunking(args) -> dict:
+    from src.tools.html_stream import extract_chunks
+
+    corpus = Corpus(args.pages, StubConfig().paragraphs_per_page)
+    pages = [corpus.html(n) for n in range(args.pages)]
+    results = {"extract_chunks": _timed(lambda html: extract_chunks(html, args.chunk_size), pages)}
+    results["page_bytes"] = sum(len(p) for p in pages) // len(pages)
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        results["recursive_splitter"] = {"skipped": "langchain-text-splitters is not installed"}
+    else:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=0)
+        texts = [extract_chunks(html, args.chunk_size)[0] for html in pages]
+        results["recursive_splitter"] = _timed(splitter.split_text, texts)
+    return results
+
+
+def _corpus_documents(pages: int, chunk_size: int):
+    from langchain_core.documents import Document
+    from src.tools.html_stream import extract_chunks
+
+    corpus = Corpus(pages, StubConfig().paragraphs_per_page)
+    docs = []
+    for n in range(pages):
+        text, bounds = extract_chunks(corpus.html(n), chunk_size)
+        docs.extend(Document(page_content=text[start:end], metadata={"source": f"/pages/{n}", "chunk": i})
+                    for i, (start, end) in enumerate(bounds))
+    return docs
+
+
+def bench_similarity_search(args) -> dict:
+    from src.tools.hybrid_search import BM25Index
+
+    docs = _corpus_documents(args.pages, args.chunk_size)
+    queries = [q.strip() for q in _queries(args.searches)]
+    results = {"chunks": len(docs)}
+
+    index = BM25Index()
+    index.add_documents(docs)
+    results["bm25"] = _timed(lambda q: index.search(q, args.k), queries)
+
+    try:
+        from src.tools.vector_store import VectorStore
+    except ImportError as e:
+        results["vector_store"] = {"skipped": str(e)}
+        return results
+    directory = tempfile.mkdtemp(prefix="bench-chroma-")
+    try:
+        store = VectorStore(persist_directory=directory)
+        started = time.perf_counter()
+        store.store_findings(docs, collection_name="bench")
+        results["vector_store_index_s"] = round(time.perf_counter() - started, 3)
+        results["vector_store"] = _timed(
+            lambda q: store.similarity_search(q, k=args.k, collection_name="bench"), queries, unit="ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def run(args) -> dict:
+    results = {"meta": run_metadata(args)}
+    for name in args.only.split(","):
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Unknown benchmark {name!r}; choose from {', '.join(BENCHMARKS)}")
+        try:
+            results[name] = globals()[f"bench_{name}"](args)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+    return results
+
+
+def _print(name: str, row: dict, indent: str = ""):
+    if "skipped" in row:
+        print(f"{indent}{name:<24}skipped: {row['skipped']}")
+        return
+    unit = "us" if "p50_us" in row else "ms" if "p50_ms" in row else None
+    if unit is None:
+        print(f"{indent}{name}")
+        for key, value in row.items():
+            if isinstance(value, dict):
+                _print(key, value, indent + "  ")
+            else:
+                print(f"{indent}  {key:<22}{value}")
+        return
+    print(f"{indent}{name:<24}p50 {row[f'p50_{unit}']:>10.2f} {unit}  p95 {row[f'p95_{unit}']:>10.2f} {unit}  "
+          f"p99 {row[f'p99_{unit}']:>10.2f} {unit}  {row['throughput_rps']:>12.1f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=20000, help="_cache_key calls")
+    parser.add_argument("--pages", type=int, default=40, help="Corpus pages chunked and indexed")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", help="Also write results to this file")
+    parser.add_argument("--baseline", help="Compare against the JSON of an earlier run")
+    args = parser.parse_args()
+
+    results = run(args)
+    for name in args.only.split(","):
+        _print(name, results[name])
+    if args.json:
+        save(results, args.json)
+    if args.baseline:
+        compare(args.baseline, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+End-to-end latency of the pipelined research orchestration against the
+staged search -> scrape -> synthesize flow, with stubbed services.
+
+Search, page and LLM latencies are drawn from fixed-seed distributions with
+a heavy tail for pages (a few take many seconds), which is what makes the
+staged flow wait. `--scale` shrinks every delay so a run takes seconds.
+
+    python -m benchmarks.pipeline [--runs 20] [--scale 0.1] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import zlib
+from typing import List
+
+from langchain_core.documents import Document
+
+from src.agent.pipeline import PipelineServices, run_pipeline
+
+SEED = 23
+
+
+class StubWorld:
+    """Deterministic stand-ins for Tavily, page fetches, indexing and the LLM"""
+
+    def __init__(self, seed: int, scale: float, urls_per_search: int = 5, chunks_per_page: int = 8):
+        self.seed = seed
+        self.scale = scale
+        self.urls_per_search = urls_per_search
+        self.chunks_per_page = chunks_per_page
+        self.page_times = {}
+
+    def _rng(self, key: str) -> random.Random:
+        # Keyed draws, so results do not depend on the order coroutines run in
+        return random.Random(self.seed * 1_000_003 + zlib.crc32(key.encode()))
+
+    async def search(self, sub_query: str) -> List[dict]:
+        rng = self._rng(sub_query)
+        await asyncio.sleep(rng.uniform(0.4, 1.2) * self.scale)
+        return [{"url": f"https://site{rng.randint(0, 40)}.test/{zlib.crc32(sub_query.encode()) % 997}/{i}",
+                 "content": f"Snippet {i} about {sub_query}"} for i in range(self.urls_per_search)]
+
+    def _page_time(self, url: str) -> float:
+        if url not in self.page_times:
+            # Log-normal around ~1 s, with the occasional 6-10 s straggler
+            rng = self._rng(url)
+            t = rng.lognormvariate(0, 0.6)
+            if rng.random() < 0.15:
+                t = rng.uniform(6, 10)
+            self.page_times[url] = t
+        return self.page_times[url]
+
+    async def scrape(self, url: str):
+        per_chunk = self._page_time(url) * self.scale / self.chunks_per_page
+        for i in range(self.chunks_per_page):
+            await asyncio.sleep(per_chunk)
+            yield Document(page_content=f"{url} paragraph {i}", metadata={"source": url})
+
+    async def index(self, chunks: List[Document]):
+        await asyncio.sleep((0.02 + 0.004 * len(chunks)) * self.scale)
+
+    async def synthesize(self, query: str, docs: List[Document]) -> str:
+        await asyncio.sleep((1.5 + 0.01 * len(docs)) * self.scale)
+        return f"answer from {len(docs)} chunks"
+
+    def services(self) -> PipelineServices:
+        return PipelineServices(self.search, self.scrape, self.index, self.synthesize)
+
+
+async def run_staged(query: str, services: PipelineServices, max_urls: int) -> int:
+    """The current graph's shape: each stage waits for the previous one to finish"""
+    results = await asyncio.gather(*(services.search(q) for q in services.split(query)))
+    urls = list(dict.fromkeys(r["url"] for rs in results for r in rs))[:max_urls]
+    snippets = [Document(page_content=r["content"], metadata={"source": r["url"]}) for rs in results for r in rs]
+
+    async def scrape_all(url):
+        return [chunk async for chunk in services.scrape(url)]
+
+    pages = await asyncio.gather(*(scrape_all(u) for u in urls))
+    docs = snippets + [c for page in pages for c in page]
+    await services.index(docs)
+    await services.synthesize(query, docs)
+    return len(docs)
+
+
+def _summary(latencies: List[float], chunks: List[int]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "p50_s": round(statistics.median(latencies), 3),
+        "p95_s": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 3),
+        "mean_s": round(statistics.mean(latencies), 3),
+        "mean_chunks": round(statistics.mean(chunks), 1),
+    }
+
+
+async def run(runs: int, scale: float, max_urls: int = 12) -> dict:
+    query = "solid state batteries and sodium ion cells vs lithium iron phosphate"
+    results = {"runs": runs, "scale": scale}
+    for mode in ("staged", "pipelined"):
+        latencies, chunks = [], []
+        for i in range(runs):
+            # Same seed per run index, so both modes see identical worlds
+            world = StubWorld(SEED + i, scale)
+            started = time.perf_counter()
+            if mode == "staged":
+                chunks.append(await run_staged(query, world.services(), max_urls))
+            else:
+                result = await run_pipeline(query, world.services(), max_urls=max_urls,
+                                            deadline=15 * scale)
+                chunks.append(len(result.documents))
+            # Report in unscaled seconds
+            latencies.append((time.perf_counter() - started) / scale)
+        results[mode] = _summary(latencies, chunks)
+    results["p50_speedup"] = round(results["staged"]["p50_s"] / results["pipelined"]["p50_s"], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=0.1)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.runs, args.scale))
+    print(f"{'mode':<10}{'p50 s':>8}{'p95 s':>8}{'mean s':>8}{'chunks':>8}")
+    for mode in ("staged", "pipelined"):
+        row = results[mode]
+        print(f"{mode:<10}{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}{row['mean_s']:>8.2f}{row['mean_chunks']:>8.1f}")
+    print(f"p50 speedup: {results['p50_speedup']}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Shared summary, metadata and comparison helpers for the benchmark scripts"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Iterable, List, Optional
+
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def latency_summary(seconds: Iterable[float], wall: Optional[float] = None, unit: str = "ms") -> dict:
+    """p50/p95/p99/mean in `unit` (ms or us), plus throughput when the wall time is given"""
+    seconds = list(seconds)
+    if not seconds:
+        return {"count": 0}
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    summary = {"count": len(seconds)}
+    for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        summary[f"{name}_{unit}"] = round(percentile(seconds, q) * scale, 2)
+    summary[f"mean_{unit}"] = round(statistics.mean(seconds) * scale, 2)
+    if wall:
+        summary["throughput_rps"] = round(len(seconds) / wall, 2)
+    return summary
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+    }
+
+
+def save(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def _latency_rows(results: dict, prefix: str = ""):
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        unit = "ms" if "p50_ms" in value else "us" if "p50_us" in value else None
+        if unit:
+            yield prefix + key, {q: value[f"{q}_{unit}"] for q in ("p50", "p95", "p99")}
+        yield from _latency_rows(value, f"{prefix}{key}/")
+
+
+def compare(baseline_path: str, results: dict):
+    """Print p50/p95/p99 of every summary in `results` against the same path in a saved run"""
+    with open(baseline_path) as f:
+        baseline = dict(_latency_rows(json.load(f)))
+    print(f"\nvs {baseline_path}")
+    print(f"{'benchmark':<44}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, row in _latency_rows(results):
+        old = baseline.get(name)
+        if old is None:
+            continue
+        cells = []
+        for q in ("p50", "p95", "p99"):
+            cells.append(f"{(row[q] - old[q]) / old[q]:+.1%}" if old.get(q) else "n/a")
+        print(f"{name:<44}{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}")
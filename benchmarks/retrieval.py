@@ -0,0 +1,165 @@
+"""
+Recall@k and latency of dense, sparse (BM25) and hybrid (RRF) retrieval.
+
+The corpus is generated from a fixed seed: product documents that mix
+exact identifiers (model codes, firmware versions) with paraphrasable
+prose, and queries of both kinds. Run from the repo root:
+
+    python -m benchmarks.retrieval [--embedder minilm|hashing] [--json out.json]
+
+`minilm` uses the same all-MiniLM-L6-v2 model as the vector store;
+`hashing` is a dependency-free character-trigram embedder for machines
+without the model.
+"""
+import argparse
+import hashlib
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.tools.hybrid_search import BM25Index, hybrid_search
+
+SEED = 17
+K_VALUES = (1, 3, 5, 10)
+
+_NAMES = ["Arclight", "Borealis", "Cinder", "Drift", "Ember", "Fathom", "Glacier", "Halcyon",
+          "Ion", "Juniper", "Kestrel", "Lumen", "Meridian", "Nimbus", "Onyx", "Pylon",
+          "Quasar", "Rook", "Solace", "Tundra", "Umbra", "Vesper", "Wren", "Zenith"]
+_ASPECTS = {
+    "battery": (
+        "The {name} {code} delivers {n} hours of battery endurance under mixed use and recharges "
+        "to eighty percent in {m} minutes.",
+        "How long does the {name} last between charges?",
+    ),
+    "thermal": (
+        "Independent lab tests found the {name} {code} kept surface temperature below {n} degrees "
+        "and showed no thermal runaway after {m} stress cycles.",
+        "Does the {name} overheat when pushed hard?",
+    ),
+    "firmware": (
+        "Firmware {version} for the {code} adds scheduled sync, fixes a bootloader fault and "
+        "raises the sensor sampling rate to {n} hertz.",
+        "What changed in firmware {version} for the {code}?",
+    ),
+    "pricing": (
+        "Retail pricing for the {name} {code} starts at {n} dollars with a {m} month service plan "
+        "bundled for enterprise buyers.",
+        "How much does a {name} cost for a business?",
+    ),
+    "warranty": (
+        "Every {code} ships with a {n} year limited warranty covering the enclosure and "
+        "{m} months of free battery replacement.",
+        "What warranty coverage comes with the {code}?",
+    ),
+}
+
+
+def build_corpus(seed: int = SEED) -> Tuple[List[Document], List[Tuple[str, str]]]:
+    """Documents and (query, relevant doc id) pairs"""
+    rng = random.Random(seed)
+    docs, queries = [], []
+    for name in _NAMES:
+        code = f"{name[:2].upper()}-{rng.randint(100, 999)}"
+        version = f"v{rng.randint(1, 5)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}"
+        for aspect, (template, question) in _ASPECTS.items():
+            fields = dict(name=name, code=code, version=version, n=rng.randint(5, 90), m=rng.randint(6, 48))
+            doc_id = f"{name}:{aspect}"
+            docs.append(Document(page_content=template.format(**fields), id=doc_id))
+            queries.append((question.format(**fields), doc_id))
+    return docs, queries
+
+
+def _hashing_embedder(dim: int = 384) -> Callable[[List[str]], np.ndarray]:
+    def embed(texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = f"  {text.lower()}  "
+            for i in range(len(text) - 2):
+                h = int.from_bytes(hashlib.blake2b(text[i:i + 3].encode(), digest_size=4).digest(), "little")
+                out[row, h % dim] += 1.0
+        return out
+    return embed
+
+
+def _minilm_embedder() -> Callable[[List[str]], np.ndarray]:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    return lambda texts: np.asarray(model.embed_documents(texts), dtype=np.float32)
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def run(embedder: str = "minilm") -> dict:
+    docs, queries = build_corpus()
+    if embedder == "minilm":
+        try:
+            embed = _minilm_embedder()
+        except ImportError:
+            print("langchain_huggingface not installed; using the hashing embedder", file=sys.stderr)
+            embedder, embed = "hashing", _hashing_embedder()
+    else:
+        embed = _hashing_embedder()
+
+    matrix = _normalize(embed([d.page_content for d in docs]))
+    query_vecs = dict(zip((q for q, _ in queries), _normalize(embed([q for q, _ in queries]))))
+
+    def dense_search(query: str, k: int) -> List[Document]:
+        # Exact cosine search, as Chroma does for collections this size
+        scores = matrix @ query_vecs[query]
+        return [docs[i] for i in np.argsort(-scores)[:k]]
+
+    index = BM25Index()
+    started = time.perf_counter()
+    index.add_documents(docs)
+    index_ms = (time.perf_counter() - started) * 1000
+
+    results = {"embedder": embedder, "documents": len(docs), "queries": len(queries),
+               "bm25_index_ms": round(index_ms, 2), "modes": {}}
+    for mode in ("dense", "sparse", "hybrid"):
+        hits = {k: 0 for k in K_VALUES}
+        latencies = []
+        for query, relevant in queries:
+            t0 = time.perf_counter()
+            found = hybrid_search(index, dense_search, query, max(K_VALUES), mode=mode)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            ids = [d.id for d in found]
+            for k in K_VALUES:
+                hits[k] += relevant in ids[:k]
+        latencies.sort()
+        results["modes"][mode] = {
+            **{f"recall@{k}": round(hits[k] / len(queries), 3) for k in K_VALUES},
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedder", choices=("minilm", "hashing"), default="minilm")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.embedder)
+    print(f"{results['documents']} docs, {results['queries']} queries, embedder={results['embedder']}")
+    header = "".join(f"{'R@' + str(k):>8}" for k in K_VALUES)
+    print(f"{'mode':<8}{header}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode, row in results["modes"].items():
+        recalls = "".join(f"{row[f'recall@{k}']:>8.3f}" for k in K_VALUES)
+        print(f"{mode:<8}{recalls}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Run the API with every outbound call pointed at `benchmarks.stubs`.
+
+LLM SDKs take their base URL from the environment. Tavily's client does
+not, so its default `api_base_url` is swapped here before the app is
+imported. Caches, Chroma and the scrape cache live under `--workdir`, so runs
+start cold, and rate limits, quotas and demo mode are lifted. The embedding
+model is loaded offline from the local Hugging Face cache.
+
+    python -m benchmarks.serve --stub-url http://127.0.0.1:9100 [--port 8100] [--workdir /tmp/bench]
+"""
+import argparse
+import functools
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def stub_environment(stub_url: str, workdir: str, semantic_cache: bool = False) -> dict:
+    """Environment for an API process that talks only to the stubs"""
+    stub_url = stub_url.rstrip("/")
+    env = {
+        "TAVILY_API_KEY": "stub", "GROQ_API_KEY": "stub", "OPENAI_API_KEY": "stub", "ANTHROPIC_API_KEY": "stub",
+        # groq / langchain-groq, openai, anthropic / langchain-anthropic
+        "GROQ_BASE_URL": stub_url, "GROQ_API_BASE": stub_url,
+        "OPENAI_BASE_URL": f"{stub_url}/v1", "OPENAI_API_BASE": f"{stub_url}/v1",
+        "ANTHROPIC_BASE_URL": stub_url, "ANTHROPIC_API_URL": stub_url,
+        "BENCH_STUB_URL": stub_url,
+        "HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1",
+        "DEMO_MODE": "false", "RATE_LIMIT": "1000000/minute", "DAILY_QUOTA": "100000000",
+        "CACHE_BACKEND": "memory",
+        # Unique benchmark queries would otherwise partly hit as near-duplicates
+        "SEMANTIC_CACHE": "true" if semantic_cache else "false",
+        "CHROMA_DIR": os.path.join(workdir, "chroma_db"),
+        "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+        "SCRAPE_CACHE_DIR": os.path.join(workdir, "scrape_cache"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+    }
+    return env
+
+
+def _route_tavily(stub_url: str):
+    """Default Tavily clients (sync and async) to the stub's /search"""
+    try:
+        import tavily
+    except ImportError:
+        return
+    for name in ("TavilyClient", "AsyncTavilyClient"):
+        cls = getattr(tavily, name, None)
+        if cls is None:
+            continue
+
+        @functools.wraps(cls.__init__)
+        def __init__(self, *args, _init=cls.__init__, **kwargs):
+            kwargs.setdefault("api_base_url", stub_url)
+            _init(self, *args, **kwargs)
+
+        cls.__init__ = __init__
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stub-url", default=os.getenv("BENCH_STUB_URL", "http://127.0.0.1:9100"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workdir", default="./bench_workdir")
+    parser.add_argument("--semantic-cache", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    os.environ.update(stub_environment(args.stub_url, os.path.abspath(args.workdir), args.semantic_cache))
+    for key in ("API_KEY", "REDIS_URL"):
+        os.environ.pop(key, None)
+    sys.path.insert(0, str(REPO_ROOT))
+    # Relative paths in the agent (e.g. a default Chroma directory) land in the workdir
+    os.chdir(args.workdir)
+    _route_tavily(args.stub_url)
+    uvicorn.run("src.api.main:app", host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Local stand-ins for everything the agent calls over the network, so load
+tests run offline and repeatably:
+
+* Tavily search (`POST /search`), answering with pages from the corpus below
+* LLM chat APIs with configurable time-to-first-token, per-token delay and
+  streaming: OpenAI-compatible (`/v1/chat/completions`, also Groq's
+  `/openai/v1/chat/completions`) and Anthropic (`/v1/messages`)
+* A static corpus of generated web pages (`GET /pages/{n}`), with the
+  navigation, scripts and footers real pages carry
+
+Latencies are log-normal around the configured medians, drawn from a seeded
+RNG. `GET /_stats` reports calls and served time per endpoint.
+
+    python -m benchmarks.stubs [--port 9100] [--pages 200] [--llm-ttft 0.4] [--llm-token-delay 0.01]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+SEED = 41
+
+_TOPICS = ["battery chemistry", "sodium ion cells", "solid state electrolytes", "grid storage",
+           "heat pumps", "perovskite solar", "offshore wind", "green hydrogen", "carbon capture",
+           "small modular reactors", "vector databases", "retrieval augmented generation",
+           "transformer inference", "quantization", "speculative decoding", "kv cache eviction"]
+_WORDS = ("energy density cycle life cost per kilowatt hour cathode anode electrolyte throughput "
+          "latency benchmark deployment efficiency capacity degradation temperature supply chain "
+          "manufacturing yield research prototype commercial scale policy subsidy market adoption "
+          "model accuracy memory bandwidth cluster scheduling evaluation dataset").split()
+
+
+@dataclass
+class StubConfig:
+    pages: int = 200
+    results_per_search: int = 5
+    search_latency: float = 0.3
+    page_latency: float = 0.15
+    paragraphs_per_page: int = 12
+    llm_ttft: float = 0.4
+    llm_token_delay: float = 0.01
+    llm_tokens: int = 300
+    jitter: float = 0.3
+
+
+def _paragraph(rng: random.Random, topic: str, sentences: int = 5) -> str:
+    out = []
+    for _ in range(sentences):
+        words = rng.choices(_WORDS, k=rng.randint(10, 22))
+        words.insert(rng.randint(0, len(words)), topic)
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+class Corpus:
+    """Deterministic pages, one topic each"""
+
+    def __init__(self, pages: int, paragraphs: int, seed: int = SEED):
+        self.pages = pages
+        self.paragraphs = paragraphs
+        self.seed = seed
+        self._cache: Dict[int, str] = {}
+
+    def topic(self, n: int) -> str:
+        return _TOPICS[n % len(_TOPICS)]
+
+    def paragraphs_of(self, n: int) -> List[str]:
+        rng = random.Random(self.seed * 1_000_003 + n)
+        return [_paragraph(rng, self.topic(n)) for _ in range(self.paragraphs)]
+
+    def html(self, n: int) -> str:
+        if n not in self._cache:
+            body = "\n".join(f"<p>{p}</p>" for p in self.paragraphs_of(n))
+            self._cache[n] = (
+                f"<!doctype html><html><head><title>{self.topic(n).title()} #{n}</title>"
+                f"<script>window.analytics = {{id: {n}}};</script><style>body{{margin:0}}</style></head>"
+                f"<body><header><nav><a href='/'>Home</a> <a href='/about'>About</a></nav></header>"
+                f"<main><article><h1>{self.topic(n).title()} report {n}</h1>\n{body}\n</article></main>"
+                f"<aside>Related: subscribe to our newsletter</aside>"
+                f"<footer>&copy; Stub Corpus</footer></body></html>"
+            )
+        return self._cache[n]
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Pages whose topic shares words with the query first, then a query-keyed spread"""
+        words = set(query.lower().split())
+        scored = sorted(range(self.pages), key=lambda n: (
+            -len(words & set(self.topic(n).split())),
+            zlib.crc32(f"{query}|{n}".encode()),
+        ))
+        return scored[:k]
+
+
+class _Stats:
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def record(self, endpoint: str, seconds: float):
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        self.seconds[endpoint] = self.seconds.get(endpoint, 0.0) + seconds
+
+    def snapshot(self) -> dict:
+        return {
+            name: {"calls": self.calls[name], "mean_s": round(self.seconds[name] / self.calls[name], 4)}
+            for name in sorted(self.calls)
+        }
+
+
+def _answer_tokens(prompt: str, count: int, rng: random.Random) -> List[str]:
+    vocabulary = [w for w in prompt.split() if w.isalpha()][:200] or _WORDS
+    return [(" " if i else "") + rng.choice(vocabulary) for i in range(count)]
+
+
+def _prompt_of(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(c.get("text", "") for c in content if isinstance(c, dict))
+        parts.append(content or "")
+    if isinstance(body.get("system"), str):
+        parts.append(body["system"])
+    return "\n".join(parts)
+
+
+def build_stub_app(config: StubConfig = StubConfig(), seed: int = SEED) -> FastAPI:
+    app = FastAPI(title="Research agent benchmark stubs")
+    corpus = Corpus(config.pages, config.paragraphs_per_page, seed)
+    rng = random.Random(seed)
+    stats = _Stats()
+
+    def delay(median: float) -> float:
+        return median * rng.lognormvariate(0, config.jitter) if median > 0 else 0.0
+
+    @app.post("/search")
+    async def tavily_search(request: Request):
+        started = time.perf_counter()
+        body = await request.json()
+        await asyncio.sleep(delay(config.search_latency))
+        base = str(request.base_url).rstrip("/")
+        k = min(int(body.get("max_results") or config.results_per_search), 20)
+        results = [{
+            "title": f"{corpus.topic(n).title()} report {n}",
+            "url": f"{base}/pages/{n}",
+            "content": corpus.paragraphs_of(n)[0][:400],
+            "score": round(1 - i / (k + 1), 3),
+            "raw_content": None,
+        } for i, n in enumerate(corpus.search(body.get("query", ""), k))]
+        stats.record("search", time.perf_counter() - started)
+        return {"query": body.get("query", ""), "results": results, "images": [], "answer": None,
+                "response_time": round(time.perf_counter() - started, 3)}
+
+    @app.get("/pages/{n}")
+    async def page(n: int):
+        started = time.perf_counter()
+        await asyncio.sleep(delay(config.page_latency))
+        stats.record("page", time.perf_counter() - started)
+        return HTMLResponse(corpus.html(n % config.pages))
+
+    async def _tokens(prompt: str):
+        """Yields answer tokens at the configured pace, after the first-token delay"""
+        await asyncio.sleep(delay(config.llm_ttft))
+        for token in _answer_tokens(prompt, config.llm_tokens, rng):
+            if config.llm_token_delay:
+                await asyncio.sleep(config.llm_token_delay)
+            yield token
+
+    def _sse(payload: dict, event: str = None) -> str:
+        head = f"event: {event}\n" if event else ""
+        return f"{head}data: {json.dumps(payload)}\n\n"
+
+    async def openai_chat(request: Request):
+        started = time.perf_counter()
+        body = await request.json()
+        prompt = _prompt_of(body)
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": config.llm_tokens,
+                 "total_tokens": len(prompt) // 4 + config.llm_tokens}
+
+        if not body.get("stream"):
+            text = "".join([t async for t in _tokens(prompt)])
+            stats.record("llm", time.perf_counter() - started)
+            return {"id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                    "model": model, "usage": usage,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}]}
+
+        async def events():
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model}
+            yield _sse({**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                              "finish_reason": None}]})
+            async for token in _tokens(prompt):
+                yield _sse({**chunk, "choices": [{"index": 0, "delta": {"content": token},
+                                                  "finish_reason": None}]})
+            yield _sse({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                        "usage": usage})
+            yield "data: [DONE]\n\n"
+            stats.record("llm", time.perf_counter() - started)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.post("/v1/chat/completions")(openai_chat)
+    app.post("/openai/v1/chat/completions")(openai_chat)
+
+    @app.post("/v1/messages")
+    async def anthropic_messages(request: Request):
+        started = time.perf_counter()
+        body = await request.json()
+        prompt = _prompt_of(body)
+        message = {"id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant",
+                   "model": body.get("model", "stub"), "stop_reason": None, "stop_sequence": None,
+                   "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 0}}
+
+        if not body.get("stream"):
+            text = "".join([t async for t in _tokens(prompt)])
+            stats.record("llm", time.perf_counter() - started)
+            return {**message, "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                    "usage": {"input_tokens": len(prompt) // 4, "output_tokens": config.llm_tokens}}
+
+        async def events():
+            yield _sse({"type": "message_start", "message": {**message, "content": []}}, "message_start")
+            yield _sse({"type": "content_block_start", "index": 0,
+                        "content_block": {"type": "text", "text": ""}}, "content_block_start")
+            async for token in _tokens(prompt):
+                yield _sse({"type": "content_block_delta", "index": 0,
+                            "delta": {"type": "text_delta", "text": token}}, "content_block_delta")
+            yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            yield _sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                        "usage": {"output_tokens": config.llm_tokens}}, "message_delta")
+            yield _sse({"type": "message_stop"}, "message_stop")
+            stats.record("llm", time.perf_counter() - started)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_stats")
+    async def stub_stats():
+        return JSONResponse({"config": asdict(config), "endpoints": stats.snapshot()})
+
+    return app
+
+
+def add_config_args(parser: argparse.ArgumentParser):
+    defaults = StubConfig()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--search-latency", type=float, default=defaults.search_latency)
+    parser.add_argument("--page-latency", type=float, default=defaults.page_latency)
+    parser.add_argument("--llm-ttft", type=float, default=defaults.llm_ttft,
+                        help="Median seconds to the first LLM token")
+    parser.add_argument("--llm-token-delay", type=float, default=defaults.llm_token_delay,
+                        help="Seconds between streamed LLM tokens")
+    parser.add_argument("--llm-tokens", type=int, default=defaults.llm_tokens)
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(pages=args.pages, search_latency=args.search_latency, page_latency=args.page_latency,
+                      llm_ttft=args.llm_ttft, llm_token_delay=args.llm_token_delay, llm_tokens=args.llm_tokens)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_config_args(parser)
+    args = parser.parse_args()
+    uvicorn.run(build_stub_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
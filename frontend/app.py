@@ -1,4 +1,5 @@
 import os
+import json
 import streamlit as st
 import requests
 import time
@@ -75,8 +76,15 @@ with st.sidebar:
     # Live backend status
     try:
         import urllib.request as _ur
-        _ur.urlopen(f"{API_URL}/health", timeout=3)
+        import urllib.error as _ue
+        _ur.urlopen(f"{API_URL}/ready", timeout=3)
         st.success("Backend: Online")
+    except _ue.HTTPError as e:
+        # Answering but still loading the model / vector store
+        if e.code == 503:
+            st.info("Backend: Warming up — research requests wait until it is ready.")
+        else:
+            st.warning("Backend: Starting up — wait ~30s then retry.")
     except Exception:
         st.warning("Backend: Starting up — wait ~30s then retry.")
 
@@ -305,20 +313,48 @@ with st.container():
                 "detailed": "Analyzing web sources and synthesizing report...",
                 "comprehensive": "Running deep research across all sources — this may take a moment..."
             }
-            with st.spinner(spinner_labels[DEPTH]):
-                try:
-                    headers = {}
-                    if API_KEY:
-                        headers["X-API-Key"] = API_KEY
-
-                    response = requests.post(
-                        f"{API_URL}/research",
-                        json={"query": query, "provider": PROVIDER, "depth": DEPTH},
-                        headers=headers,
-                        timeout=180
-                    )
+            status = st.status(spinner_labels[DEPTH], expanded=True)
+            live = status.empty()
+            try:
+                headers = {"Accept": "application/x-ndjson"}
+                if API_KEY:
+                    headers["X-API-Key"] = API_KEY
+
+                # Stream progress events so text appears while the report is written
+                with requests.post(
+                    f"{API_URL}/research/stream",
+                    json={"query": query, "provider": PROVIDER, "depth": DEPTH},
+                    headers=headers,
+                    timeout=180,
+                    stream=True
+                ) as response:
                     if response.status_code == 200:
-                        data = response.json()
+                        stage_labels = {
+                            "research": "Searching the web...",
+                            "scrape": "Reading sources...",
+                            "synthesis": "Writing the report..."
+                        }
+                        partial = ""
+                        data = None
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            if event["type"] == "stage" and event["status"] == "start":
+                                status.update(label=stage_labels.get(event["stage"], event["stage"]))
+                            elif event["type"] == "sources":
+                                status.write(f"Found {len(event['sources'])} sources")
+                            elif event["type"] == "token":
+                                partial += event["text"]
+                                live.markdown(partial)
+                            elif event["type"] == "result":
+                                data = event
+                            elif event["type"] == "error":
+                                raise RuntimeError(event["message"])
+
+                        if data is None:
+                            raise RuntimeError("Stream ended without a result")
+                        status.update(label="Research complete", state="complete", expanded=False)
                         if "results" not in st.session_state:
                             st.session_state.results = []
                         st.session_state.results.append({
@@ -328,18 +364,21 @@ with st.container():
                             "timestamp": time.strftime("%H:%M"),
                             "depth": DEPTH
                         })
-                    elif response.status_code == 403:
-                        st.error("403 Forbidden — API key is required. Set it in the sidebar or add API_KEY to HF Space secrets.")
-                    elif response.status_code == 429:
-                        st.error("Rate limit reached. Please wait a minute before trying again.")
                     else:
-                        st.error(f"Engine Error ({response.status_code}): {response.text}")
-                except Exception as e:
-                    err = str(e)
-                    if "Connection refused" in err or "Failed to establish" in err or "Cannot connect" in err:
-                        st.error("Cannot connect to the research engine. The backend may still be starting — please wait 30 seconds and retry.")
-                    else:
-                        st.error(f"Search failed: {e}")
+                        status.update(label="Research failed", state="error")
+                        if response.status_code == 403:
+                            st.error("403 Forbidden — API key is required. Set it in the sidebar or add API_KEY to HF Space secrets.")
+                        elif response.status_code == 429:
+                            st.error("Rate limit reached. Please wait a minute before trying again.")
+                        else:
+                            st.error(f"Engine Error ({response.status_code}): {response.text}")
+            except Exception as e:
+                status.update(label="Research failed", state="error")
+                err = str(e)
+                if "Connection refused" in err or "Failed to establish" in err or "Cannot connect" in err:
+                    st.error("Cannot connect to the research engine. The backend may still be starting — please wait 30 seconds and retry.")
+                else:
+                    st.error(f"Search failed: {e}")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Differentiator Section
@@ -103,11 +103,17 @@ async function checkHealth() {
     text.textContent = 'Checking...';
 
     try {
-        const resp = await fetch(`${getApiUrl()}/health`, { signal: AbortSignal.timeout(3000) });
+        const resp = await fetch(`${getApiUrl()}/ready`, { signal: AbortSignal.timeout(3000) });
         if (resp.ok) {
             dot.className = 'status-dot online';
             mobileDot.className = 'mobile-status-dot online';
             text.textContent = 'Engine Online';
+        } else if (resp.status === 503) {
+            // Server is up but still loading the model and vector store
+            dot.className = 'status-dot checking';
+            mobileDot.className = 'mobile-status-dot checking';
+            text.textContent = 'Warming Up...';
+            setTimeout(checkHealth, 5000);
         } else {
             throw new Error('non-200');
         }
@@ -359,12 +365,28 @@ function tryWebSocketResearch(query, sessionId, provider, depth) {
                     else if (txt.includes('synth') || txt.includes('report')) activatePipelineStep('synthesizing');
                     updateLoadingCardStatus(currentLoadingCard, msg.message);
 
-                } else if (msg.type === 'chunk') {
-                    // Intermediate chunk received
+                } else if (msg.type === 'stage') {
+                    // research | scrape | synthesis started or finished
+                    if (msg.status === 'start') {
+                        const steps = { research: 'searching', scrape: 'scraping', synthesis: 'synthesizing' };
+                        activatePipelineStep(steps[msg.stage]);
+                    }
+
+                } else if (msg.type === 'sources') {
+                    updateLoadingCardStatus(currentLoadingCard, `Found ${msg.sources.length} sources — reading...`);
+
+                } else if (msg.type === 'token') {
+                    // Live synthesis text, replaced by the rendered report on completion
                     activatePipelineStep('synthesizing');
+                    appendLoadingCardText(currentLoadingCard, msg.text);
+
+                } else if (msg.type === 'error') {
+                    wsInstance.close();
+                    reject(new Error(msg.message));
 
                 } else if (msg.type === 'complete') {
                     activatePipelineStep('done');
+                    wsInstance.close();
 
                 } else if (msg.error) {
                     wsInstance.close();
@@ -393,42 +415,62 @@ function tryWebSocketResearch(query, sessionId, provider, depth) {
     });
 }
 
-// ── REST Research ──────────────────────────────────────────────
+// ── REST Research (NDJSON stream) ──────────────────────────────
 async function tryRestResearch(query, sessionId, provider, depth) {
     activatePipelineStep('searching');
 
-    const headers = { 'Content-Type': 'application/json' };
+    const headers = { 'Content-Type': 'application/json', 'Accept': 'application/x-ndjson' };
     const key = getApiKey();
     if (key) headers['X-API-Key'] = key;
 
-    // Simulate pipeline progression with timers
-    const t1 = setTimeout(() => activatePipelineStep('scraping'), 2000);
-    const t2 = setTimeout(() => activatePipelineStep('synthesizing'), 5000);
-
-    try {
-        const resp = await fetch(`${getApiUrl()}/research`, {
-            method: 'POST',
-            headers,
-            body: JSON.stringify({ query, session_id: sessionId, provider, depth, max_results: 5 })
-        });
+    const resp = await fetch(`${getApiUrl()}/research/stream`, {
+        method: 'POST',
+        headers,
+        body: JSON.stringify({ query, session_id: sessionId, provider, depth, max_results: 5 })
+    });
 
-        clearTimeout(t1);
-        clearTimeout(t2);
+    if (!resp.ok) {
+        const errText = await resp.text();
+        if (resp.status === 403) throw new Error('Invalid API key — check Configuration.');
+        throw new Error(`Server error ${resp.status}: ${errText}`);
+    }
 
-        if (!resp.ok) {
-            const errText = await resp.text();
-            if (resp.status === 403) throw new Error('Invalid API key — check Configuration.');
-            throw new Error(`Server error ${resp.status}: ${errText}`);
+    const steps = { research: 'searching', scrape: 'scraping', synthesis: 'synthesizing' };
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (!line) continue;
+
+            const msg = JSON.parse(line);
+            if (msg.type === 'stage' && msg.status === 'start') {
+                activatePipelineStep(steps[msg.stage]);
+            } else if (msg.type === 'sources') {
+                updateLoadingCardStatus(currentLoadingCard, `Found ${msg.sources.length} sources — reading...`);
+            } else if (msg.type === 'token') {
+                activatePipelineStep('synthesizing');
+                appendLoadingCardText(currentLoadingCard, msg.text);
+            } else if (msg.type === 'result') {
+                result = msg;
+            } else if (msg.type === 'error') {
+                throw new Error(msg.message);
+            }
         }
-
-        const data = await resp.json();
-        completePipeline();
-        renderResult(query, sessionId, provider, depth, data.answer, data.sources || []);
-    } catch (e) {
-        clearTimeout(t1);
-        clearTimeout(t2);
-        throw e;
     }
+
+    if (!result) throw new Error('Stream ended without a result');
+    completePipeline();
+    renderResult(query, sessionId, provider, depth, result.answer, result.sources || []);
 }
 
 // ── Render Result Card ─────────────────────────────────────────
@@ -778,6 +820,20 @@ function updateLoadingCardStatus(card, message) {
     if (statusEl) statusEl.textContent = message;
 }
 
+function appendLoadingCardText(card, text) {
+    if (!card) return;
+    let live = card.querySelector('.loading-live');
+    if (!live) {
+        const body = card.querySelector('.loading-body');
+        if (body) body.innerHTML = '';
+        live = document.createElement('div');
+        live.className = 'loading-live';
+        live.style.whiteSpace = 'pre-wrap';
+        (body || card).appendChild(live);
+    }
+    live.textContent += text;
+}
+
 // ── Error Card ─────────────────────────────────────────────────
 function showErrorCard(sessionId, query, errorMsg) {
     if (currentLoadingCard) {
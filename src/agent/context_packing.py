@@ -0,0 +1,157 @@
+"""Token-budgeted context packing for synthesis"""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from prometheus_client import Counter, Histogram
+
+from ..tools.hybrid_search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Prompt tokens available for retrieved context, per requested depth
+CONTEXT_BUDGETS = {
+    "brief": int(os.getenv("CONTEXT_BUDGET_BRIEF", "1500")),
+    "detailed": int(os.getenv("CONTEXT_BUDGET_DETAILED", "4000")),
+    "comprehensive": int(os.getenv("CONTEXT_BUDGET_COMPREHENSIVE", "8000")),
+}
+# MMR trade-off: 1.0 ranks by relevance only, lower values favour diversity
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+# No single chunk takes more than this many tokens of the budget
+CONTEXT_MAX_CHUNK_TOKENS = int(os.getenv("CONTEXT_MAX_CHUNK_TOKENS", "400"))
+# Leftover budget smaller than this is not worth a partial chunk
+_MIN_PIECE_TOKENS = 40
+
+CONTEXT_TOKENS = Counter(
+    "context_tokens_total", "Context tokens offered to and sent to synthesis", ["stage"]
+)
+CONTEXT_TOKENS_SAVED = Histogram(
+    "context_tokens_saved", "Context tokens packing removed per request",
+    buckets=(0, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_HASH_DIM = 2048
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, close enough for Llama/GPT tokenizers on English prose"""
+    return (len(text) + 3) // 4
+
+
+def _hashed_vectors(texts: Sequence[str]) -> np.ndarray:
+    """Bag-of-words vectors for relevance when no embedding model is supplied"""
+    out = np.zeros((len(texts), _HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+            out[row, h % _HASH_DIM] += 1.0
+    return out
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def trim_to_sentences(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole sentences within `max_tokens` (word cut if the first is too long)"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    cut = text[:max_tokens * 4]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+
+@dataclass
+class PackedContext:
+    documents: List[Document]
+    tokens: int
+    input_tokens: int
+    budget: int
+    dropped: int = 0
+    trimmed: int = 0
+    scores: List[float] = field(default_factory=list)
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.input_tokens - self.tokens
+
+    def render(self) -> str:
+        """Numbered, source-tagged context block for the synthesis prompt"""
+        return "\n\n".join(
+            f"[{i}] {doc.metadata.get('source', 'unknown')}\n{doc.page_content}"
+            for i, doc in enumerate(self.documents, start=1)
+        )
+
+
+def pack_context(query: str, docs: Sequence[Document], depth: str = "brief",
+                 budget: Optional[int] = None,
+                 embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 mmr_lambda: float = CONTEXT_MMR_LAMBDA,
+                 max_chunk_tokens: int = CONTEXT_MAX_CHUNK_TOKENS) -> PackedContext:
+    """
+    Select and trim chunks to fill the depth's token budget.
+
+    Chunks are picked greedily by maximal marginal relevance, so the budget
+    is not spent on five copies of the same passage, and each one is cut at
+    a sentence boundary to fit. `embed` (e.g. the vector store's embeddings)
+    gives semantic relevance; without it, hashed bag-of-words vectors are used.
+    """
+    budget = budget or CONTEXT_BUDGETS.get(depth, CONTEXT_BUDGETS["brief"])
+    docs = [d for d in docs if d.page_content and d.page_content.strip()]
+    input_tokens = sum(estimate_tokens(d.page_content) for d in docs)
+    if not docs:
+        return PackedContext([], 0, 0, budget)
+
+    texts = [query] + [d.page_content for d in docs]
+    vectors = _normalize(np.asarray(embed(texts), dtype=np.float32) if embed else _hashed_vectors(texts))
+    query_vec, doc_vecs = vectors[0], vectors[1:]
+    relevance = doc_vecs @ query_vec
+
+    selected: List[int] = []
+    packed: List[Document] = []
+    scores: List[float] = []
+    remaining = budget
+    trimmed = 0
+    candidates = list(range(len(docs)))
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.zeros(len(docs), dtype=np.float32)
+    while candidates and remaining >= _MIN_PIECE_TOKENS:
+        mmr = mmr_lambda * relevance[candidates] - (1 - mmr_lambda) * redundancy[candidates]
+        best = candidates.pop(int(np.argmax(mmr)))
+        doc = docs[best]
+        original = doc.page_content.strip()
+        text = trim_to_sentences(original, min(max_chunk_tokens, remaining))
+        if not text:
+            continue
+        if len(text) < len(original):
+            trimmed += 1
+        cost = estimate_tokens(text)
+        remaining -= cost
+        selected.append(best)
+        packed.append(Document(page_content=text, metadata=dict(doc.metadata)))
+        scores.append(float(relevance[best]))
+        redundancy = np.maximum(redundancy, doc_vecs @ doc_vecs[best])
+
+    tokens = budget - remaining
+    result = PackedContext(packed, tokens, input_tokens, budget,
+                           dropped=len(docs) - len(selected), trimmed=trimmed, scores=scores)
+    CONTEXT_TOKENS.labels(stage="offered").inc(input_tokens)
+    CONTEXT_TOKENS.labels(stage="packed").inc(tokens)
+    CONTEXT_TOKENS_SAVED.observe(result.saved_tokens)
+    logger.info(f"Packed {len(packed)}/{len(docs)} chunks into {tokens}/{budget} tokens "
+                f"({result.saved_tokens} saved, {trimmed} trimmed)")
+    return result
@@ -0,0 +1,246 @@
+"""Latency-aware LLM provider routing with circuit breakers and hedged requests"""
+import asyncio
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Calls per provider and model kept for the rolling latency and error figures
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "200"))
+# Breaker opens at this error rate (over at least ROUTER_MIN_CALLS calls)...
+ROUTER_ERROR_RATE = float(os.getenv("ROUTER_ERROR_RATE", "0.5"))
+ROUTER_MIN_CALLS = int(os.getenv("ROUTER_MIN_CALLS", "10"))
+# ...or after this many consecutive failures
+ROUTER_MAX_FAILURES = int(os.getenv("ROUTER_MAX_FAILURES", "5"))
+# Seconds an open breaker waits before letting one probe call through
+ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "30"))
+# Hedge delay when the primary has no latency history yet, seconds
+ROUTER_HEDGE_AFTER = float(os.getenv("ROUTER_HEDGE_AFTER", "8"))
+
+LLM_PROVIDER_LATENCY = Histogram(
+    "llm_provider_duration_seconds", "LLM call latency per provider and model", ["provider", "model", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_HEDGES = Counter("llm_hedged_requests_total", "Hedged LLM requests by which call won", ["winner"])
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_circuit_open", "1 while a provider and model's circuit breaker is open", ["provider", "model"],
+    multiprocess_mode="max",
+)
+
+
+class ProviderUnavailable(Exception):
+    """Every candidate provider is failing or has its breaker open"""
+
+
+class _ProviderHealth:
+    """Rolling latency/error window plus a closed -> open -> half-open breaker for one provider and model"""
+
+    def __init__(self, name: str, model: Optional[str], window: int):
+        self.name = name
+        self.model = model
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def p(self, q: float) -> Optional[float]:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else None
+        return statistics.quantiles(self.latencies, n=100)[int(q * 100) - 1]
+
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.model}" if self.model else self.name
+
+
+class LLMRouter:
+    """
+    Chooses which provider serves an LLM call.
+
+    `pinned` mode uses the requested provider and falls back to the next
+    healthy one only if its breaker is open or the call fails. `fastest`
+    mode starts on the provider with the lowest rolling p50 and, if no answer
+    arrives within that provider's p95, fires the same call at the runner-up;
+    the first answer wins and the other call is cancelled.
+
+    Health is tracked per (provider, model): one overloaded model does not
+    open the breaker for, or skew the latency of, its provider's other
+    models. `route` takes the model each provider will be called with.
+    """
+
+    def __init__(self, providers: Sequence[str], window: int = ROUTER_WINDOW,
+                 error_rate: float = ROUTER_ERROR_RATE, min_calls: int = ROUTER_MIN_CALLS,
+                 max_failures: int = ROUTER_MAX_FAILURES, cooldown: float = ROUTER_COOLDOWN,
+                 hedge_after: float = ROUTER_HEDGE_AFTER):
+        self.providers = list(providers)
+        self.window = window
+        self._health: Dict[Tuple[str, Optional[str]], _ProviderHealth] = {}
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.hedge_after = hedge_after
+        self.hedges = 0
+        self.hedge_wins = 0
+        for name in self.providers:
+            self._health_of(name)
+
+    def _health_of(self, name: str, model: Optional[str] = None) -> _ProviderHealth:
+        health = self._health.get((name, model))
+        if health is None:
+            health = self._health[(name, model)] = _ProviderHealth(name, model, self.window)
+        return health
+
+    def _available(self, health: _ProviderHealth) -> bool:
+        if health.opened_at is None:
+            return True
+        # Half-open after the cooldown: one probe call at a time
+        return time.monotonic() - health.opened_at >= self.cooldown and not health.probing
+
+    def _record(self, health: _ProviderHealth, seconds: float, ok: bool):
+        health.outcomes.append(ok)
+        model = health.model or ""
+        LLM_PROVIDER_LATENCY.labels(provider=health.name, model=model,
+                                    outcome="ok" if ok else "error").observe(seconds)
+        if ok:
+            health.latencies.append(seconds)
+            health.consecutive_failures = 0
+            if health.opened_at is not None:
+                logger.info(f"LLM provider {health.label} recovered, closing breaker")
+                health.opened_at = None
+                LLM_CIRCUIT_OPEN.labels(provider=health.name, model=model).set(0)
+        else:
+            health.consecutive_failures += 1
+            tripped = (health.consecutive_failures >= self.max_failures
+                       or (len(health.outcomes) >= self.min_calls and health.error_rate >= self.error_rate))
+            if tripped or health.probing:
+                if health.opened_at is None:
+                    logger.warning(f"Opening breaker for LLM provider {health.label} "
+                                   f"(error rate {health.error_rate:.0%})")
+                health.opened_at = time.monotonic()
+                LLM_CIRCUIT_OPEN.labels(provider=health.name, model=model).set(1)
+        health.probing = False
+
+    def ranked(self, preferred: Optional[str] = None,
+               models: Optional[Mapping[str, str]] = None) -> List[str]:
+        """All providers, fastest rolling p50 for their model first (`preferred` first if given)"""
+        models = models or {}
+        p50 = {n: self._health_of(n, models.get(n)).p(0.5) for n in self.providers}
+        names = sorted(self.providers, key=lambda n: (p50[n] is None, p50[n] or 0))
+        if preferred in p50:
+            names.remove(preferred)
+            names.insert(0, preferred)
+        return names
+
+    async def _timed(self, health: _ProviderHealth, call: Callable[[str], Awaitable[T]]) -> T:
+        if health.opened_at is not None:
+            if health.probing:
+                raise ProviderUnavailable(f"{health.label} breaker is open")
+            health.probing = True
+        started = time.perf_counter()
+        try:
+            result = await call(health.name)
+        except asyncio.CancelledError:
+            # Lost a hedge race; not the provider's fault
+            health.probing = False
+            raise
+        except Exception:
+            self._record(health, time.perf_counter() - started, ok=False)
+            raise
+        self._record(health, time.perf_counter() - started, ok=True)
+        return result
+
+    async def route(self, call: Callable[[str], Awaitable[T]], preferred: Optional[str] = None,
+                    mode: str = "pinned", models: Optional[Mapping[str, str]] = None) -> T:
+        """
+        Run `call(provider)` on the chosen provider(s) and return the first good answer.
+
+        `models` maps each provider to the model `call` will use with it, so
+        latency and breakers are kept per (provider, model).
+        """
+        models = models or {}
+        ranked = self.ranked(None if mode == "fastest" else preferred, models)
+        candidates = [h for h in (self._health_of(n, models.get(n)) for n in ranked) if self._available(h)]
+        if not candidates:
+            raise ProviderUnavailable("All LLM providers have open circuit breakers")
+        if mode == "fastest" and len(candidates) > 1:
+            return await self._hedged(call, candidates)
+        last_error: Optional[Exception] = None
+        for health in candidates:
+            try:
+                return await self._timed(health, call)
+            except Exception as e:
+                logger.warning(f"LLM provider {health.label} failed: {e}")
+                last_error = e
+        raise ProviderUnavailable(f"All LLM providers failed: {last_error}") from last_error
+
+    async def _hedged(self, call: Callable[[str], Awaitable[T]], candidates: List[_ProviderHealth]) -> T:
+        primary, backups = candidates[0], candidates[1:]
+        delay = primary.p(0.95) or self.hedge_after
+        tasks = {asyncio.ensure_future(self._timed(primary, call)): primary}
+        hedged = False
+        last_error: Optional[Exception] = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=delay if backups else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    health = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged:
+                            LLM_HEDGES.labels(winner="primary" if health is primary else "hedge").inc()
+                            self.hedge_wins += health is not primary
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM provider {health.label} failed: {last_error}")
+                if backups and (not done or not tasks):
+                    # Too slow, or failed: bring in the next provider
+                    backup = backups.pop(0)
+                    if not done:
+                        hedged = True
+                        self.hedges += 1
+                    tasks[asyncio.ensure_future(self._timed(backup, call))] = backup
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise ProviderUnavailable(f"All LLM providers failed: {last_error}") from last_error
+
+    def stats(self) -> dict:
+        return {
+            "providers": {
+                h.label: {
+                    "p50_ms": round(h.p(0.5) * 1000, 1) if h.p(0.5) is not None else None,
+                    "p95_ms": round(h.p(0.95) * 1000, 1) if h.p(0.95) is not None else None,
+                    "error_rate": round(h.error_rate, 3),
+                    "calls": len(h.outcomes),
+                    "breaker": "open" if h.opened_at is not None else "closed",
+                }
+                for h in self._health.values()
+            },
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+_router: Optional[LLMRouter] = None
+
+
+def get_llm_router() -> LLMRouter:
+    """Process-wide router over the providers ResearchRequest.provider accepts"""
+    global _router
+    if _router is None:
+        _router = LLMRouter(["groq", "openai", "anthropic"])
+    return _router
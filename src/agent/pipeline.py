@@ -0,0 +1,188 @@
+"""Pipelined fan-out research: search, scrape, index and synthesize overlap"""
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+from langchain_core.documents import Document
+
+from .context_packing import pack_context
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_MAX_SUBQUERIES = int(os.getenv("PIPELINE_MAX_SUBQUERIES", "4"))
+PIPELINE_MAX_URLS = int(os.getenv("PIPELINE_MAX_URLS", "12"))
+# Synthesis starts once this many pages are scraped and chunks indexed...
+PIPELINE_MIN_PAGES = int(os.getenv("PIPELINE_MIN_PAGES", "4"))
+PIPELINE_MIN_CHUNKS = int(os.getenv("PIPELINE_MIN_CHUNKS", "24"))
+# ...or this many seconds after the start, whichever comes first
+PIPELINE_DEADLINE = float(os.getenv("PIPELINE_DEADLINE", "15"))
+# Chunks handed to the indexer at once
+PIPELINE_INDEX_BATCH = int(os.getenv("PIPELINE_INDEX_BATCH", "16"))
+
+_CONJUNCTION = re.compile(r"\s*(?:,|;|\band\b|\bvs\.?|\bversus\b)\s*", re.IGNORECASE)
+
+
+def split_query(query: str, limit: int = PIPELINE_MAX_SUBQUERIES) -> List[str]:
+    """
+    The query itself plus its conjunct parts ("A and B" -> "A", "B").
+
+    Cheap, deterministic default; an LLM-based splitter can be injected instead.
+    """
+    parts = [p.strip() for p in _CONJUNCTION.split(query) if len(p.strip().split()) >= 2]
+    subqueries = [query.strip()] + [p for p in parts if p.lower() != query.strip().lower()]
+    return list(dict.fromkeys(subqueries))[:limit]
+
+
+@dataclass
+class PipelineServices:
+    """
+    The stages, injected so the orchestration can run against stubs.
+
+    search(sub_query) -> [{"url", "content", ...}]
+    scrape(url) -> async iterator of Document chunks (e.g. html_stream.stream_documents)
+    index(chunks) -> store a batch (embed + Chroma + BM25)
+    synthesize(query, documents) -> answer, given the chunks packed for the depth
+    """
+    search: Callable[[str], Awaitable[List[dict]]]
+    scrape: Callable[[str], AsyncIterator[Document]]
+    index: Callable[[List[Document]], Awaitable[None]]
+    synthesize: Callable[[str, List[Document]], Awaitable[str]]
+    split: Callable[[str], List[str]] = split_query
+
+
+@dataclass
+class PipelineResult:
+    answer: str
+    documents: List[Document]
+    sources: List[str]
+    pages_scraped: int
+    # Seconds from start: first_search, first_chunk, sufficient, answer
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class _Run:
+    def __init__(self, query: str, services: PipelineServices, max_urls: int,
+                 min_pages: int, min_chunks: int, index_batch: int):
+        self.query = query
+        self.services = services
+        self.max_urls = max_urls
+        self.min_pages = min_pages
+        self.min_chunks = min_chunks
+        self.index_batch = index_batch
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.urls: List[str] = []
+        self.documents: List[Document] = []
+        self.pages_scraped = 0
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.sufficient = asyncio.Event()
+        self.scrapes: List[asyncio.Task] = []
+
+    def mark(self, name: str):
+        self.timings.setdefault(name, round(time.perf_counter() - self.started, 4))
+
+    def check_sufficient(self):
+        if self.pages_scraped >= self.min_pages and len(self.documents) >= self.min_chunks:
+            self.mark("sufficient")
+            self.sufficient.set()
+
+    async def search(self, sub_query: str):
+        try:
+            results = await self.services.search(sub_query)
+        except Exception as e:
+            logger.warning(f"Search failed for sub-query {sub_query!r}: {e}")
+            return
+        self.mark("first_search")
+        snippets = []
+        for result in results:
+            url = result.get("url")
+            if result.get("content"):
+                snippets.append(Document(page_content=result["content"],
+                                         metadata={"source": url, "kind": "snippet"}))
+            if url and url not in self.urls and len(self.urls) < self.max_urls:
+                self.urls.append(url)
+                # Each URL starts scraping the moment it is known
+                self.scrapes.append(asyncio.ensure_future(self.scrape(url)))
+        for doc in snippets:
+            await self.chunks.put(doc)
+
+    async def scrape(self, url: str):
+        try:
+            async for chunk in self.services.scrape(url):
+                self.mark("first_chunk")
+                await self.chunks.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Scrape failed for {url}: {e}")
+            return
+        self.pages_scraped += 1
+        self.check_sufficient()
+
+    async def indexer(self):
+        """Index chunks in batches as they arrive, until a None sentinel"""
+        done = False
+        while not done:
+            batch = [await self.chunks.get()]
+            while len(batch) < self.index_batch and not self.chunks.empty():
+                batch.append(self.chunks.get_nowait())
+            if None in batch:
+                done = True
+                batch = [c for c in batch if c is not None]
+            if not batch:
+                continue
+            try:
+                await self.services.index(batch)
+            except Exception as e:
+                logger.warning(f"Indexing {len(batch)} chunks failed: {e}")
+            self.documents.extend(batch)
+            self.check_sufficient()
+
+
+async def run_pipeline(query: str, services: PipelineServices,
+                       max_urls: int = PIPELINE_MAX_URLS, min_pages: int = PIPELINE_MIN_PAGES,
+                       min_chunks: int = PIPELINE_MIN_CHUNKS, deadline: float = PIPELINE_DEADLINE,
+                       index_batch: int = PIPELINE_INDEX_BATCH, depth: str = "brief") -> PipelineResult:
+    """
+    Run one research query with overlapping stages.
+
+    Sub-queries are searched concurrently; every URL starts scraping as soon
+    as its search returns; chunks are indexed in batches while pages are
+    still downloading. Synthesis starts once enough pages and chunks are in
+    (or at the deadline, or when everything finished), and pages still
+    loading at that point are abandoned rather than waited for. Synthesis
+    gets the chunks packed into the depth's token budget, not all of them.
+    """
+    run = _Run(query, services, max_urls, min_pages, min_chunks, index_batch)
+    indexer = asyncio.ensure_future(run.indexer())
+    searches = [asyncio.ensure_future(run.search(q)) for q in services.split(query)]
+
+    async def all_work():
+        await asyncio.gather(*searches)
+        # Scrapes started by late searches are in run.scrapes by now
+        await asyncio.gather(*run.scrapes)
+
+    work = asyncio.ensure_future(all_work())
+    sufficient = asyncio.ensure_future(run.sufficient.wait())
+    try:
+        await asyncio.wait({work, sufficient}, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sufficient.cancel()
+        for task in [*searches, *run.scrapes, work]:
+            task.cancel()
+        # Whatever was already scraped still gets indexed before synthesis
+        await run.chunks.put(None)
+        await indexer
+    run.mark("sufficient")
+
+    packed = pack_context(query, run.documents, depth)
+    answer = await services.synthesize(query, packed.documents)
+    run.mark("answer")
+    sources = list(dict.fromkeys(d.metadata.get("source") for d in run.documents if d.metadata.get("source")))
+    logger.info(f"Pipeline: {run.pages_scraped}/{len(run.urls)} pages, {len(run.documents)} chunks, "
+                f"timings {run.timings}")
+    return PipelineResult(answer, run.documents, sources, run.pages_scraped, run.timings)
@@ -0,0 +1,175 @@
+"""Batch research: dedupe queries, share retrieval across the batch, stream results as they finish"""
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from pydantic import BaseModel, Field
+
+from ..tools.fetch import get_fetch_engine
+from ..tools.html_stream import extract_chunks
+from ..tools.scrape_cache import fetch_cached, get_scrape_cache, normalize_url
+from ..tools.search_cache import SearchFn, cached_search, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Queries accepted in one batch
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "200"))
+# Agent runs (search + scrape + synthesis) in flight at once per batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+class BatchResearchRequest(BaseModel):
+    """Many research questions sharing one provider, depth and result count"""
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES)
+    provider: Optional[str] = None
+    depth: Optional[str] = None
+    max_results: Optional[int] = None
+
+
+def group_queries(queries: List[str]) -> List[Tuple[str, List[int]]]:
+    """
+    Unique queries in first-seen order, each with the positions it appeared at.
+
+    Queries that differ only in case, whitespace or punctuation are one query.
+    """
+    groups: Dict[str, Tuple[str, List[int]]] = {}
+    for i, query in enumerate(queries):
+        key = normalize_query(query)
+        if key in groups:
+            groups[key][1].append(i)
+        else:
+            groups[key] = (query.strip(), [i])
+    return list(groups.values())
+
+
+class SharedRetrieval:
+    """
+    Search results and scraped pages shared by every run in one batch.
+
+    Handed to the graph as `config["configurable"]["retrieval"]`, so
+    overlapping questions search each normalized query and scrape each URL
+    once; concurrent requests for the same key wait on the first one. The
+    shared chunks are identical text, so the content-addressed embedding
+    cache embeds them once too. Without a search function only scrapes are
+    shared, and `search` raises RuntimeError.
+    """
+
+    def __init__(self, search: Optional[Callable[[str, int], Awaitable[List[dict]]]],
+                 scrape: Callable[[str], Awaitable[List[Document]]]):
+        self._search = search
+        self._scrape = scrape
+        self._searches: Dict[str, asyncio.Task] = {}
+        self._pages: Dict[str, asyncio.Task] = {}
+        self.searches = 0
+        self.search_hits = 0
+        self.scrapes = 0
+        self.scrape_hits = 0
+
+    def _forget_failure(self, memo: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        # A failed fetch is retried by the next run that needs it
+        if task.cancelled() or task.exception() is not None:
+            memo.pop(key, None)
+
+    async def _shared(self, memo: Dict[str, asyncio.Task], key: str,
+                      make: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        task = memo.get(key)
+        hit = task is not None
+        if not hit:
+            task = asyncio.ensure_future(make())
+            memo[key] = task
+            task.add_done_callback(lambda t: self._forget_failure(memo, key, t))
+        # Shielded, so one run being cancelled does not cancel the fetch for the others
+        return await asyncio.shield(task), hit
+
+    @property
+    def can_search(self) -> bool:
+        return self._search is not None
+
+    async def search(self, query: str, max_results: int = 5) -> List[dict]:
+        if self._search is None:
+            raise RuntimeError("No search function configured for batch retrieval")
+        key = f"{normalize_query(query)}:{max_results}"
+        results, hit = await self._shared(self._searches, key, lambda: self._search(query, max_results))
+        self.searches += 1
+        self.search_hits += hit
+        return results
+
+    async def scrape(self, url: str) -> List[Document]:
+        chunks, hit = await self._shared(self._pages, normalize_url(url), lambda: self._scrape(url))
+        self.scrapes += 1
+        self.scrape_hits += hit
+        return chunks
+
+    def stats(self) -> dict:
+        return {
+            "shared_search": self.can_search,
+            "searches": self.searches,
+            "search_hits": self.search_hits,
+            "scrapes": self.scrapes,
+            "scrape_hits": self.scrape_hits,
+        }
+
+    def close(self):
+        for task in [*self._searches.values(), *self._pages.values()]:
+            task.cancel()
+
+
+async def scrape_page(url: str) -> List[Document]:
+    """Page chunks through the pooled fetch engine and the persistent scrape cache"""
+    page = await fetch_cached(get_fetch_engine(), get_scrape_cache(), url, extract_chunks)
+    if page is None:
+        return []
+    return [Document(page_content=text, metadata={"source": url, "chunk": i})
+            for i, text in enumerate(page.chunk_texts())]
+
+
+def default_search() -> Optional[SearchFn]:
+    """The agent's web search function, or None when it cannot be imported"""
+    try:
+        from ..tools.web_search import search_web
+    except ImportError as e:
+        logger.warning(f"Batch search sharing unavailable, only scrapes are shared: {e}")
+        return None
+    return search_web
+
+
+def build_retrieval(search: Optional[SearchFn] = None) -> SharedRetrieval:
+    """
+    Batch-scoped retrieval over the process-wide search cache and scrape cache.
+
+    `search(query, max_results)` defaults to `default_search()`.
+    """
+    search = search or default_search()
+    return SharedRetrieval(cached_search(search) if search else None, scrape_page)
+
+
+async def run_batch(groups: List[Tuple[str, List[int]]],
+                    handle: Callable[[str, asyncio.Semaphore], Awaitable[dict]],
+                    concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[dict]:
+    """
+    Run `handle(query, slot)` for every unique query and yield its event as soon as it finishes.
+
+    All queries start at once so cache hits come back immediately; `handle`
+    holds `slot` only around the agent run, which bounds concurrent
+    syntheses. Events are tagged with the query and its input positions.
+    Closing the iterator cancels whatever is still running.
+    """
+    slot = asyncio.Semaphore(concurrency)
+
+    async def one(query: str, indices: List[int]) -> dict:
+        try:
+            event = await handle(query, slot)
+        except Exception as e:
+            logger.error(f"Batch query failed: {query[:60]}: {e}", exc_info=True)
+            event = {"type": "error", "status": 500, "message": str(e)}
+        return {**event, "query": query, "indices": indices}
+
+    tasks = [asyncio.ensure_future(one(query, indices)) for query, indices in groups]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,200 @@
+"""Response cache backends for the research endpoint"""
+import logging
+import os
+import statistics
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Optional, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable via env
+CACHE_MAX = int(os.getenv("CACHE_MAX", "500"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))  # seconds, 0 = never expire
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "auto")  # auto | memory | redis
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Number of recent latencies kept per path for the p50 estimate
+_LATENCY_WINDOW = 1000
+
+
+class CacheStats:
+    """Hit/miss counters plus recent latencies for hit and miss paths"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._hit_latency = deque(maxlen=_LATENCY_WINDOW)
+        self._miss_latency = deque(maxlen=_LATENCY_WINDOW)
+
+    def record_hit(self, seconds: float):
+        self.hits += 1
+        self._hit_latency.append(seconds)
+
+    def record_miss(self, seconds: float):
+        self.misses += 1
+        self._miss_latency.append(seconds)
+
+    @staticmethod
+    def _p50_ms(samples) -> Optional[float]:
+        return round(statistics.median(samples) * 1000, 1) if samples else None
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            # Every hit is one agent run (search + scrape + LLM) we did not pay for
+            "llm_runs_saved": self.hits,
+            "p50_hit_ms": self._p50_ms(self._hit_latency),
+            "p50_miss_ms": self._p50_ms(self._miss_latency),
+        }
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = CACHE_MAX, ttl: int = CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        # Mark as most recently used
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: Optional[int] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            # Evict least recently used entry
+            self._data.popitem(last=False)
+
+    async def clear(self):
+        self._data.clear()
+
+    async def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Redis-backed cache shared by all workers, values stored as zlib-compressed JSON"""
+
+    name = "redis"
+
+    def __init__(self, url: str, model: Type[BaseModel], ttl: int = CACHE_TTL,
+                 prefix: str = "research:resp:"):
+        import redis.asyncio as aioredis
+
+        self.client = aioredis.from_url(url)
+        self.model = model
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _dumps(self, value: BaseModel) -> bytes:
+        return zlib.compress(value.model_dump_json(exclude_none=True).encode())
+
+    def _loads(self, raw: bytes) -> BaseModel:
+        return self.model.model_validate_json(zlib.decompress(raw))
+
+    async def get(self, key: str):
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return self._loads(raw)
+        except Exception as e:
+            logger.warning(f"Dropping undecodable cache entry {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: BaseModel, ttl: Optional[int] = None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            await self.client.set(self.prefix + key, self._dumps(value), ex=ttl or None)
+        except Exception as e:
+            logger.warning(f"Redis cache set failed: {e}")
+
+    async def clear(self):
+        try:
+            async for k in self.client.scan_iter(match=self.prefix + "*"):
+                await self.client.delete(k)
+        except Exception as e:
+            logger.warning(f"Redis cache clear failed: {e}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class TieredCache:
+    """Small in-process LRU in front of the shared Redis tier"""
+
+    name = "tiered"
+
+    def __init__(self, local: MemoryCache, shared: RedisCache):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str):
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.shared.get(key)
+        if value is not None:
+            # Promote so repeat hits on this worker skip the network
+            await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value, ttl: Optional[int] = None):
+        await self.local.set(key, value, ttl)
+        await self.shared.set(key, value, ttl)
+
+    async def clear(self):
+        await self.local.clear()
+        await self.shared.clear()
+
+    async def close(self):
+        await self.shared.close()
+
+
+def build_response_cache(model: Type[BaseModel], backend: str = CACHE_BACKEND,
+                         redis_url: Optional[str] = REDIS_URL):
+    """
+    Build the configured cache backend.
+
+    `auto` uses Redis when REDIS_URL is set and the client is installed,
+    otherwise falls back to the in-process LRU.
+    """
+    if backend == "memory" or (backend == "auto" and not redis_url):
+        return MemoryCache()
+    try:
+        shared = RedisCache(redis_url, model=model)
+    except Exception as e:
+        if backend == "redis":
+            raise
+        logger.warning(f"Redis cache unavailable, using in-process cache: {e}")
+        return MemoryCache()
+    # Keep the local tier small; Redis is the source of truth
+    return TieredCache(MemoryCache(max_size=min(CACHE_MAX, 100), ttl=min(CACHE_TTL or 60, 60)), shared)
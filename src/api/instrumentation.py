@@ -0,0 +1,134 @@
+"""Prometheus metrics for the research pipeline"""
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest,
+)
+
+# Counted where the upstream calls happen, not per graph node
+from ..tools.fetch import SCRAPE_FAILURES  # noqa: F401
+from ..tools.search_cache import TAVILY_CALLS  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# Agent runs take seconds to minutes; cache hits take milliseconds
+_LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 180)
+
+RESEARCH_LATENCY = Histogram(
+    "research_request_duration_seconds",
+    "End-to-end research request latency",
+    ["endpoint", "cache"],
+    buckets=_LATENCY_BUCKETS,
+)
+NODE_LATENCY = Histogram(
+    "research_node_duration_seconds",
+    "Latency of each research graph node",
+    ["node"],
+    buckets=_LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "research_cache_lookups_total",
+    "Response cache outcomes (hit, semantic, coalesced, miss)",
+    ["result"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by provider and direction",
+    ["provider", "direction"],
+)
+SCRAPE_BYTES = Counter("scrape_bytes_total", "Bytes of page content scraped")
+ACTIVE_WEBSOCKETS = Gauge(
+    "active_websockets", "Open /ws/research connections", multiprocess_mode="livesum"
+)
+# Redis-backed queues report the same global depth from every worker
+JOB_QUEUE_DEPTH = Gauge(
+    "research_job_queue_depth", "Pending research jobs", multiprocess_mode="max"
+)
+
+
+def render_metrics() -> tuple:
+    """
+    Exposition-format payload and content type.
+
+    With PROMETHEUS_MULTIPROC_DIR set (required when running several uvicorn
+    workers), values are aggregated from every worker's files.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _provider_of(serialized: Optional[dict], metadata: Optional[dict]) -> str:
+    if metadata and metadata.get("provider"):
+        return metadata["provider"]
+    name = ((serialized or {}).get("id") or ["unknown"])[-1].lower()
+    for provider in ("groq", "openai", "anthropic"):
+        if provider in name:
+            return provider
+    return name
+
+
+class PipelineMetrics(AsyncCallbackHandler):
+    """
+    LangChain callback that times graph nodes and counts LLM tokens.
+
+    Passed in the run config, so the nodes themselves need no changes.
+    """
+
+    def __init__(self):
+        self._node_starts: Dict[UUID, tuple] = {}
+        self._llm_providers: Dict[UUID, str] = {}
+
+    async def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata=None,
+                             name: Optional[str] = None, **kwargs: Any):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it
+        if node and (name or (serialized or {}).get("name")) == node:
+            self._node_starts[run_id] = (node, time.perf_counter())
+
+    async def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        started = self._node_starts.pop(run_id, None)
+        if started is None:
+            return
+        node, t0 = started
+        NODE_LATENCY.labels(node=node).observe(time.perf_counter() - t0)
+        if not isinstance(outputs, dict):
+            return
+        if "scrape" in node:
+            docs = outputs.get("scraped_content") or []
+            SCRAPE_BYTES.inc(sum(len(getattr(d, "page_content", "") or "") for d in docs))
+
+    async def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        started = self._node_starts.pop(run_id, None)
+        if started is not None:
+            NODE_LATENCY.labels(node=started[0]).observe(time.perf_counter() - started[1])
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any):
+        self._llm_providers[run_id] = _provider_of(serialized, metadata)
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        provider = self._llm_providers.pop(run_id, "unknown")
+        for generations in response.generations:
+            for gen in generations:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(provider=provider, direction="in").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(provider=provider, direction="out").inc(usage.get("output_tokens", 0))
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._llm_providers.pop(run_id, None)
+
+
+def run_config(provider: Optional[str] = None) -> dict:
+    """Graph run config that attaches the metrics callback"""
+    return {"callbacks": [PipelineMetrics()], "metadata": {"provider": provider or "groq"}}
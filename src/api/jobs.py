@@ -0,0 +1,312 @@
+"""Asynchronous research jobs drained by a bounded worker pool"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Concurrent agent runs per API process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Pending jobs accepted before submissions are rejected
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+# How long finished job records are kept
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))
+# A running job whose lease is not renewed within this window is assumed lost and re-queued
+JOB_LEASE = int(os.getenv("JOB_LEASE", "600"))
+# Longest pause of a worker after repeated store errors (e.g. Redis down), seconds
+JOB_RETRY_MAX = float(os.getenv("JOB_RETRY_MAX", "30"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Lower runs first
+PRIORITY_API_KEY = 0
+PRIORITY_ANONYMOUS = 10
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+def new_job(request: dict, priority: int) -> dict:
+    return {
+        "job_id": uuid.uuid4().hex,
+        "status": QUEUED,
+        "priority": priority,
+        "request": request,
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+class MemoryJobStore:
+    """Single-process job store; jobs are lost on restart"""
+
+    name = "memory"
+
+    def __init__(self, max_pending: int = JOB_QUEUE_MAX, ttl: int = JOB_TTL):
+        self._jobs: Dict[str, dict] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self.max_pending = max_pending
+        self.ttl = ttl
+
+    async def submit(self, job: dict):
+        if self._queue.qsize() >= self.max_pending:
+            raise QueueFull()
+        self._prune()
+        self._jobs[job["job_id"]] = job
+        # seq keeps FIFO order within a priority
+        self._queue.put_nowait((job["priority"], next(self._seq), job["job_id"]))
+
+    async def pop(self) -> dict:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job
+
+    async def save(self, job: dict):
+        self._jobs[job["job_id"]] = job
+
+    async def renew(self, job: dict):
+        pass
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    async def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def recover(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        stale = [k for k, j in self._jobs.items() if j["finished_at"] and j["finished_at"] < cutoff]
+        for k in stale:
+            del self._jobs[k]
+
+
+class RedisJobStore:
+    """
+    Redis-persisted job store shared by all workers.
+
+    Job records are JSON strings with a TTL once finished. Pending ids live in
+    a sorted set scored by (priority, submit time); running ids live in a
+    second sorted set scored by lease deadline so a restarted or crashed
+    worker's jobs are picked up again by `recover`.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, max_pending: int = JOB_QUEUE_MAX, ttl: int = JOB_TTL,
+                 lease: int = JOB_LEASE, prefix: str = "research:jobs:"):
+        import redis.asyncio as aioredis
+
+        self.client = aioredis.from_url(url)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.lease = lease
+        self.prefix = prefix
+        self.pending_key = prefix + "pending"
+        self.running_key = prefix + "running"
+
+    def _job_key(self, job_id: str) -> str:
+        return self.prefix + job_id
+
+    @staticmethod
+    def _score(job: dict) -> float:
+        # Priority dominates; submit time orders jobs within a priority
+        return job["priority"] * 1e10 + job["created_at"]
+
+    async def submit(self, job: dict):
+        if await self.client.zcard(self.pending_key) >= self.max_pending:
+            raise QueueFull()
+        await self.client.set(self._job_key(job["job_id"]), json.dumps(job))
+        await self.client.zadd(self.pending_key, {job["job_id"]: self._score(job)})
+
+    async def pop(self) -> dict:
+        while True:
+            popped = await self.client.bzpopmin(self.pending_key, timeout=5)
+            if not popped:
+                continue
+            job_id = popped[1].decode() if isinstance(popped[1], bytes) else popped[1]
+            await self.client.zadd(self.running_key, {job_id: time.time() + self.lease})
+            job = await self.get(job_id)
+            if job is not None:
+                return job
+
+    async def save(self, job: dict):
+        finished = job["status"] in (DONE, FAILED)
+        await self.client.set(self._job_key(job["job_id"]), json.dumps(job),
+                              ex=self.ttl if finished else None)
+        if finished:
+            await self.client.zrem(self.running_key, job["job_id"])
+
+    async def renew(self, job: dict):
+        """Push the running job's lease deadline out, unless recovery already took it"""
+        await self.client.zadd(self.running_key, {job["job_id"]: time.time() + self.lease}, xx=True)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await self.client.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def depth(self) -> int:
+        return await self.client.zcard(self.pending_key)
+
+    async def recover(self):
+        """Re-queue jobs whose worker died before finishing them"""
+        expired = await self.client.zrangebyscore(self.running_key, 0, time.time())
+        for raw_id in expired:
+            job_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            await self.client.zrem(self.running_key, job_id)
+            job = await self.get(job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                continue
+            job["status"] = QUEUED
+            await self.client.set(self._job_key(job_id), json.dumps(job))
+            await self.client.zadd(self.pending_key, {job_id: self._score(job)})
+            logger.info(f"Re-queued orphaned research job {job_id}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class JobManager:
+    """Runs queued jobs through `handler` with at most `workers` in flight"""
+
+    def __init__(self, store, handler: Callable[[dict], Awaitable[dict]], workers: int = JOB_WORKERS,
+                 retry_max: float = JOB_RETRY_MAX):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.retry_max = retry_max
+        # Renew well inside the lease so one slow store call does not let it lapse
+        self.heartbeat = getattr(store, "lease", JOB_LEASE) / 3
+        self.worker_errors = 0
+        self._tasks = []
+        self._finished: Dict[str, asyncio.Event] = {}
+
+    async def start(self):
+        try:
+            await self.store.recover()
+        except Exception as e:
+            # Redis down at boot must not stop the API; _recover_loop retries
+            logger.warning(f"Initial job recovery failed, will retry: {e}")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        if self.store.name == "redis":
+            self._tasks.append(asyncio.create_task(self._recover_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.close()
+
+    async def submit(self, request: dict, priority: int) -> dict:
+        job = new_job(request, priority)
+        await self.store.submit(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Long-poll: return the job once finished, or its current state at timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in (DONE, FAILED) or remaining <= 0:
+                self._finished.pop(job_id, None)
+                return job
+            # Wake immediately if this process runs the job; otherwise re-check
+            # the shared store periodically (the job may run on another worker)
+            event = self._finished.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def depth(self) -> int:
+        return await self.store.depth()
+
+    async def _worker(self, n: int):
+        failures = 0
+        while True:
+            try:
+                await self._run_next()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Store errors (pop, save): back off and keep the worker alive.
+                # A job left in the running set is re-queued once its lease lapses.
+                failures += 1
+                self.worker_errors += 1
+                delay = min(self.retry_max, 0.5 * 2 ** failures)
+                logger.warning(f"Job worker {n} error, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _run_next(self):
+        job = await self.store.pop()
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        await self.store.save(job)
+        heartbeat = asyncio.create_task(self._renew_lease(job))
+        try:
+            job["result"] = await self.handler(job["request"])
+            job["status"] = DONE
+        except asyncio.CancelledError:
+            # Shutting down: leave the job to be recovered by another worker
+            raise
+        except Exception as e:
+            logger.error(f"Research job {job['job_id']} failed: {e}", exc_info=True)
+            job["error"] = getattr(e, "detail", None) or str(e)
+            job["status"] = FAILED
+        finally:
+            heartbeat.cancel()
+        job["finished_at"] = time.time()
+        await self.store.save(job)
+        event = self._finished.pop(job["job_id"], None)
+        if event is not None:
+            event.set()
+
+    async def _renew_lease(self, job: dict):
+        """Keep a long-running job from being re-queued by `recover` while it runs"""
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                await self.store.renew(job)
+            except Exception as e:
+                logger.warning(f"Lease renewal failed for job {job['job_id']}: {e}")
+
+    async def _recover_loop(self):
+        while True:
+            await asyncio.sleep(min(JOB_LEASE, 60))
+            try:
+                await self.store.recover()
+            except Exception as e:
+                logger.warning(f"Job recovery failed: {e}")
+
+
+def build_job_store():
+    if REDIS_URL:
+        try:
+            return RedisJobStore(REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Redis job store unavailable, jobs will not survive restarts: {e}")
+    return MemoryJobStore()
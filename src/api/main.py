@@ -1,25 +1,44 @@
 """FastAPI application"""
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Security, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Response, Security, Depends
 from fastapi.security import APIKeyHeader
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from pydantic import ValidationError
 from langchain_core.messages import HumanMessage
 from .schemas import ResearchRequest, ResearchResponse, HealthResponse
-from ..agent.graph import agent
-from ..agent.memory import AgentMemory
 from ..middleware.logging_middleware import LoggingMiddleware
+from ..tools.fetch import get_fetch_engine, close_fetch_engine
+from ..tools.scrape_cache import scrape_cache_stats
+from ..tools.embedding_cache import embedding_cache_stats
+from ..tools.embedding_service import get_embedding_service, close_embedding_service
+from ..tools.dedupe import get_deduper
+from ..tools.hybrid_search import sparse_indexes
+from ..tools.collection_lifecycle import COLLECTION_LIFECYCLE, get_collection_lifecycle, run_lifecycle
+from ..tools.search_cache import get_search_cache
+from ..agent.llm_router import get_llm_router
+from .cache import build_response_cache, CacheStats
+from .semantic_cache import build_semantic_cache
+from .singleflight import SingleFlight
+from .streaming import research_events, extract_sources, EventChannel
+from .sessions import SessionManager
+from .ratelimit import RateLimiter, RateLimited, TRUSTED_PROXIES, client_ip, parse_proxies
+from .tracing import TracingMiddleware, TraceCallback, instrument, traces
+from .instrumentation import (
+    render_metrics, run_config, RESEARCH_LATENCY, CACHE_LOOKUPS, ACTIVE_WEBSOCKETS, JOB_QUEUE_DEPTH,
+)
+from .jobs import JobManager, QueueFull, build_job_store, PRIORITY_API_KEY, PRIORITY_ANONYMOUS
+from .readiness import Readiness
+from .batch import BatchResearchRequest, BATCH_CONCURRENCY, build_retrieval, group_queries, run_batch
 import logging
 import uuid
-from datetime import datetime, date
+from datetime import datetime
 import asyncio
 import os
 import hashlib
+import json
+import time
 from pathlib import Path
-from collections import defaultdict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,47 +60,111 @@ DAILY_QUOTA = int(os.getenv("DAILY_QUOTA", "3"))
 # Demo mode: if True, forces depth='brief' to keep token usage low
 DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
-# Max cached responses (LRU-style, trimmed at 500)
-CACHE_MAX = 500
-
-# In-memory per-IP daily usage tracker {ip: {"date": date, "count": int}}
-_ip_quota: dict = defaultdict(lambda: {"date": date.today(), "count": 0})
+# Per-IP request rate and daily quota — Redis counters shared by all workers,
+# with an in-process fallback that forgets idle IPs
+_limiter = RateLimiter(RATE_LIMIT, DAILY_QUOTA)
+_trusted_proxies = parse_proxies(TRUSTED_PROXIES)
+
+# Response cache {query_hash: ResearchResponse} — in-process LRU, or shared via Redis
+# when REDIS_URL is set (see src/api/cache.py for CACHE_MAX / CACHE_TTL / CACHE_BACKEND)
+_response_cache = build_response_cache(ResearchResponse)
+_cache_stats = CacheStats()
+
+# Near-duplicate query index {provider|depth: [(query embedding, query_hash)]}
+_semantic_cache = build_semantic_cache()
+
+# In-flight agent runs {query_hash: Task}, coalesced across workers via a Redis lease
+_inflight = SingleFlight()
+
+# Background TTL / LRU / vacuum sweep of Chroma collections (src/tools/collection_lifecycle.py)
+_lifecycle_task = None
+
+# Seconds a request waits for the research graph to finish warming up before failing
+WARMUP_WAIT = float(os.getenv("WARMUP_WAIT", "120"))
+
+# Warm-up state of the graph, embedding model, Chroma and the HTTP pool (see /ready).
+# The graph and its dependencies (torch, sentence-transformers, chromadb, provider
+# SDKs) are imported here in the background, not at module load, so the server
+# binds and answers /health immediately.
+_readiness = Readiness()
+_warmup_task = None
+
+# Components every agent run uses; requests wait for all of them
+_REQUEST_COMPONENTS = ("agent", "embeddings", "vector_store")
+
+def _load_graph():
+    """Import the compiled research graph and wrap the scraper / vector store in spans"""
+    from ..agent import graph  # noqa: F401
+    from ..tools.scraper import WebScraper
+    from ..tools.vector_store import VectorStore
+    instrument(WebScraper, "scrape_url")
+    instrument(VectorStore, "store_findings", "similarity_search")
+
+def _open_vector_store():
+    """Open CHROMA_DIR through the agent's own VectorStore, then the lifecycle manager's client"""
+    from ..tools.vector_store import VectorStore
+    VectorStore()
+    get_collection_lifecycle()
+
+async def _get_agent():
+    """
+    The compiled research graph, waiting for warm-up if it is still loading.
 
-# In-memory response cache {query_hash: ResearchResponse}
-_response_cache: dict = {}
+    Looked up on the module each call, so `src.agent.graph.agent` stays the
+    one object to patch in tests.
+    """
+    if _readiness.status("agent") is None:
+        # No warm-up ran (e.g. TestClient without lifespan); load inline
+        await _readiness.run("agent", _load_graph)
+    deadline = time.monotonic() + WARMUP_WAIT
+    for name in _REQUEST_COMPONENTS:
+        if _readiness.status(name) is None:
+            # Not warmed up in this process; loads lazily on first use
+            continue
+        try:
+            loaded = await _readiness.wait(name, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Research engine is still warming up",
+                                headers={"Retry-After": "10"})
+        if not loaded:
+            raise HTTPException(status_code=503, detail=f"Research engine failed to load ({name})")
+    from ..agent import graph
+    return graph.agent
+
+def _memory_factory(session_id: str):
+    from ..agent.memory import AgentMemory
+    return AgentMemory(session_id)
 
 def _get_ip(request: Request) -> str:
-    forwarded = request.headers.get("X-Forwarded-For")
-    return (forwarded.split(",")[0].strip() if forwarded else request.client.host) or "unknown"
-
-def _check_quota(ip: str):
-    """Raise 429 if the IP has exceeded its daily quota."""
-    entry = _ip_quota[ip]
-    today = date.today()
-    if entry["date"] != today:
-        # New day — reset counter
-        entry["date"] = today
-        entry["count"] = 0
-    if entry["count"] >= DAILY_QUOTA:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Daily limit of {DAILY_QUOTA} queries reached. Try again tomorrow."
-        )
-    entry["count"] += 1
+    """Client address: the socket peer, or X-Forwarded-For when the peer is a TRUSTED_PROXIES entry"""
+    peer = request.client.host if request.client else None
+    return client_ip(peer, request.headers.get("X-Forwarded-For"), _trusted_proxies)
+
+async def rate_limit(request: Request):
+    """Per-IP request rate limit (RATE_LIMIT), applied to every research entry point"""
+    try:
+        await _limiter.hit(_get_ip(request))
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=e.detail,
+                            headers={"Retry-After": str(e.retry_after)})
+
+async def _reserve_quota(ip: str) -> str:
+    """Take one unit of the IP's daily quota and return the charge, or raise 429 if none is left"""
+    try:
+        return await _limiter.reserve(ip)
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=e.detail,
+                            headers={"Retry-After": str(e.retry_after)})
 
 def _cache_key(query: str, provider: str, depth: str) -> str:
     raw = f"{query.strip().lower()}|{provider}|{depth}"
     return hashlib.md5(raw.encode()).hexdigest()
 
-def _get_cached(key: str):
-    return _response_cache.get(key)
+async def _get_cached(key: str):
+    return await _response_cache.get(key)
 
-def _set_cached(key: str, value):
-    if len(_response_cache) >= CACHE_MAX:
-        # Evict oldest entry
-        oldest = next(iter(_response_cache))
-        del _response_cache[oldest]
-    _response_cache[key] = value
+async def _set_cached(key: str, value):
+    await _response_cache.set(key, value)
 
 async def get_api_key(api_key: str = Security(api_key_header)):
     """Validate API key (optional - only enforced if API_KEY env var is set)"""
@@ -134,11 +217,6 @@ Built with LangGraph + RAG for comprehensive web research.
     }
 )
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -151,14 +229,18 @@ app.add_middleware(
 # Logging middleware
 app.add_middleware(LoggingMiddleware)
 
+# Request-scoped tracing (X-Request-ID); graph nodes are traced through the run
+# config, the scraper and vector store through span-wrapped methods (see _load_graph)
+app.add_middleware(TracingMiddleware)
+
 # ── Serve frontend static files ───────────────────────────────────────────────
 FRONTEND_DIR = Path(__file__).parent.parent.parent / "frontend"
 if FRONTEND_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
 
 
-# Session storage
-sessions = {}
+# Session storage — bounded LRU with idle expiry, mirrored to Redis when available
+sessions = SessionManager(_memory_factory)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -170,28 +252,187 @@ async def health_check():
         timestamp=datetime.utcnow().isoformat()
     )
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the graph, embedding model and vector store are loaded, else 503"""
+    snapshot = _readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+async def _job_queue_depth():
+    """Queued jobs, or None when the job store cannot be reached"""
+    try:
+        return await _jobs.depth()
+    except Exception as e:
+        logger.warning(f"Job queue depth unavailable: {e}")
+        return None
+
 @app.get("/metrics")
 async def metrics():
-    """Prometheus metrics endpoint"""
-    from ..middleware.metrics import (
-        request_count, request_duration, 
-        active_connections, error_count
-    )
-    
-    # Simple metrics response (would use prometheus_client in production)
+    """Prometheus metrics endpoint (text exposition format)"""
+    # Registers the HTTP request collectors alongside the pipeline ones
+    from ..middleware import metrics as _http_metrics  # noqa: F401
+
+    depth = await _job_queue_depth()
+    if depth is not None:
+        JOB_QUEUE_DEPTH.set(depth)
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+@app.get("/debug/trace/{request_id}")
+async def debug_trace(request_id: str, format: str = "json", api_key: str = Depends(get_api_key)):
+    """
+    Per-stage timing breakdown of a recent request on this worker
+
+    - **format**: `json` (spans + breakdown) or `folded` for the collapsed-stack
+      profile of a request sent with `X-Profile: 1` (requires TRACE_PROFILING=true)
+    """
+    trace = traces.get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "folded":
+        if trace.profile is None:
+            raise HTTPException(status_code=404, detail="No profile recorded for this request")
+        return Response(content=trace.profile, media_type="text/plain")
+    return trace.to_dict()
+
+@app.get("/stats", dependencies=[Depends(get_api_key)])
+async def stats():
+    """Internal cache, queue, session and limiter state of this worker (JSON)"""
     return {
-        "requests_total": request_count._value._value if hasattr(request_count, '_value') else 0,
-        "active_connections": active_connections._value._value if hasattr(active_connections, '_value') else 0,
-        "errors_total": error_count._value._value if hasattr(error_count, '_value') else 0,
+        "response_cache": {"backend": _response_cache.name, **_cache_stats.snapshot()},
+        "inflight": _inflight.stats(),
+        "job_queue_depth": await _job_queue_depth(),
+        "sessions": sessions.stats(),
+        "rate_limiter": _limiter.stats(),
+        "fetch": get_fetch_engine().stats(),
+        "scrape_cache": scrape_cache_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_service": get_embedding_service().stats(),
+        "dedupe": get_deduper().stats(),
+        "sparse_index": sparse_indexes.stats(),
+        "search_cache": get_search_cache().stats(),
+        "llm_router": get_llm_router().stats(),
+        "collections": get_collection_lifecycle().stats() if _lifecycle_task else None,
         "status": "ok"
     }
 
 
-@app.post("/research", response_model=ResearchResponse)
-@limiter.limit(RATE_LIMIT)
+def _record_request(endpoint: str, outcome: str, started: float):
+    """Record latency and cache outcome (hit, semantic, coalesced, miss) of a research request"""
+    elapsed = time.perf_counter() - started
+    if outcome in ("hit", "semantic"):
+        _cache_stats.record_hit(elapsed)
+    else:
+        _cache_stats.record_miss(elapsed)
+    CACHE_LOOKUPS.labels(result=outcome).inc()
+    RESEARCH_LATENCY.labels(endpoint=endpoint, cache=outcome).observe(elapsed)
+
+def _graph_config(provider: str = None, retrieval=None) -> dict:
+    """Run config for the research graph: metrics and tracing callbacks, batch-shared retrieval"""
+    config = run_config(provider)
+    config["callbacks"].append(TraceCallback())
+    if retrieval is not None:
+        config["configurable"] = {"retrieval": retrieval}
+    return config
+
+def _semantic_bucket(req: ResearchRequest) -> str:
+    return f"{req.provider or 'groq'}|{req.depth or 'brief'}"
+
+async def _apply_request_policy(request: Request, req: ResearchRequest, api_key):
+    """
+    Quota and demo-mode limits shared by every research entry point
+
+    Returns the daily quota charge (None for API-key callers). Callers
+    refund it with `_limiter.refund` when the request is served from cache
+    or fails, so only agent runs count against the quota.
+    """
+    charge = None
+
+    # Daily quota check (skip if API key provided — trusted caller)
+    if not api_key:
+        charge = await _reserve_quota(_get_ip(request))
+
+    # Demo mode: force cheapest depth to reduce token spend
+    if DEMO_MODE and not api_key:
+        req.depth = "brief"
+        req.max_results = min(req.max_results or 5, 3)
+
+    return charge
+
+async def _lookup_cache(req: ResearchRequest):
+    """
+    Exact, then semantic cache lookup.
+
+    Returns (cache_k, cached, similarity, query_vec). `similarity` is set only
+    for semantic hits; `query_vec` is reused to index the answer on a miss.
+    """
+    cache_k = _cache_key(req.query, req.provider or "groq", req.depth or "brief")
+    cached = await _get_cached(cache_k)
+    if cached:
+        logger.info(f"Cache hit for query: {req.query[:60]}")
+        return cache_k, cached, None, None
+
+    # Reuse the answer of a near-identical past query
+    query_vec = None
+    if _semantic_cache is not None:
+        query_vec = await _semantic_cache.embed(req.query)
+        if query_vec is not None:
+            similar_k, similarity = _semantic_cache.lookup(_semantic_bucket(req), query_vec)
+            cached = await _get_cached(similar_k) if similar_k else None
+            if cached:
+                logger.info(f"Semantic cache hit ({similarity:.3f}) for query: {req.query[:60]}")
+                return cache_k, cached, similarity, query_vec
+    return cache_k, None, None, query_vec
+
+def _initial_state(req: ResearchRequest, session_id: str) -> dict:
+    return {
+        "messages": [HumanMessage(content=req.query)],
+        "session_id": session_id,
+        "research_findings": [],
+        "scraped_content": [],
+        "current_task": "research",
+        "provider": req.provider,
+        "depth": req.depth,
+        "error": None
+    }
+
+async def _publish(req: ResearchRequest, session_id: str, cache_k: str, answer: str,
+                   sources: list, query_vec=None) -> ResearchResponse:
+    """Build the response and cache it for future identical and similar queries"""
+    response = ResearchResponse(
+        answer=answer,
+        sources=sources,
+        session_id=session_id,
+        timestamp=datetime.utcnow().isoformat(),
+        provider=req.provider,
+        confidence=0.85
+    )
+    await _set_cached(cache_k, response)
+    if query_vec is not None:
+        _semantic_cache.add(_semantic_bucket(req), query_vec, cache_k)
+    return response
+
+async def _run_agent(req: ResearchRequest, session_id: str, cache_k: str,
+                     query_vec=None, retrieval=None) -> ResearchResponse:
+    """Run the research graph once and publish the result to the caches"""
+    agent = await _get_agent()
+    result = await agent.ainvoke(_initial_state(req, session_id),
+                                 config=_graph_config(req.provider, retrieval))
+
+    # Extract response
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+
+    response_content = result["messages"][-1].content if result.get("messages") else "No response generated"
+    sources = extract_sources(result.get('research_findings', []))
+    return await _publish(req, session_id, cache_k, response_content, sources, query_vec)
+
+
+@app.post("/research", response_model=ResearchResponse, dependencies=[Depends(rate_limit)])
 async def research_endpoint(
     request: Request, 
     req: ResearchRequest,
+    http_response: Response,
     api_key: str = Depends(get_api_key)
 ):
     """
@@ -201,95 +442,297 @@ async def research_endpoint(
     - **session_id**: Optional session ID for continuity
     - **max_results**: Max search results (1-10)
     """
+    charge = None
     try:
-        ip = _get_ip(request)
-
-        # 1. Daily quota check (skip if API key provided — trusted caller)
-        if not api_key:
-            _check_quota(ip)
+        started = time.perf_counter()
 
-        # 2. Demo mode: force cheapest depth to reduce token spend
-        if DEMO_MODE and not api_key:
-            req.depth = "brief"
-            req.max_results = min(req.max_results or 5, 3)
+        # 1-2. Daily quota and demo-mode limits
+        charge = await _apply_request_policy(request, req, api_key)
 
-        # 3. Cache lookup — return immediately if same query+provider+depth seen before
-        cache_k = _cache_key(req.query, req.provider or "groq", req.depth or "brief")
-        cached = _get_cached(cache_k)
+        # 3. Cache lookup — return immediately if the same (or a near-identical) query was seen
+        cache_k, cached, similarity, query_vec = await _lookup_cache(req)
         if cached:
-            logger.info(f"Cache hit for query: {req.query[:60]}")
+            # Cache hits don't count against the daily quota
+            await _limiter.refund(charge)
+            _record_request("research", "hit" if similarity is None else "semantic", started)
+            if similarity is None:
+                http_response.headers["X-Cache"] = "hit"
+            else:
+                http_response.headers["X-Cache"] = "semantic"
+                http_response.headers["X-Cache-Similarity"] = f"{similarity:.4f}"
             return cached
 
         # Generate session ID if not provided
         session_id = req.session_id or str(uuid.uuid4())
+        await sessions.add_message(session_id, "user", req.query)
         
-        # Initialize or get memory
-        if session_id not in sessions:
-            sessions[session_id] = AgentMemory(session_id)
-        
-        memory = sessions[session_id]
-        memory.add_message("user", req.query)
-        
-        # Execute agent
-        state = {
-            "messages": [HumanMessage(content=req.query)],
-            "session_id": session_id,
-            "research_findings": [],
-            "scraped_content": [],
-            "current_task": "research",
-            "provider": req.provider,
-            "depth": req.depth,
-            "error": None
-        }
-        
-        result = await agent.ainvoke(state)
-        
-        # Extract response
-        if result.get("error"):
-            raise HTTPException(status_code=500, detail=result["error"])
-        
-        response_content = result["messages"][-1].content if result.get("messages") else "No response generated"
-        
-        # Extract sources
-        sources = []
-        seen_urls = set()
-        for finding in result.get('research_findings', []):
-            url = finding.get('url', '')
-            if url and url not in seen_urls:
-                sources.append({
-                    "title": finding.get('title', 'Source'),
-                    "url": url
-                })
-                seen_urls.add(url)
-        
-        memory.add_message("assistant", response_content)
-
-        response = ResearchResponse(
-            answer=response_content,
-            sources=sources,
-            session_id=session_id,
-            timestamp=datetime.utcnow().isoformat(),
-            provider=req.provider,
-            confidence=0.85
-        )
-
-        # 4. Cache the result for future identical queries
-        _set_cached(cache_k, response)
-        
+        # 4. Execute agent — concurrent identical queries share a single run
+        async def run():
+            return await _run_agent(req, session_id, cache_k, query_vec)
+
+        response, shared = await _inflight.do(cache_k, run, lambda: _get_cached(cache_k))
+        if shared:
+            # Served by another caller's run — not charged
+            await _limiter.refund(charge)
+            if response.session_id != session_id:
+                response = response.model_copy(update={"session_id": session_id})
+
+        await sessions.add_message(session_id, "assistant", response.answer)
+        _record_request("research", "coalesced" if shared else "miss", started)
+        http_response.headers["X-Cache"] = "coalesced" if shared else "miss"
+
         return response
         
     except HTTPException:
+        await _limiter.refund(charge)
         raise
     except Exception as e:
+        await _limiter.refund(charge)
         logger.error(f"Research endpoint error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _encode_event(event: dict, sse: bool) -> str:
+    payload = json.dumps(event, default=str)
+    if sse:
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+@app.post("/research/stream", dependencies=[Depends(rate_limit)])
+async def research_stream_endpoint(
+    request: Request,
+    req: ResearchRequest,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Execute research query, streaming progress as it happens
+
+    Returns NDJSON (one event per line) by default, or Server-Sent Events when
+    the request sends `Accept: text/event-stream`. Events are the same typed
+    payloads as `/ws/research` (`stage`, `sources`, `token`, `result`,
+    `error`). Cached answers are replayed as a single `result` event.
+    """
+    started = time.perf_counter()
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+
+    # Quota, demo mode and cache lookup run before the stream opens so
+    # errors still surface as regular HTTP status codes
+    charge = await _apply_request_policy(request, req, api_key)
+    try:
+        cache_k, cached, similarity, query_vec = await _lookup_cache(req)
+    except Exception:
+        await _limiter.refund(charge)
+        raise
+
+    if cached:
+        await _limiter.refund(charge)
+        _record_request("stream", "hit" if similarity is None else "semantic", started)
+        event = {"type": "result", **cached.model_dump(mode="json"), "cached": True}
+        if similarity is not None:
+            event["similarity"] = round(similarity, 4)
+        return StreamingResponse(iter([_encode_event(event, sse)]), media_type=media_type)
+
+    session_id = req.session_id or str(uuid.uuid4())
+    await sessions.add_message(session_id, "user", req.query)
+
+    async def events():
+        try:
+            state = _initial_state(req, session_id)
+            agent = await _get_agent()
+            async for event in research_events(agent, state, config=_graph_config(req.provider)):
+                if event["type"] == "result":
+                    response = await _publish(req, session_id, cache_k, event["answer"],
+                                              event["sources"], query_vec)
+                    await sessions.add_message(session_id, "assistant", response.answer)
+                    _record_request("stream", "miss", started)
+                    event = {"type": "result", **response.model_dump(mode="json"), "cached": False}
+                yield _encode_event(event, sse)
+            if event["type"] == "error":
+                await _limiter.refund(charge)
+        except Exception as e:
+            await _limiter.refund(charge)
+            logger.error(f"Research stream error: {e}", exc_info=True)
+            yield _encode_event({"type": "error", "message": str(e)}, sse)
+
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        # Stop reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _batch_item(request: Request, batch: BatchResearchRequest, query: str, api_key,
+                      retrieval, slot: asyncio.Semaphore, charge_rate: bool = True) -> dict:
+    """One query of a batch: same rate limit, quota, cache and coalescing path as /research"""
+    started = time.perf_counter()
+    try:
+        req = ResearchRequest(query=query, **batch.model_dump(exclude_none=True, exclude={"queries"}))
+    except ValidationError as e:
+        return {"type": "error", "status": 422, "message": str(e)}
+    charge = None
+    try:
+        if charge_rate:
+            await rate_limit(request)
+        charge = await _apply_request_policy(request, req, api_key)
+        cache_k, cached, similarity, query_vec = await _lookup_cache(req)
+        if cached:
+            await _limiter.refund(charge)
+            _record_request("batch", "hit" if similarity is None else "semantic", started)
+            return {"type": "result", **cached.model_dump(mode="json"), "cached": True}
+
+        session_id = req.session_id or str(uuid.uuid4())
+        await sessions.add_message(session_id, "user", req.query)
+
+        async def run():
+            async with slot:
+                return await _run_agent(req, session_id, cache_k, query_vec, retrieval)
+
+        response, shared = await _inflight.do(cache_k, run, lambda: _get_cached(cache_k))
+        if shared:
+            await _limiter.refund(charge)
+            if response.session_id != session_id:
+                response = response.model_copy(update={"session_id": session_id})
+        await sessions.add_message(session_id, "assistant", response.answer)
+        _record_request("batch", "coalesced" if shared else "miss", started)
+        return {"type": "result", **response.model_dump(mode="json"), "cached": False}
+    except HTTPException as e:
+        await _limiter.refund(charge)
+        return {"type": "error", "status": e.status_code, "message": e.detail}
+    except Exception:
+        await _limiter.refund(charge)
+        raise
+
+@app.post("/research/batch")
+async def research_batch_endpoint(
+    request: Request,
+    batch: BatchResearchRequest,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Research many queries in one request, streaming NDJSON results as each finishes
+
+    Duplicate queries (ignoring case and punctuation) run once; each `result`
+    or `error` line carries the `query` and the `indices` it answers in the
+    input list. Cached answers come back first. Uncached queries share one
+    set of search results and scraped pages and run at most
+    BATCH_CONCURRENCY syntheses at a time. A final `summary` line closes the
+    stream. Every unique query counts against the per-minute rate limit, and
+    every agent run against the daily quota, like /research; queries past the
+    rate limit come back as 429 `error` lines.
+    """
+    # The first query is charged up front, so an IP already over the limit gets a plain 429
+    await rate_limit(request)
+    started = time.perf_counter()
+    groups = group_queries(batch.queries)
+    retrieval = build_retrieval()
+    first = groups[0][0]
+
+    async def handle(query: str, slot: asyncio.Semaphore) -> dict:
+        return await _batch_item(request, batch, query, api_key, retrieval, slot,
+                                 charge_rate=query != first)
+
+    async def events():
+        counts = {"cached": 0, "failed": 0}
+        try:
+            async for event in run_batch(groups, handle, BATCH_CONCURRENCY):
+                if event["type"] == "error":
+                    counts["failed"] += 1
+                elif event.get("cached"):
+                    counts["cached"] += 1
+                yield _encode_event(event, sse=False)
+            yield _encode_event({
+                "type": "summary",
+                "queries": len(batch.queries),
+                "unique": len(groups),
+                **counts,
+                "seconds": round(time.perf_counter() - started, 3),
+                "retrieval": retrieval.stats(),
+            }, sse=False)
+        finally:
+            retrieval.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _run_job(request: dict) -> dict:
+    """Job handler: same cache, coalescing and quota path as /research"""
+    started = time.perf_counter()
+    request = dict(request)
+    charge = request.pop("_charge", None)
+    try:
+        req = ResearchRequest(**request)
+        cache_k, cached, similarity, query_vec = await _lookup_cache(req)
+        if cached:
+            await _limiter.refund(charge)
+            _record_request("job", "hit" if similarity is None else "semantic", started)
+            return cached.model_dump(mode="json")
+
+        session_id = req.session_id or str(uuid.uuid4())
+        await sessions.add_message(session_id, "user", req.query)
+
+        async def run():
+            return await _run_agent(req, session_id, cache_k, query_vec)
+
+        response, shared = await _inflight.do(cache_k, run, lambda: _get_cached(cache_k))
+        if shared:
+            await _limiter.refund(charge)
+        await sessions.add_message(session_id, "assistant", response.answer)
+        _record_request("job", "coalesced" if shared else "miss", started)
+        return response.model_dump(mode="json")
+    except Exception:
+        await _limiter.refund(charge)
+        raise
+
+# Research job queue, persisted in Redis when REDIS_URL is set
+_jobs = JobManager(build_job_store(), _run_job)
+
+@app.post("/research/jobs", status_code=202, dependencies=[Depends(rate_limit)])
+async def submit_research_job(
+    request: Request,
+    req: ResearchRequest,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Queue a research query and return a job id immediately
+
+    Callers with a valid API key are served before anonymous traffic.
+    Poll `GET /research/jobs/{job_id}` for the result.
+    """
+    charge = await _apply_request_policy(request, req, api_key)
+    priority = PRIORITY_API_KEY if api_key else PRIORITY_ANONYMOUS
+    try:
+        # The quota reservation travels with the job so the worker can refund it
+        job = await _jobs.submit({**req.model_dump(mode="json"), "_charge": charge}, priority)
+    except QueueFull:
+        await _limiter.refund(charge)
+        raise HTTPException(status_code=503, detail="Research queue is full. Try again shortly.")
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/research/jobs/{job_id}")
+async def get_research_job(job_id: str, wait: float = 0, api_key: str = Depends(get_api_key)):
+    """
+    Job status and, once finished, its result
+
+    - **wait**: long-poll up to this many seconds (max 60) for the job to finish
+    """
+    if wait > 0:
+        job = await _jobs.wait(job_id, min(wait, 60))
+    else:
+        job = await _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {k: v for k, v in job.items() if k != "request"}
+
 @app.websocket("/ws/research")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for streaming research responses
     """
     await websocket.accept()
+    ACTIVE_WEBSOCKETS.inc()
     session_id = str(uuid.uuid4())
     
     logger.info(f"WebSocket connected: {session_id}")
@@ -306,7 +749,11 @@ async def websocket_endpoint(websocket: WebSocket):
             
             # Validate
             try:
-                req = ResearchRequest(query=query, session_id=session_id)
+                req = ResearchRequest(
+                    query=query,
+                    session_id=session_id,
+                    **{k: data[k] for k in ("provider", "depth") if data.get(k)}
+                )
             except Exception as e:
                 await websocket.send_json({"error": str(e)})
                 continue
@@ -318,6 +765,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 "research_findings": [],
                 "scraped_content": [],
                 "current_task": "research",
+                "provider": req.provider,
+                "depth": req.depth,
                 "error": None
             }
             
@@ -326,13 +775,17 @@ async def websocket_endpoint(websocket: WebSocket):
                 "message": "Starting research..."
             })
             
-            # Stream agent execution
-            async for chunk in agent.astream(state):
-                await websocket.send_json({
-                    "type": "chunk",
-                    "data": chunk
-                })
-                await asyncio.sleep(0.1)  # Small delay for UI rendering
+            # Stream stage events and synthesis tokens as they are produced;
+            # the channel merges tokens while a slow client catches up
+            agent = await _get_agent()
+            channel = EventChannel(websocket.send_json)
+            try:
+                async for event in research_events(agent, state, config=_graph_config(req.provider)):
+                    channel.put(event)
+                await channel.close()
+            except BaseException:
+                channel.abort()
+                raise
             
             await websocket.send_json({
                 "type": "complete",
@@ -347,19 +800,64 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.send_json({"error": str(e)})
         except:
             pass
+    finally:
+        ACTIVE_WEBSOCKETS.dec()
+
+async def _open_http_pool():
+    # The pool binds to the running loop, so it is created here rather than in a thread
+    get_fetch_engine()
+
+async def _warm_up():
+    """
+    Load heavy components in the background, after the server is accepting requests
+
+    Phase one imports the graph (torch, chromadb and the provider SDKs come in
+    with it) and opens the HTTP pool; phase two loads the embedding model and
+    opens Chroma, which then starts the collection lifecycle sweep. Requests
+    wait for every component in _REQUEST_COMPONENTS; the HTTP pool is
+    optional since the fetch engine opens lazily anyway.
+    """
+    global _lifecycle_task
+    for name, required in (("agent", True), ("http_pool", False), ("embeddings", True), ("vector_store", True)):
+        _readiness.declare(name, required)
+    await asyncio.gather(
+        _readiness.run("agent", _load_graph),
+        _readiness.run("http_pool", _open_http_pool, required=False),
+    )
+    await asyncio.gather(
+        _readiness.run("embeddings", lambda: get_embedding_service().model),
+        _readiness.run("vector_store", _open_vector_store),
+    )
+    if COLLECTION_LIFECYCLE and _readiness.status("vector_store") == "ready":
+        _lifecycle_task = asyncio.create_task(run_lifecycle(get_collection_lifecycle()))
+    logger.info(f"Warm-up finished: {_readiness.snapshot()['components']}")
 
 @app.on_event("startup")
 async def startup_event():
     """Application startup"""
     logger.info("AI Research Agent API starting up...")
     logger.info("Docs available at: /docs")
+    await _jobs.start()
+    global _warmup_task
+    _readiness.started = time.monotonic()
+    _warmup_task = asyncio.create_task(_warm_up())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
     logger.info("AI Research Agent API shutting down...")
     # Clean up sessions
-    sessions.clear()
+    await sessions.close()
+    await _response_cache.close()
+    await _inflight.close()
+    await _jobs.stop()
+    await _limiter.close()
+    await close_fetch_engine()
+    await close_embedding_service()
+    await get_search_cache().close()
+    for task in (_warmup_task, _lifecycle_task):
+        if task is not None:
+            task.cancel()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,278 @@
+"""Per-IP rate limiting and daily quota, shared across workers via Redis"""
+import ipaddress
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+# Reverse proxies (IPs or CIDRs, comma-separated) whose X-Forwarded-For is believed.
+# Empty = clients are keyed on the socket peer and X-Forwarded-For is ignored
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+# Local fallback: sweep stale IPs every this many checks
+_SWEEP_EVERY = 1000
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_proxies(spec: str) -> Tuple[ipaddress._BaseNetwork, ...]:
+    """'10.0.0.0/8, 127.0.0.1' -> networks"""
+    return tuple(ipaddress.ip_network(p.strip(), strict=False) for p in spec.split(",") if p.strip())
+
+
+def _trusted(ip: str, proxies: Iterable[ipaddress._BaseNetwork]) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(addr in net for net in proxies)
+
+
+def client_ip(peer: Optional[str], forwarded: Optional[str],
+              proxies: Sequence[ipaddress._BaseNetwork] = ()) -> str:
+    """
+    The address limits are keyed on.
+
+    The socket peer, unless it is a trusted proxy: then X-Forwarded-For is
+    walked from the right (the end each proxy appends to) past trusted hops,
+    and the first untrusted address is the client. Entries a client put at
+    the left of the header are never reached.
+    """
+    ip = peer or "unknown"
+    if not forwarded or not _trusted(ip, proxies):
+        return ip
+    for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        ip = hop
+        if not _trusted(hop, proxies):
+            break
+    return ip
+
+
+def quota_day() -> str:
+    """The quota day, in UTC like the Retry-After sent when it runs out"""
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+class RateLimited(Exception):
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'10/minute' -> (10, 60)"""
+    count, _, period = rate.partition("/")
+    period = period.strip().lower().rstrip("s")
+    if period not in _PERIODS:
+        raise ValueError(f"Unsupported rate period in {rate!r}")
+    return int(count), _PERIODS[period]
+
+
+# Sliding-window log: drop timestamps older than the window, admit if under limit
+_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0}
+"""
+
+# Reserve one unit of today's quota if any is left
+_RESERVE_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], 90000)
+return 1
+"""
+
+_REFUND_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used > 0 then
+    return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+
+class MemoryBackend:
+    """Single-process fallback; idle IPs are swept so memory tracks active clients"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._windows: Dict[str, deque] = {}
+        self._quota: Dict[str, Tuple[str, int]] = {}
+        self._ops = 0
+
+    async def hit(self, ip: str, limit: int, window: int) -> float:
+        now = time.monotonic()
+        self._maybe_sweep(now, window)
+        q = self._windows.get(ip)
+        if q is None:
+            q = self._windows[ip] = deque()
+        while q and q[0] <= now - window:
+            q.popleft()
+        if len(q) >= limit:
+            return q[0] + window - now
+        q.append(now)
+        return 0.0
+
+    async def reserve(self, ip: str, quota: int, day: str) -> bool:
+        last_day, used = self._quota.get(ip, (day, 0))
+        if last_day != day:
+            used = 0
+        if used >= quota:
+            return False
+        self._quota[ip] = (day, used + 1)
+        return True
+
+    async def refund(self, ip: str, day: str):
+        entry = self._quota.get(ip)
+        # A reservation from an earlier day has nothing left to give back
+        if entry and entry[0] == day and entry[1] > 0:
+            self._quota[ip] = (day, entry[1] - 1)
+
+    def _maybe_sweep(self, now: float, window: int):
+        self._ops += 1
+        if self._ops % _SWEEP_EVERY:
+            return
+        stale = [ip for ip, q in self._windows.items() if not q or q[-1] <= now - window]
+        for ip in stale:
+            del self._windows[ip]
+        today = quota_day()
+        for ip in [ip for ip, (day, _) in self._quota.items() if day != today]:
+            del self._quota[ip]
+
+    def size(self) -> int:
+        return len(self._windows) + len(self._quota)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Atomic Lua-scripted counters; every key expires on its own"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "research:rl:"):
+        import redis.asyncio as aioredis
+
+        self.client = aioredis.from_url(url)
+        self.prefix = prefix
+        self._window = self.client.register_script(_WINDOW_SCRIPT)
+        self._reserve = self.client.register_script(_RESERVE_SCRIPT)
+        self._refund = self.client.register_script(_REFUND_SCRIPT)
+        self._seq = 0
+
+    def _quota_key(self, ip: str, day: str) -> str:
+        return f"{self.prefix}quota:{day}:{ip}"
+
+    async def hit(self, ip: str, limit: int, window: int) -> float:
+        now_ms = int(time.time() * 1000)
+        self._seq += 1
+        # Member must be unique per request even within one millisecond
+        member = f"{now_ms}-{os.getpid()}-{self._seq}"
+        allowed, retry_ms = await self._window(
+            keys=[f"{self.prefix}win:{ip}"], args=[now_ms, window * 1000, limit, member]
+        )
+        return 0.0 if allowed else max(int(retry_ms), 0) / 1000
+
+    async def reserve(self, ip: str, quota: int, day: str) -> bool:
+        return bool(await self._reserve(keys=[self._quota_key(ip, day)], args=[quota]))
+
+    async def refund(self, ip: str, day: str):
+        await self._refund(keys=[self._quota_key(ip, day)])
+
+    def size(self) -> int:
+        return 0
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """
+    One engine for the per-window request limit and the daily quota.
+
+    The window limit counts every request. The daily quota is reserved up
+    front (atomically, so concurrent requests cannot overshoot it) and
+    refunded when the request is served from cache or fails, so only
+    requests that actually ran the agent are charged.
+    """
+
+    def __init__(self, rate: str, daily_quota: int, redis_url: Optional[str] = REDIS_URL):
+        self.limit, self.window = parse_rate(rate)
+        self.daily_quota = daily_quota
+        self._fallback = MemoryBackend()
+        self.backend = self._fallback
+        if redis_url:
+            try:
+                self.backend = RedisBackend(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis unavailable, rate limits are per-process: {e}")
+        self.rejected = 0
+
+    async def _call(self, method: str, *args):
+        try:
+            return await getattr(self.backend, method)(*args)
+        except Exception as e:
+            if self.backend is self._fallback:
+                raise
+            # Fail soft to per-process limits rather than rejecting or failing open
+            logger.warning(f"Redis rate limiter error, using local counters: {e}")
+            return await getattr(self._fallback, method)(*args)
+
+    async def hit(self, ip: str):
+        retry_after = await self._call("hit", ip, self.limit, self.window)
+        if retry_after > 0:
+            self.rejected += 1
+            raise RateLimited(
+                f"Rate limit exceeded: {self.limit} per {self.window} seconds",
+                retry_after=int(retry_after) + 1
+            )
+
+    async def reserve(self, ip: str) -> str:
+        """
+        Take one unit of the IP's quota for today (UTC).
+
+        Returns the charge to hand back to `refund`; it names the day it was
+        taken from, so a refund after midnight does not touch the new day.
+        """
+        day = quota_day()
+        if not await self._call("reserve", ip, self.daily_quota, day):
+            self.rejected += 1
+            raise RateLimited(
+                f"Daily limit of {self.daily_quota} queries reached. Try again tomorrow.",
+                retry_after=int(86400 - time.time() % 86400)
+            )
+        return f"{day}/{ip}"
+
+    async def refund(self, charge: Optional[str]):
+        if charge:
+            day, _, ip = charge.partition("/")
+            await self._call("refund", ip, day)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "rejected": self.rejected,
+            "tracked_local": self._fallback.size(),
+        }
+
+    async def close(self):
+        await self.backend.close()
@@ -0,0 +1,92 @@
+"""Background warm-up of heavy components and the readiness state behind /ready"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class _Component:
+    __slots__ = ("status", "required", "seconds", "error", "loaded")
+
+    def __init__(self, required: bool):
+        self.status = PENDING
+        self.required = required
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.loaded = asyncio.Event()
+
+
+class Readiness:
+    """
+    Tracks warm-up of named components (model, vector store, HTTP pool, ...).
+
+    Liveness (/health) only says the process answers; readiness says the
+    required components are loaded. Each component loads once, in a worker
+    thread unless it is async, so imports and model loading do not block the
+    event loop; callers that need one before it is ready can `wait` for it.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, _Component] = {}
+        self.started: Optional[float] = None
+
+    def declare(self, name: str, required: bool = True) -> _Component:
+        if name not in self._components:
+            self._components[name] = _Component(required)
+        return self._components[name]
+
+    async def run(self, name: str, load: Callable[[], object], required: bool = True):
+        """Run `load()` (off the event loop unless it is async) and record how it went"""
+        component = self.declare(name, required)
+        if component.status != PENDING:
+            return
+        component.status = LOADING
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(load):
+                await load()
+            else:
+                await asyncio.to_thread(load)
+        except Exception as e:
+            component.status = FAILED
+            component.error = str(e)
+            log = logger.error if required else logger.warning
+            log(f"Warm-up of {name} failed: {e}")
+        else:
+            component.status = READY
+            logger.info(f"Warm-up of {name} done in {time.perf_counter() - started:.2f}s")
+        component.seconds = round(time.perf_counter() - started, 3)
+        component.loaded.set()
+
+    async def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Wait for a declared component to finish loading; True if it is ready"""
+        component = self._components.get(name)
+        if component is None:
+            return False
+        await asyncio.wait_for(component.loaded.wait(), timeout)
+        return component.status == READY
+
+    def status(self, name: str) -> Optional[str]:
+        component = self._components.get(name)
+        return component.status if component else None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._components) and all(
+            c.status == READY for c in self._components.values() if c.required
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.monotonic() - self.started, 3) if self.started else None,
+            "components": {
+                name: {"status": c.status, "required": c.required, "seconds": c.seconds, "error": c.error}
+                for name, c in self._components.items()
+            },
+        }
@@ -0,0 +1,107 @@
+"""Semantic near-duplicate query cache"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "true").lower() == "true"
+# Minimum cosine similarity for two queries to share an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# Max remembered queries per (provider, depth) bucket
+SEMANTIC_CACHE_MAX = int(os.getenv("SEMANTIC_CACHE_MAX", "2000"))
+
+
+class _Bucket:
+    """Fixed-capacity matrix of unit query vectors with LRU slot reuse"""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    def search(self, vec: np.ndarray) -> Tuple[int, float]:
+        if self.size == 0:
+            return -1, 0.0
+        # Vectors are normalised, so the dot product is the cosine similarity.
+        # Exact search over a few thousand 384-d rows is well under a millisecond.
+        scores = self.vectors[:self.size] @ vec
+        idx = int(np.argmax(scores))
+        return idx, float(scores[idx])
+
+    def add(self, vec: np.ndarray, key: str):
+        if self.size < len(self.keys):
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+        self.vectors[slot] = vec
+        self.keys[slot] = key
+        self.last_used[slot] = time.monotonic()
+
+
+class SemanticCache:
+    """
+    Maps query embeddings to response-cache keys.
+
+    Only keys are stored here; the answers themselves stay in the response
+    cache, so its TTL and eviction still apply to semantic hits.
+    """
+
+    def __init__(self, embed: Callable[[str], Union[List[float], Awaitable[List[float]]]],
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX):
+        self._embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._buckets: Dict[str, _Bucket] = {}
+
+    async def embed(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query off the event loop; None if the model is unavailable"""
+        text = query.strip().lower()
+        try:
+            if inspect.iscoroutinefunction(self._embed):
+                raw = await self._embed(text)
+            else:
+                raw = await asyncio.to_thread(self._embed, text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        vec = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def lookup(self, bucket: str, vec: np.ndarray) -> Tuple[Optional[str], float]:
+        """Return (cache_key, similarity) of the closest past query above threshold"""
+        b = self._buckets.get(bucket)
+        if b is None:
+            return None, 0.0
+        idx, score = b.search(vec)
+        if idx < 0 or score < self.threshold:
+            return None, score
+        b.last_used[idx] = time.monotonic()
+        return b.keys[idx], score
+
+    def add(self, bucket: str, vec: np.ndarray, key: str):
+        b = self._buckets.get(bucket)
+        if b is None:
+            b = self._buckets[bucket] = _Bucket(len(vec), self.max_entries)
+        b.add(vec, key)
+
+    def __len__(self):
+        return sum(b.size for b in self._buckets.values())
+
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    from ..tools.embedding_service import get_embedding_service
+
+    # Query embeddings join the same micro-batches as vector-store chunks
+    return SemanticCache(get_embedding_service().embed_query)
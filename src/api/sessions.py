@@ -0,0 +1,228 @@
+"""Bounded conversation session store with idle expiry and history compaction"""
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Max sessions held in this process
+SESSION_MAX = int(os.getenv("SESSION_MAX", "5000"))
+# Sessions untouched for this long are dropped (locally and in Redis)
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "3600"))
+# Approximate cap on message text held across all local sessions
+SESSION_MEMORY_MB = float(os.getenv("SESSION_MEMORY_MB", "64"))
+# Messages kept verbatim; older ones are folded into the running summary
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+SESSION_SUMMARY_CHARS = int(os.getenv("SESSION_SUMMARY_CHARS", "2000"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _first_sentence(text: str, limit: int = 200) -> str:
+    text = " ".join(text.split())
+    head = _SENTENCE_END.split(text, 1)[0]
+    return head if len(head) <= limit else head[:limit].rstrip() + "…"
+
+
+class _Session:
+    __slots__ = ("session_id", "summary", "messages", "memory", "last_access", "size", "version")
+
+    def __init__(self, session_id: str, summary: str = "", messages: Optional[list] = None,
+                 version: int = 0):
+        self.session_id = session_id
+        self.summary = summary
+        self.messages = messages or []
+        self.memory = None
+        # Redis write counter this copy reflects; 0 = never persisted
+        self.version = version
+        self.last_access = time.time()
+        self.size = len(summary) + sum(len(c) for _, c in self.messages)
+
+    def to_json(self) -> str:
+        return json.dumps({"summary": self.summary, "messages": self.messages})
+
+
+class SessionManager:
+    """
+    Keeps one AgentMemory per session, bounded in count, idle time and bytes.
+
+    The session log (summary + recent messages) is the source of truth and is
+    mirrored to Redis when available, so any worker can rebuild the session's
+    AgentMemory after a restart. Every write bumps a version counter next to
+    it; a locally cached session whose version no longer matches Redis was
+    changed by another worker and is reloaded. Past SESSION_MAX_MESSAGES the oldest messages
+    are folded into an extractive running summary, keeping per-session size
+    and prompt tokens flat.
+    """
+
+    def __init__(self, memory_factory: Callable[[str], object], redis_url: Optional[str] = REDIS_URL,
+                 max_sessions: int = SESSION_MAX, idle_ttl: int = SESSION_IDLE_TTL,
+                 max_bytes: int = int(SESSION_MEMORY_MB * 1024 * 1024),
+                 max_messages: int = SESSION_MAX_MESSAGES,
+                 summary_chars: int = SESSION_SUMMARY_CHARS,
+                 prefix: str = "research:session:"):
+        self._memory_factory = memory_factory
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.summary_chars = summary_chars
+        self.prefix = prefix
+        self._bytes = 0
+        self.evictions = 0
+        self.compactions = 0
+        self.reloads = 0
+        self.client = None
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self.client = aioredis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis unavailable, sessions are per-process: {e}")
+
+    async def get(self, session_id: str):
+        """Return the session's AgentMemory, creating or restoring it as needed"""
+        return (await self._session(session_id)).memory
+
+    async def add_message(self, session_id: str, role: str, content: str):
+        session = await self._session(session_id)
+        session.messages.append((role, content))
+        session.memory.add_message(role, content)
+        self._resize(session, len(content))
+        if len(session.messages) > self.max_messages:
+            self._compact(session)
+        await self._persist(session)
+        self._evict()
+
+    async def _session(self, session_id: str) -> _Session:
+        self._expire_idle()
+        session = self._sessions.get(session_id)
+        if session is not None and self.client is not None:
+            version = await self._remote_version(session_id)
+            if version is not None and version != session.version:
+                self._bytes -= self._sessions.pop(session_id).size
+                self.reloads += 1
+                session = None
+        if session is None:
+            session = await self._load(session_id) or _Session(session_id)
+            self._rebuild_memory(session)
+            self._sessions[session_id] = session
+            self._bytes += session.size
+            self._evict()
+        session.last_access = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _rebuild_memory(self, session: _Session):
+        memory = self._memory_factory(session.session_id)
+        if session.summary:
+            memory.add_message("system", f"Summary of earlier conversation: {session.summary}")
+        for role, content in session.messages:
+            memory.add_message(role, content)
+        session.memory = memory
+
+    def _compact(self, session: _Session):
+        """Fold the oldest messages into the summary, keeping the newest half verbatim"""
+        keep = self.max_messages // 2
+        folded, session.messages = session.messages[:-keep], session.messages[-keep:]
+        lines = [f"{role}: {_first_sentence(content)}" for role, content in folded]
+        summary = " ".join(filter(None, [session.summary, *lines]))
+        if len(summary) > self.summary_chars:
+            # Oldest context goes first
+            summary = "…" + summary[-self.summary_chars:]
+        session.summary = summary
+        old_size = session.size
+        session.size = len(summary) + sum(len(c) for _, c in session.messages)
+        self._bytes += session.size - old_size
+        self._rebuild_memory(session)
+        self.compactions += 1
+
+    def _resize(self, session: _Session, delta: int):
+        session.size += delta
+        self._bytes += delta
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+        self.evictions += 1
+
+    def _expire_idle(self):
+        cutoff = time.time() - self.idle_ttl
+        # OrderedDict is in access order, so idle sessions sit at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access >= cutoff:
+                break
+            self._drop(oldest.session_id)
+
+    def _evict(self):
+        # Never evict the most recently used session (the one being served)
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            # Evicted sessions remain in Redis and are restored on next use
+            self._drop(next(iter(self._sessions)))
+
+    def _version_key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}:version"
+
+    async def _remote_version(self, session_id: str) -> Optional[int]:
+        """Redis version of the session, or None if unknown (missing key or Redis error)"""
+        try:
+            raw = await self.client.get(self._version_key(session_id))
+        except Exception as e:
+            logger.warning(f"Session version check failed for {session_id}: {e}")
+            return None
+        return int(raw) if raw else None
+
+    async def _load(self, session_id: str) -> Optional[_Session]:
+        if self.client is None:
+            return None
+        try:
+            raw, version = await self.client.mget(self.prefix + session_id, self._version_key(session_id))
+        except Exception as e:
+            logger.warning(f"Session load failed for {session_id}: {e}")
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        return _Session(session_id, data.get("summary", ""), [tuple(m) for m in data.get("messages", [])],
+                        int(version or 0))
+
+    async def _persist(self, session: _Session):
+        if self.client is None:
+            return
+        try:
+            # Log and version change together
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.set(self.prefix + session.session_id, session.to_json(), ex=self.idle_ttl)
+                pipe.incr(self._version_key(session.session_id))
+                pipe.expire(self._version_key(session.session_id), self.idle_ttl)
+                _, session.version, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session save failed for {session.session_id}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "compactions": self.compactions,
+            "reloads": self.reloads,
+        }
+
+    async def clear(self):
+        self._sessions.clear()
+        self._bytes = 0
+
+    async def close(self):
+        await self.clear()
+        if self.client is not None:
+            await self.client.aclose()
+
+    def __len__(self):
+        return len(self._sessions)
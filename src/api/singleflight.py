@@ -0,0 +1,131 @@
+"""Request coalescing so concurrent identical queries share one agent run"""
+import asyncio
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold the cross-worker lease for one query
+SINGLEFLIGHT_LEASE_TTL = int(os.getenv("SINGLEFLIGHT_LEASE_TTL", "300"))
+# How often followers on other workers check the shared cache for the result
+SINGLEFLIGHT_POLL_INTERVAL = float(os.getenv("SINGLEFLIGHT_POLL_INTERVAL", "0.5"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Delete the lease only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    In-flight deduplication keyed on the response cache key.
+
+    Within a worker, later callers await the first caller's task. Across
+    workers, a Redis lease (SET NX PX) elects one leader; the others poll the
+    shared response cache until the leader publishes the result, or take over
+    if the lease lapses without one.
+    """
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL,
+                 lease_ttl: int = SINGLEFLIGHT_LEASE_TTL,
+                 poll_interval: float = SINGLEFLIGHT_POLL_INTERVAL,
+                 prefix: str = "research:lease:"):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self.leaders = 0
+        self.coalesced = 0
+        self.client = None
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self.client = aioredis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis unavailable, coalescing within this worker only: {e}")
+
+    async def do(self, key: str, fn: Callable[[], Awaitable],
+                 fetch_shared: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Run `fn` once per key across concurrent callers.
+
+        `fetch_shared` reads the result a leader on another worker publishes
+        (normally the response cache). Returns (result, shared) where `shared`
+        is True if this caller reused another caller's run.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # shield: one caller disconnecting must not cancel the run for the rest
+            result, _ = await asyncio.shield(task)
+            return result, True
+
+        task = asyncio.ensure_future(self._run(key, fn, fetch_shared))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(self, key: str, fn, fetch_shared):
+        if self.client is None:
+            self.leaders += 1
+            return await fn(), False
+
+        lease_key = self.prefix + key
+        token = uuid.uuid4().hex
+        waited = 0.0
+        while True:
+            try:
+                acquired = await self.client.set(lease_key, token, nx=True, px=self.lease_ttl * 1000)
+            except Exception as e:
+                logger.warning(f"Lease acquire failed, running without it: {e}")
+                self.leaders += 1
+                return await fn(), False
+
+            if acquired:
+                self.leaders += 1
+                try:
+                    return await fn(), False
+                finally:
+                    try:
+                        await self.client.eval(_RELEASE_SCRIPT, 1, lease_key, token)
+                    except Exception as e:
+                        logger.warning(f"Lease release failed for {key}: {e}")
+
+            # Another worker is running this query — wait for its result
+            while waited < self.lease_ttl:
+                await asyncio.sleep(self.poll_interval)
+                waited += self.poll_interval
+                result = await fetch_shared()
+                if result is not None:
+                    self.coalesced += 1
+                    return result, True
+                try:
+                    if not await self.client.exists(lease_key):
+                        break  # leader gave up without a result; try to take over
+                except Exception:
+                    break
+            else:
+                raise TimeoutError(f"Timed out waiting for in-flight research {key}")
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
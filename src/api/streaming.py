@@ -0,0 +1,146 @@
+"""Typed progress/token events from the research graph, with send-side backpressure"""
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# A client that cannot accept a single message within this window is dropped
+STREAM_SEND_TIMEOUT = float(os.getenv("STREAM_SEND_TIMEOUT", "10"))
+
+# Event payloads (all carry a "type" discriminator):
+#   {"type": "stage", "stage": "research" | "scrape" | "synthesis", "status": "start" | "end"}
+#   {"type": "sources", "sources": [{"title", "url"}]}
+#   {"type": "token", "text": str}
+#   {"type": "result", "answer": str, "sources": [...]}
+#   {"type": "error", "message": str}
+
+
+def extract_sources(findings) -> list:
+    """Deduplicated [{"title", "url"}] from research findings"""
+    sources = []
+    seen_urls = set()
+    for finding in findings or []:
+        url = finding.get('url', '')
+        if url and url not in seen_urls:
+            sources.append({
+                "title": finding.get('title', 'Source'),
+                "url": url
+            })
+            seen_urls.add(url)
+    return sources
+
+
+def _stage_of(node: Optional[str]) -> Optional[str]:
+    """Map a graph node name (e.g. `scrape_node`) to its pipeline stage"""
+    if not node:
+        return None
+    node = node.lower()
+    if "synth" in node:
+        return "synthesis"
+    if "scrap" in node:
+        return "scrape"
+    if "research" in node or "search" in node:
+        return "research"
+    return None
+
+
+async def research_events(agent, state: dict, config: Optional[dict] = None) -> AsyncIterator[dict]:
+    """
+    Run the graph and yield events as they are produced.
+
+    Uses LangGraph's `astream_events` so LLM tokens from the synthesis node
+    arrive individually instead of as one chunk when the node finishes.
+    """
+    final = None
+    async for ev in agent.astream_events(state, config=config, version="v2"):
+        kind = ev["event"]
+        node = ev.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream":
+            if _stage_of(node) == "synthesis":
+                text = getattr(ev["data"].get("chunk"), "content", "")
+                if isinstance(text, str) and text:
+                    yield {"type": "token", "text": text}
+
+        elif kind in ("on_chain_start", "on_chain_end") and node and ev.get("name") == node:
+            stage = _stage_of(node)
+            if stage is None:
+                continue
+            if kind == "on_chain_start":
+                yield {"type": "stage", "stage": stage, "status": "start"}
+                continue
+            output = ev["data"].get("output")
+            if stage == "research" and isinstance(output, dict):
+                sources = extract_sources(output.get("research_findings"))
+                if sources:
+                    yield {"type": "sources", "sources": sources}
+            yield {"type": "stage", "stage": stage, "status": "end"}
+
+        elif kind == "on_chain_end" and not ev.get("parent_ids"):
+            # Top-level graph finished: output is the final state
+            final = ev["data"].get("output")
+
+    if not isinstance(final, dict):
+        yield {"type": "error", "message": "No response generated"}
+        return
+    if final.get("error"):
+        yield {"type": "error", "message": str(final["error"])}
+        return
+    messages = final.get("messages") or []
+    yield {
+        "type": "result",
+        "answer": messages[-1].content if messages else "No response generated",
+        "sources": extract_sources(final.get("research_findings")),
+    }
+
+
+class EventChannel:
+    """
+    Decouples the graph from a slow client.
+
+    `put` never blocks the producer. While the client is behind, consecutive
+    token events are merged into one, so the backlog stays a handful of
+    messages no matter how fast the LLM streams. A send that exceeds
+    `send_timeout` fails the channel and the producer stops on its next put.
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable], send_timeout: float = STREAM_SEND_TIMEOUT):
+        self._send = send
+        self._send_timeout = send_timeout
+        self._items: deque = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._drain())
+
+    def put(self, event: dict):
+        if self._task.done():
+            # Surface the sender's failure (timeout / disconnect) to the producer
+            self._task.result()
+            raise ConnectionError("Stream channel closed")
+        last = self._items[-1] if self._items else None
+        if event["type"] == "token" and last is not None and last["type"] == "token":
+            last["text"] += event["text"]
+        else:
+            self._items.append(dict(event))
+        self._ready.set()
+
+    async def _drain(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._items:
+                await asyncio.wait_for(self._send(self._items.popleft()), self._send_timeout)
+            if self._closed:
+                return
+
+    async def close(self):
+        """Flush pending events and wait for the sender to finish"""
+        self._closed = True
+        self._ready.set()
+        await self._task
+
+    def abort(self):
+        self._task.cancel()
@@ -0,0 +1,322 @@
+"""Request-scoped tracing spans and opt-in sampling profiler"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# Finished traces kept in memory for /debug/trace
+TRACE_MAX = int(os.getenv("TRACE_MAX", "200"))
+# If set, every finished trace (and profile) is also written here as JSON
+TRACE_DIR = os.getenv("TRACE_DIR")
+# Allow clients to request a profile with `X-Profile: 1`
+TRACE_PROFILING = os.getenv("TRACE_PROFILING", "false").lower() == "true"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Client-supplied request ids become file names under TRACE_DIR; anything else is replaced
+_REQUEST_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def request_id_from(header: Optional[str]) -> str:
+    """The client's request id if it is safe to echo and store, else a fresh one"""
+    if header and _REQUEST_ID.fullmatch(header):
+        return header
+    return uuid.uuid4().hex
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+
+class Trace:
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.name = name
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.spans = []
+        self.profile: Optional[str] = None
+
+    def add_span(self, name: str, parent: Optional[int], attrs: dict) -> dict:
+        span = {
+            "id": len(self.spans),
+            "parent": parent,
+            "name": name,
+            "start_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "duration_ms": None,
+            "attrs": attrs,
+        }
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: dict, **attrs):
+        span["duration_ms"] = round((time.perf_counter() - self.started) * 1000 - span["start_ms"], 3)
+        if attrs:
+            span["attrs"].update(attrs)
+
+    def to_dict(self) -> dict:
+        # Time per span name, summed — the "where did the 40 s go" view
+        breakdown: Dict[str, float] = {}
+        for span in self.spans:
+            if span["duration_ms"] is not None:
+                breakdown[span["name"]] = round(breakdown.get(span["name"], 0) + span["duration_ms"], 3)
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "breakdown_ms": dict(sorted(breakdown.items(), key=lambda kv: -kv[1])),
+            "spans": self.spans,
+            "has_profile": self.profile is not None,
+        }
+
+
+class TraceStore:
+    """Bounded in-memory store of finished traces, optionally mirrored to TRACE_DIR"""
+
+    def __init__(self, max_traces: int = TRACE_MAX, directory: Optional[str] = TRACE_DIR):
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self.max_traces = max_traces
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.directory = self.directory.resolve()
+
+    def _path(self, request_id: str, suffix: str) -> Optional[Path]:
+        path = (self.directory / f"{request_id}{suffix}").resolve()
+        return path if path.parent == self.directory else None
+
+    def add(self, trace: Trace):
+        self._traces[trace.request_id] = trace
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+        if self.directory:
+            path = self._path(trace.request_id, ".json")
+            if path is None:
+                logger.warning(f"Not exporting trace with unsafe id {trace.request_id!r}")
+                return
+            try:
+                path.write_text(json.dumps(trace.to_dict()))
+                if trace.profile:
+                    path.with_suffix(".folded").write_text(trace.profile)
+            except OSError as e:
+                logger.warning(f"Could not export trace {trace.request_id}: {e}")
+
+    def get(self, request_id: str) -> Optional[Trace]:
+        return self._traces.get(request_id)
+
+
+traces = TraceStore()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a child of the current span.
+
+    A no-op (one ContextVar lookup) when the request is not being traced.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    s = trace.add_span(name, parent["id"] if parent else None, attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s["attrs"]["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(s)
+
+
+def traced(name: str):
+    """Decorator form of `span` for sync and async callables"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument(cls, *methods: str):
+    """Wrap methods of a class in spans named `Class.method`"""
+    for method in methods:
+        fn = getattr(cls, method, None)
+        if fn is None or getattr(fn, "__traced__", False):
+            continue
+        wrapped = traced(f"{cls.__name__}.{method}")(fn)
+        wrapped.__traced__ = True
+        setattr(cls, method, wrapped)
+
+
+class TraceCallback(BaseCallbackHandler):
+    """
+    Opens a span per graph node and LLM call.
+
+    LangGraph hands the run config (and so this handler) to every node, which
+    is how the trace follows the request through the graph.
+    """
+
+    # Record spans on the event loop thread, in order, without an executor hop
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, tuple] = {}
+
+    def _open(self, run_id: UUID, name: str, **attrs):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        parent = _current_span.get()
+        self._spans[run_id] = (trace, trace.add_span(name, parent["id"] if parent else None, attrs))
+
+    def _close(self, run_id: UUID, **attrs):
+        entry = self._spans.pop(run_id, None)
+        if entry is not None:
+            entry[0].end_span(entry[1], **attrs)
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata=None,
+                       name: Optional[str] = None, **kwargs: Any):
+        node = (metadata or {}).get("langgraph_node")
+        if node and (name or (serialized or {}).get("name")) == node:
+            self._open(run_id, node)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        model = ((serialized or {}).get("id") or ["llm"])[-1]
+        self._open(run_id, "llm", model=model)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, error=type(error).__name__)
+
+
+class SamplingProfiler:
+    """
+    Samples the event-loop thread's stack into collapsed-stack format
+    (`frame;frame;frame count`), readable by flamegraph.pl and speedscope.
+
+    Runs only while a profiled request is in flight. Other requests sharing
+    the event loop during that window show up in the profile too.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._thread_id = threading.get_ident()
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._sampler.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a trace per HTTP request.
+
+    The request id comes from `X-Request-ID` when it is a plain token of up to
+    64 characters (otherwise one is generated) and is echoed
+    back in the response. The trace closes when the last body chunk is sent,
+    so streaming responses are timed end to end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
+        request_id = request_id_from(headers.get(REQUEST_ID_HEADER.lower()))
+        trace = Trace(request_id, f"{scope['method']} {scope['path']}")
+        profiler = None
+        if TRACE_PROFILING and headers.get("x-profile") == "1":
+            profiler = SamplingProfiler()
+            profiler.start()
+        token = _current_trace.set(trace)
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            trace.duration = time.perf_counter() - trace.started
+            if profiler is not None:
+                trace.profile = profiler.stop()
+            traces.add(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode())
+                ]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+            _current_trace.reset(token)
@@ -0,0 +1,241 @@
+"""TTL, size caps, LRU eviction and vacuum for persisted Chroma collections"""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHROMA_DIR = os.getenv("CHROMA_DIR", "./chroma_db")
+# Background TTL / LRU / vacuum sweep. Off by default: ages are only meaningful once
+# every read and write of a collection calls CollectionLifecycle.touch
+COLLECTION_LIFECYCLE = os.getenv("COLLECTION_LIFECYCLE", "false").lower() == "true"
+# Collections not read or written for this long are deleted
+COLLECTION_TTL = int(os.getenv("COLLECTION_TTL", str(7 * 24 * 3600)))
+COLLECTION_MAX = int(os.getenv("COLLECTION_MAX", "500"))
+COLLECTION_MAX_VECTORS = int(os.getenv("COLLECTION_MAX_VECTORS", "500000"))
+COLLECTION_MAX_MB = float(os.getenv("COLLECTION_MAX_MB", "2048"))
+# Seconds between background sweeps
+COLLECTION_SWEEP_INTERVAL = int(os.getenv("COLLECTION_SWEEP_INTERVAL", "900"))
+# Vacuum Chroma's SQLite file once this share of its pages are free
+COLLECTION_VACUUM_RATIO = float(os.getenv("COLLECTION_VACUUM_RATIO", "0.2"))
+
+_UUID_DIR = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+_UNSAFE = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+def collection_name(session_id: Optional[str] = None, query: Optional[str] = None) -> str:
+    """Per-session (or, without a session, per-query) collection name valid for Chroma"""
+    if session_id:
+        return f"session_{_UNSAFE.sub('_', session_id)[:48]}"
+    digest = hashlib.sha1((query or "").strip().lower().encode()).hexdigest()[:16]
+    return f"query_{digest}"
+
+
+def _forget_indexes(name: str):
+    from .dedupe import get_deduper
+    from .hybrid_search import sparse_indexes
+
+    get_deduper().forget(name)
+    sparse_indexes.forget(name)
+
+
+def _directory_bytes(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+class CollectionLifecycle:
+    """
+    Keeps the Chroma store bounded.
+
+    Last access per collection is tracked in a small SQLite sidecar so it
+    survives restarts. A sweep deletes collections idle past the TTL, then
+    evicts whole collections least-recently-used first until the collection
+    count, vector count and on-disk size are under their caps. The most
+    recently used collection is never evicted.
+
+    Every worker sharing the directory may run the loop, but only the one
+    holding an exclusive lock on `lifecycle.lock` sweeps and vacuums; the
+    others take over if it exits.
+    """
+
+    def __init__(self, client, directory: str = CHROMA_DIR, ttl: int = COLLECTION_TTL,
+                 max_collections: int = COLLECTION_MAX, max_vectors: int = COLLECTION_MAX_VECTORS,
+                 max_bytes: int = int(COLLECTION_MAX_MB * 1024 * 1024),
+                 on_drop: Callable[[str], None] = _forget_indexes):
+        self.client = client
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_collections = max_collections
+        self.max_vectors = max_vectors
+        self.max_bytes = max_bytes
+        self.on_drop = on_drop
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.directory / "lifecycle.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+        )
+        self._lead_fd: Optional[int] = None
+        self.expired = 0
+        self.evicted = 0
+        self.vacuums = 0
+        self._last: Dict[str, int] = {"collections": 0, "vectors": 0, "bytes": 0}
+
+    def lead(self) -> bool:
+        """Whether this process is the sweep leader, trying to become it if no one is"""
+        if self._lead_fd is not None:
+            return True
+        fd = os.open(str(self.directory / "lifecycle.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lead_fd = fd
+        logger.info(f"Collection lifecycle leader for {self.directory} (pid {os.getpid()})")
+        return True
+
+    def touch(self, name: str):
+        """Record a read or write; call from store_findings and similarity_search"""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO collections (name, last_access) VALUES (?, ?)",
+                             (name, time.time()))
+            self._db.commit()
+
+    def _names(self):
+        # chromadb >= 0.6 returns names, older versions Collection objects
+        return [getattr(c, "name", c) for c in self.client.list_collections()]
+
+    def _drop(self, name: str):
+        try:
+            self.client.delete_collection(name)
+        except Exception as e:
+            logger.warning(f"Could not delete collection {name}: {e}")
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM collections WHERE name = ?", (name,))
+            self._db.commit()
+        self.on_drop(name)
+
+    def sweep(self) -> dict:
+        """Apply TTL and caps; blocking, run it off the event loop"""
+        now = time.time()
+        names = set(self._names())
+        with self._lock:
+            known = dict(self._db.execute("SELECT name, last_access FROM collections").fetchall())
+            # Collections created before tracking start ageing from now
+            for name in names - known.keys():
+                self._db.execute("INSERT INTO collections (name, last_access) VALUES (?, ?)", (name, now))
+                known[name] = now
+            self._db.executemany("DELETE FROM collections WHERE name = ?", [(n,) for n in known.keys() - names])
+            self._db.commit()
+
+        expired = [n for n in names if now - known[n] > self.ttl]
+        for name in expired:
+            self._drop(name)
+        self.expired += len(expired)
+
+        live = sorted(names - set(expired), key=lambda n: known[n])
+        counts = {n: self.client.get_collection(n).count() for n in live}
+        vectors = sum(counts.values())
+        size = _directory_bytes(self.directory)
+        evicted = 0
+        while len(live) > 1 and (len(live) > self.max_collections or vectors > self.max_vectors
+                                 or size > self.max_bytes):
+            name = live.pop(0)
+            self._drop(name)
+            vectors -= counts.pop(name)
+            evicted += 1
+            if size > self.max_bytes:
+                # Deleted segments only shrink the directory once vacuumed; one
+                # collection may free less than the vacuum ratio, so force it
+                self.vacuum(min_free_ratio=0)
+                size = _directory_bytes(self.directory)
+        self.evicted += evicted
+        self._last = {"collections": len(live), "vectors": vectors, "bytes": size}
+        if expired or evicted:
+            logger.info(f"Collection sweep: {len(expired)} expired, {evicted} evicted, "
+                        f"{len(live)} collections / {vectors} vectors left")
+        return {"expired": len(expired), "evicted": evicted, **self._last}
+
+    def vacuum(self, min_free_ratio: float = COLLECTION_VACUUM_RATIO) -> bool:
+        """
+        Reclaim disk left behind by deleted collections.
+
+        Removes vector-segment directories no longer referenced by Chroma and
+        VACUUMs its SQLite file when enough pages are free.
+        """
+        db_path = self.directory / "chroma.sqlite3"
+        if not db_path.exists():
+            return False
+        try:
+            conn = sqlite3.connect(str(db_path), timeout=30)
+            try:
+                segments = {row[0] for row in conn.execute("SELECT id FROM segments")}
+                for entry in self.directory.iterdir():
+                    if entry.is_dir() and _UUID_DIR.match(entry.name) and entry.name not in segments:
+                        shutil.rmtree(entry, ignore_errors=True)
+                free, = conn.execute("PRAGMA freelist_count").fetchone()
+                pages, = conn.execute("PRAGMA page_count").fetchone()
+                if not pages or free / pages < min_free_ratio:
+                    return False
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Chroma vacuum skipped: {e}")
+            return False
+        self.vacuums += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**self._last, "expired": self.expired, "evicted": self.evicted, "vacuums": self.vacuums,
+                "leader": self._lead_fd is not None}
+
+    def close(self):
+        if self._lead_fd is not None:
+            os.close(self._lead_fd)
+            self._lead_fd = None
+        self._db.close()
+
+
+async def run_lifecycle(lifecycle: CollectionLifecycle, interval: int = COLLECTION_SWEEP_INTERVAL):
+    """Background sweep + vacuum loop; started from the API startup hook when COLLECTION_LIFECYCLE is on"""
+    while True:
+        try:
+            # Only one worker per directory deletes segments and VACUUMs
+            if lifecycle.lead():
+                await asyncio.to_thread(lifecycle.sweep)
+                await asyncio.to_thread(lifecycle.vacuum)
+        except Exception as e:
+            logger.warning(f"Collection lifecycle sweep failed: {e}")
+        await asyncio.sleep(interval)
+
+
+_lifecycle: Optional[CollectionLifecycle] = None
+
+
+def get_collection_lifecycle() -> CollectionLifecycle:
+    """Process-wide manager over a persistent client on CHROMA_DIR"""
+    global _lifecycle
+    if _lifecycle is None:
+        import chromadb
+
+        _lifecycle = CollectionLifecycle(chromadb.PersistentClient(path=CHROMA_DIR))
+    return _lifecycle
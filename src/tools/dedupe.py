@@ -0,0 +1,169 @@
+"""Near-duplicate chunk elimination with SimHash fingerprints"""
+import hashlib
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Chunks at least this similar (1 - hamming/64 of their SimHashes) count as duplicates
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.9"))
+DEDUPE_SHINGLE = int(os.getenv("DEDUPE_SHINGLE", "3"))
+# Chunk metadatas read per page when reloading a collection's fingerprints
+DEDUPE_SEED_PAGE = int(os.getenv("DEDUPE_SEED_PAGE", "5000"))
+
+DEDUPE_DROPPED = Counter("dedupe_dropped_chunks_total", "Near-duplicate chunks dropped before indexing")
+
+FINGERPRINT_KEY = "simhash"
+_BITS = 64
+_WORD = re.compile(r"\w+")
+_BIT_MASKS = np.array([1 << i for i in range(_BITS)], dtype=np.uint64)
+
+
+def simhash(text: str, shingle: int = DEDUPE_SHINGLE) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits"""
+    words = _WORD.findall(text.lower())
+    if len(words) > shingle:
+        grams = {" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)}
+    else:
+        grams = set(words) or {text}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "little") for g in grams],
+        dtype=np.uint64,
+    )
+    # Each shingle votes +1/-1 on every bit
+    votes = ((hashes[:, None] & _BIT_MASKS) != 0).sum(axis=0) * 2 - len(hashes)
+    return int(np.sum(_BIT_MASKS[votes > 0], dtype=np.uint64))
+
+
+def _stored_metadatas(source, page: int = DEDUPE_SEED_PAGE) -> Iterable[Optional[dict]]:
+    """Metadata of every chunk in a Chroma collection, read a page at a time"""
+    offset = 0
+    while True:
+        batch = source.get(include=["metadatas"], limit=page, offset=offset)
+        metadatas = batch.get("metadatas") or []
+        yield from metadatas
+        if len(metadatas) < page:
+            return
+        offset += page
+
+
+class _FingerprintIndex:
+    """
+    Fingerprints of one collection, banded for sub-linear lookup.
+
+    With `max_distance` d, the 64 bits are split into d + 1 bands; two
+    fingerprints within d bits must agree exactly on at least one band
+    (pigeonhole), so only fingerprints sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        edges = [round(i * _BITS / bands) for i in range(bands + 1)]
+        self._bands = [((1 << (hi - lo)) - 1, lo) for lo, hi in zip(edges, edges[1:])]
+        self._tables: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in self._bands]
+        self.size = 0
+
+    def _keys(self, fp: int):
+        return [(fp >> shift) & mask for mask, shift in self._bands]
+
+    def near(self, fp: int) -> bool:
+        for table, key in zip(self._tables, self._keys(fp)):
+            for other in table.get(key, ()):
+                if bin(fp ^ other).count("1") <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, fp: int):
+        for table, key in zip(self._tables, self._keys(fp)):
+            table[key].add(fp)
+        self.size += 1
+
+
+class ChunkDeduper:
+    """
+    Drops chunks that nearly duplicate one already seen in the same request
+    or already stored in the target collection.
+
+    Kept chunks carry their fingerprint in `metadata["simhash"]`, so it is
+    persisted with the vectors. Pass the Chroma collection to `filter` and
+    fingerprints missing after a restart are reloaded from it on first use.
+    """
+
+    def __init__(self, threshold: float = DEDUPE_THRESHOLD, shingle: int = DEDUPE_SHINGLE):
+        self.threshold = threshold
+        self.shingle = shingle
+        self.max_distance = int((1 - threshold) * _BITS)
+        self._collections: Dict[str, _FingerprintIndex] = {}
+        self.seen = 0
+        self.dropped = 0
+
+    def _index(self, collection: str, source=None) -> _FingerprintIndex:
+        index = self._collections.get(collection)
+        if index is None:
+            index = self._collections[collection] = _FingerprintIndex(self.max_distance)
+            if source is not None:
+                try:
+                    self.seed(collection, _stored_metadatas(source))
+                except Exception as e:
+                    logger.warning(f"Could not seed fingerprints for {collection}: {e}")
+                else:
+                    logger.info(f"Seeded fingerprints for {collection} with {index.size} chunks")
+        return index
+
+    def filter(self, docs: Iterable[Document], collection: str,
+               source=None) -> Tuple[List[Document], int]:
+        """Return (kept documents, number dropped); `source` is the collection's Chroma handle"""
+        index = self._index(collection, source)
+        kept, dropped = [], 0
+        for doc in docs:
+            fp = simhash(doc.page_content, self.shingle)
+            if index.near(fp):
+                dropped += 1
+                continue
+            index.add(fp)
+            doc.metadata[FINGERPRINT_KEY] = format(fp, "016x")
+            kept.append(doc)
+        self.seen += len(kept) + dropped
+        self.dropped += dropped
+        if dropped:
+            DEDUPE_DROPPED.inc(dropped)
+            logger.info(f"Dropped {dropped} near-duplicate chunks for collection {collection}")
+        return kept, dropped
+
+    def seed(self, collection: str, metadatas: Iterable[Optional[dict]]):
+        """Load fingerprints of chunks already stored in a collection"""
+        index = self._index(collection)
+        for meta in metadatas:
+            fp = (meta or {}).get(FINGERPRINT_KEY)
+            if fp:
+                index.add(int(fp, 16))
+
+    def forget(self, collection: str):
+        self._collections.pop(collection, None)
+
+    def stats(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "collections": len(self._collections),
+            "fingerprints": sum(i.size for i in self._collections.values()),
+            "seen": self.seen,
+            "dropped": self.dropped,
+        }
+
+
+_deduper: Optional[ChunkDeduper] = None
+
+
+def get_deduper() -> ChunkDeduper:
+    global _deduper
+    if _deduper is None:
+        _deduper = ChunkDeduper()
+    return _deduper
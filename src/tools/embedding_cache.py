@@ -0,0 +1,229 @@
+"""Content-addressed embedding cache in a memory-mapped vector file"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+# float16 halves the file; MiniLM similarity scores are unaffected at 3 decimals
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+# Rows kept by compaction; compaction runs once the file grows 25% past this
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "1000000"))
+
+_KEY_BYTES = 16
+
+
+def content_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=_KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """
+    Append-only store of embedding rows shared by every worker process.
+
+    `vectors.bin` holds rows back to back and is read through np.memmap, so
+    processes share it through the OS page cache without copying. `keys.bin`
+    holds one 16-byte content hash per row, in row order; each process keeps
+    a hash -> row dict built from it and catches up on rows other processes
+    appended. Writers serialise on an exclusive file lock and write vectors
+    before keys, so a reader never sees a key without its row. Readers
+    re-read keys.bin and map vectors.bin under a shared lock, so a
+    compaction cannot swap the files between the two reads. Each compaction
+    bumps the generation in `meta.json`, which tells other processes to
+    rebuild their index rather than append to it.
+    """
+
+    def __init__(self, directory: str = EMBEDDING_CACHE_DIR, dtype: str = EMBEDDING_CACHE_DTYPE,
+                 max_rows: int = EMBEDDING_CACHE_MAX_ROWS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keys_path = self.directory / "keys.bin"
+        self.vectors_path = self.directory / "vectors.bin"
+        self.meta_path = self.directory / "meta.json"
+        self.lock_path = self.directory / ".lock"
+        self.dtype = np.dtype(dtype)
+        self.max_rows = max_rows
+        self.dim: Optional[int] = None
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._generation: Optional[int] = None
+        self._mm: Optional[np.memmap] = None
+        self._mutex = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._mutex:
+            self._load()
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_meta(self, generation: int):
+        self.meta_path.write_text(json.dumps({"dim": self.dim, "dtype": self.dtype.name,
+                                              "generation": generation}))
+
+    def _refresh(self):
+        """Pick up rows appended (or a compaction done) by other processes"""
+        if not self.keys_path.exists():
+            return
+        meta = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        generation = meta.get("generation", 0)
+        rows = self.keys_path.stat().st_size // _KEY_BYTES
+        if generation != self._generation or rows < self._rows:
+            # First open, or compacted (or wiped) elsewhere: rebuild from scratch
+            self._generation = generation
+            self._index.clear()
+            self._rows = 0
+            self._mm = None
+            if meta:
+                self.dim = meta["dim"]
+                self.dtype = np.dtype(meta["dtype"])
+        if rows <= self._rows:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._rows * _KEY_BYTES)
+            raw = f.read((rows - self._rows) * _KEY_BYTES)
+        for i in range(len(raw) // _KEY_BYTES):
+            self._index[raw[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]] = self._rows + i
+        self._rows = rows
+        self._mm = None
+
+    def _load(self):
+        """Refresh the index and map the matching vectors as one consistent snapshot"""
+        with self._file_lock(shared=True):
+            self._refresh()
+            if self._rows:
+                # The map keeps this generation's file alive even if a later compaction replaces it
+                self._vectors()
+
+    def _vectors(self) -> np.memmap:
+        if self._mm is None:
+            self._mm = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim))
+        return self._mm
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        with self._mutex:
+            if any(k not in self._index for k in keys):
+                self._load()
+            rows = [self._index.get(k) for k in keys]
+            found = [r for r in rows if r is not None]
+            vectors = self._vectors()[found].astype(np.float32) if found else None
+        out, j = [], 0
+        for r in rows:
+            if r is None:
+                out.append(None)
+                self.misses += 1
+            else:
+                out.append(vectors[j])
+                j += 1
+                self.hits += 1
+        return out
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Sequence[float]]):
+        if not keys:
+            return
+        arr = np.asarray(vectors, dtype=self.dtype)
+        with self._mutex, self._file_lock():
+            self._refresh()
+            if self.dim is None:
+                self.dim = arr.shape[1]
+                self._write_meta(generation=0)
+            fresh = [i for i, k in enumerate(keys) if k not in self._index]
+            # Same text twice in one batch
+            fresh = list({keys[i]: i for i in fresh}.values())
+            if not fresh:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.write(arr[fresh].tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(keys[i] for i in fresh))
+            self._refresh()
+            if self._rows > self.max_rows * 1.25:
+                self._compact()
+
+    def _compact(self):
+        """Keep the newest `max_rows` rows; caller holds both locks"""
+        keep = self._rows - self.max_rows
+        with open(self.keys_path, "rb") as f:
+            f.seek(keep * _KEY_BYTES)
+            keys = f.read()
+        vectors = np.array(self._vectors()[keep:])
+        tmp_keys = self.keys_path.with_suffix(".tmp")
+        tmp_vectors = self.vectors_path.with_suffix(".tmp")
+        tmp_keys.write_bytes(keys)
+        vectors.tofile(tmp_vectors)
+        # Vectors first: a reader that sees the new keys file also gets matching rows
+        tmp_vectors.replace(self.vectors_path)
+        tmp_keys.replace(self.keys_path)
+        self._write_meta(generation=self._generation + 1)
+        logger.info(f"Compacted embedding cache from {self._rows} to {self.max_rows} rows")
+        self._refresh()
+
+    def stats(self) -> dict:
+        return {
+            "rows": self._rows,
+            "bytes": self._rows * (self.dim or 0) * self.dtype.itemsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only computes vectors for texts the cache has not seen"""
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.inner = inner
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [content_key(self.model_name, t) for t in texts]
+        cached = self.cache.get_many(keys)
+        # One position per distinct missing text
+        missing = list({keys[i]: i for i, v in enumerate(cached) if v is None}.values())
+        if missing:
+            computed = self.inner.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], computed)
+            # Round through the cache dtype so a miss matches every later hit
+            rounded = np.asarray(computed, dtype=self.cache.dtype).astype(np.float32)
+            by_key = {keys[i]: vec for i, vec in zip(missing, rounded)}
+            cached = [by_key[k] if v is None else v for k, v in zip(keys, cached)]
+        return [list(map(float, v)) for v in cached]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+
+def embedding_cache_stats() -> Optional[dict]:
+    """Stats of this process's cache, or None if nothing has opened it (and created its directory)"""
+    return _cache.stats() if _cache is not None else None
+
+
+def cached_embeddings(inner: Embeddings, model_name: str) -> Embeddings:
+    """Wrap `inner` with the process-wide cache (e.g. the vector store's HuggingFaceEmbeddings)"""
+    return CachedEmbeddings(inner, get_embedding_cache(), model_name)
@@ -0,0 +1,235 @@
+"""Cross-request micro-batching of embedding calls off the event loop"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Texts per forward pass; MiniLM on CPU stops gaining throughput around 32-64
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+# Longest a text waits for others to join its batch
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+# Batches run at once; torch already uses every core per batch
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+
+EMBED_QUEUE_DEPTH = Gauge(
+    "embedding_queue_depth", "Texts waiting to be embedded", multiprocess_mode="livesum"
+)
+EMBED_BATCH_SIZE = Histogram(
+    "embedding_batch_size", "Texts per embedding batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+EMBED_QUEUE_WAIT = Histogram(
+    "embedding_queue_wait_seconds", "Time a caller waits before its batch starts",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+
+
+class EmbeddingService:
+    """
+    Collects texts from every concurrent caller into micro-batches.
+
+    A batch starts once it holds `max_batch` texts or its oldest text has
+    waited `max_wait` seconds, and runs in a dedicated thread pool so the
+    event loop keeps serving WebSockets. While all workers are busy, new
+    callers pile into the next batch, so batches grow with load.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings], max_batch: int = EMBED_MAX_BATCH,
+                 max_wait: float = EMBED_MAX_WAIT_MS / 1000, workers: int = EMBED_WORKERS):
+        self._factory = factory
+        self._model: Optional[Embeddings] = None
+        self._model_lock = threading.Lock()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="embed")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Deque[Tuple[List[str], asyncio.Future, float]] = deque()
+        self._queued = 0
+        # Batches being embedded; the loop keeps only weak references to tasks
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    @property
+    def model(self) -> Embeddings:
+        # Loaded on the worker thread the first time a batch runs; the lock
+        # keeps a warm-up thread and the executor from both loading it
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def _bind(self):
+        """(Re)start the batching loop on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue.clear()
+        self._queued = 0
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = loop.create_task(self._run())
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._bind()
+        future = self._loop.create_future()
+        self._queue.append((list(texts), future, time.perf_counter()))
+        self._queued += len(texts)
+        EMBED_QUEUE_DEPTH.inc(len(texts))
+        self._wakeup.set()
+        if self._queued >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self.embed_documents([text]))[0]
+
+    def _take_batch(self) -> List[Tuple[List[str], asyncio.Future, float]]:
+        """Whole callers, up to max_batch texts (a larger caller goes alone)"""
+        batch, size = [], 0
+        while self._queue:
+            texts, future, queued_at = self._queue[0]
+            if batch and size + len(texts) > self.max_batch:
+                break
+            self._queue.popleft()
+            self._queued -= len(texts)
+            EMBED_QUEUE_DEPTH.dec(len(texts))
+            if future.done():
+                # Caller gave up (cancelled) before the batch started
+                continue
+            batch.append((texts, future, queued_at))
+            size += len(texts)
+        if self._queued < self.max_batch:
+            self._full.clear()
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                await self._slots.acquire()
+                if self._queued < self.max_batch:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_wait)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = self._take_batch()
+                if not batch:
+                    self._slots.release()
+                    continue
+                task = asyncio.ensure_future(self._process(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _process(self, batch):
+        texts = [t for caller_texts, _, _ in batch for t in caller_texts]
+        started = time.perf_counter()
+        for _, _, queued_at in batch:
+            EMBED_QUEUE_WAIT.observe(started - queued_at)
+        EMBED_BATCH_SIZE.observe(len(texts))
+        self.batches += 1
+        self.texts += len(texts)
+        try:
+            # The model loads lazily on first use; resolve it on the executor, not the loop
+            vectors = await self._loop.run_in_executor(self._executor, lambda: self.model.embed_documents(texts))
+        except Exception as e:
+            logger.warning(f"Embedding batch of {len(texts)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        offset = 0
+        for caller_texts, future, _ in batch:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(caller_texts)])
+            offset += len(caller_texts)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queued,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    async def close(self):
+        if self._loop is not None and not self._task.done():
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    LangChain adapter over the service, for Chroma and other sync callers.
+
+    Sync calls made from a worker thread are handed to the batching loop;
+    calls made on the event loop thread itself cannot block on it and embed
+    directly instead.
+    """
+
+    def __init__(self, service: EmbeddingService):
+        self.service = service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = self.service._loop
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                return asyncio.run_coroutine_threadsafe(self.service.embed_documents(texts), loop).result()
+        return self.service.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.service.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.service.embed_query(text)
+
+
+def _load_model() -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from .embedding_cache import cached_embeddings
+
+    return cached_embeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL)
+
+
+_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide service over the cached MiniLM model the vector store uses"""
+    global _service
+    if _service is None:
+        _service = EmbeddingService(_load_model)
+    return _service
+
+
+async def close_embedding_service():
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
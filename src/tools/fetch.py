@@ -0,0 +1,214 @@
+"""Shared, pooled HTTP fetch engine for page scraping"""
+import asyncio
+import codecs
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Pages fetched at once across all requests in this process
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "32"))
+# Pages fetched at once from a single host
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "4"))
+# Per-page wall-clock budget (connect + download), seconds
+FETCH_PAGE_TIMEOUT = float(os.getenv("FETCH_PAGE_TIMEOUT", "8"))
+# Per-page download budget; the rest of the body is not read
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+
+USER_AGENT = "Mozilla/5.0 (compatible; AIResearchAgent/1.0)"
+
+SCRAPE_FAILURES = Counter("scrape_failures_total", "Pages that failed to scrape")
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int] = None
+    content: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    truncated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(_charset(self.headers.get("content-type", "")), errors="replace")
+
+
+def _charset(content_type: str) -> str:
+    """Declared charset of a Content-Type header, or utf-8 if missing or unknown"""
+    charset = "utf-8"
+    if "charset=" in content_type:
+        charset = content_type.split("charset=", 1)[1].split(";")[0].strip().strip('"\'') or charset
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return "utf-8"
+    return charset
+
+
+class FetchEngine:
+    """
+    One keep-alive connection pool for every scrape in the process.
+
+    Concurrency is bounded globally and per host, and each page gets a time
+    and byte budget, so one slow or huge page cannot hold up the others.
+    """
+
+    def __init__(self, max_concurrency: int = FETCH_MAX_CONCURRENCY, per_host: int = FETCH_PER_HOST,
+                 page_timeout: float = FETCH_PAGE_TIMEOUT, max_bytes: int = FETCH_MAX_BYTES,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.page_timeout = page_timeout
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(max_concurrency)
+        # Semaphores live only while some fetch to that host holds a reference
+        self._hosts: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=30,
+            ),
+            timeout=httpx.Timeout(page_timeout, connect=min(5.0, page_timeout)),
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+        self.fetched = 0
+        self.failures = 0
+        self.bytes = 0
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._hosts[host] = sem
+        return sem
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Fetch one page within the budgets; failures are returned, not raised"""
+        result = FetchResult(url=url)
+        started = time.perf_counter()
+        try:
+            async with self._global, self._host_semaphore(url):
+                started = time.perf_counter()
+                await asyncio.wait_for(self._download(url, headers, result), self.page_timeout)
+        except asyncio.TimeoutError:
+            result.error = f"timeout after {self.page_timeout}s"
+        except Exception as e:
+            # Malformed URLs, protocol errors, anything else: one bad page must
+            # not abort the others in fetch_many
+            result.error = f"{type(e).__name__}: {e}"
+        result.elapsed = time.perf_counter() - started
+
+        self.fetched += 1
+        self.bytes += len(result.content)
+        if result.error is not None or result.status is None or result.status >= 400:
+            self.failures += 1
+            SCRAPE_FAILURES.inc()
+            logger.debug(f"Fetch failed for {url}: {result.error or result.status}")
+        return result
+
+    async def _download(self, url: str, headers: Optional[Dict[str, str]], result: FetchResult):
+        async with self.client.stream("GET", url, headers=headers) as resp:
+            result.status = resp.status_code
+            result.headers = {k.lower(): v for k, v in resp.headers.items()}
+            chunks = []
+            size = 0
+            async for chunk in resp.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    result.truncated = True
+                    break
+            result.content = b"".join(chunks)[:self.max_bytes]
+
+    async def stream_text(self, url: str, headers: Optional[Dict[str, str]] = None,
+                          max_bytes: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Yield the decoded body as it downloads, within the page budgets.
+
+        Unlike `fetch`, the body is never held in full, and failures (HTTP
+        errors, non-2xx status, timeout) are raised to the consumer.
+        """
+        max_bytes = max_bytes or self.max_bytes
+        loop = asyncio.get_running_loop()
+        async with self._global, self._host_semaphore(url):
+            deadline = loop.time() + self.page_timeout
+            size = 0
+            try:
+                async with self.client.stream("GET", url, headers=headers) as resp:
+                    resp.raise_for_status()
+                    charset = _charset(resp.headers.get("content-type", ""))
+                    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+                    chunks = resp.aiter_bytes()
+                    while size < max_bytes:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                        except StopAsyncIteration:
+                            break
+                        chunk = chunk[:max_bytes - size]
+                        size += len(chunk)
+                        yield decoder.decode(chunk)
+                    yield decoder.decode(b"", final=True)
+            except Exception:
+                self.failures += 1
+                SCRAPE_FAILURES.inc()
+                raise
+            finally:
+                self.fetched += 1
+                self.bytes += size
+
+    async def fetch_many(self, urls: Iterable[str],
+                         headers: Optional[Dict[str, str]] = None) -> AsyncIterator[FetchResult]:
+        """
+        Fetch pages concurrently, yielding each result as soon as it completes.
+
+        Wall time approaches the slowest page (capped by the page budget)
+        rather than the sum. Closing the iterator early cancels the rest.
+        """
+        tasks = [asyncio.ensure_future(self.fetch(url, headers)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {"fetched": self.fetched, "failures": self.failures, "bytes": self.bytes}
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_engine: Optional[FetchEngine] = None
+
+
+def get_fetch_engine() -> FetchEngine:
+    """Process-wide engine, created on first use inside the running event loop"""
+    global _engine
+    if _engine is None:
+        _engine = FetchEngine()
+    return _engine
+
+
+async def close_fetch_engine():
+    global _engine
+    if _engine is not None:
+        await _engine.close()
+        _engine = None
@@ -0,0 +1,201 @@
+"""Streaming HTML text extraction and chunking"""
+import asyncio
+import logging
+import re
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, List, Tuple
+
+import httpx
+from langchain_core.documents import Document
+
+from .fetch import FETCH_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Elements whose whole subtree is boilerplate
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe", "canvas",
+    "nav", "header", "footer", "aside", "button", "select",
+}
+# Page chrome outside the content, but the byline / title block inside an article or main
+_SECTIONING_TAGS = {"header", "footer"}
+# Content roots: never dropped on attribute hints, which CMS themes put on them freely
+# (e.g. <body class="no-sidebar">, <main class="has-share-buttons">)
+_CONTENT_ROOTS = {"html", "body", "main", "article"}
+# ARIA landmarks and class/id hints for boilerplate built from plain divs
+_SKIP_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+_SKIP_HINT = re.compile(r"(^|[\s_-])(nav|navbar|menu|footer|sidebar|cookie|consent|banner|advert|ads|share|social|breadcrumbs?)($|[\s_-])")
+# Elements that end a run of text, so words from adjacent blocks do not merge
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "br", "hr", "li", "ul", "ol", "dl", "dt", "dd",
+    "h1", "h2", "h3", "h4", "h5", "h6", "table", "tr", "td", "th", "blockquote", "pre",
+    "figure", "figcaption", "title",
+}
+# Block elements that can enclose a boilerplate element; closing one ends any skip inside it
+_ENCLOSING_TAGS = (_BLOCK_TAGS | {"body", "html"}) - {"br", "hr"}
+# Open enclosing elements tracked; malformed pages never close some of theirs
+_MAX_OPEN = 256
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_SPACES = re.compile(r"[ \t\r\n\f\v\xa0]+")
+
+
+class StreamingExtractor(HTMLParser):
+    """
+    Incremental HTML -> text chunker.
+
+    Feed markup as it downloads; each `feed` returns the chunks completed so
+    far. Only the unparsed tail and the current partial chunk are held, so
+    memory stays flat however large the page is. Chunks end at paragraph,
+    sentence or word boundaries where possible and never exceed `chunk_size`.
+
+    A boilerplate element that is never closed is skipped only until an
+    element enclosing it closes (e.g. `</main>` or `</body>`), not for the
+    rest of the page.
+    """
+
+    def __init__(self, chunk_size: int = 1000):
+        super().__init__(convert_charrefs=True)
+        self.chunk_size = chunk_size
+        self._skip_tag = None
+        # Tags opened and not yet closed inside the skipped element, the element itself included
+        self._skip_open: Dict[str, int] = {}
+        # Enclosing elements open outside any skip, outermost first
+        self._open: List[str] = []
+        self._buf = ""
+        self._ready: List[str] = []
+
+    def _is_boilerplate(self, tag: str, attrs) -> bool:
+        if tag in _SECTIONING_TAGS:
+            return "article" not in self._open and "main" not in self._open
+        if tag in _SKIP_TAGS:
+            return True
+        if tag in _CONTENT_ROOTS:
+            return False
+        attrs = dict(attrs)
+        if (attrs.get("role") or "").lower() in _SKIP_ROLES or "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return True
+        hint = f"{attrs.get('id') or ''} {attrs.get('class') or ''}".lower()
+        return bool(hint.strip()) and bool(_SKIP_HINT.search(hint))
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag not in _VOID_TAGS:
+                self._skip_open[tag] = self._skip_open.get(tag, 0) + 1
+            return
+        if tag not in _VOID_TAGS and self._is_boilerplate(tag, attrs):
+            self._skip_tag, self._skip_open = tag, {tag: 1}
+            return
+        if tag in _ENCLOSING_TAGS:
+            self._open.append(tag)
+            if len(self._open) > _MAX_OPEN:
+                del self._open[0]
+        if tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_startendtag(self, tag, attrs):
+        if self._skip_tag is None and tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if self._skip_open.get(tag):
+                self._skip_open[tag] -= 1
+                if tag == self._skip_tag and self._skip_open[tag] == 0:
+                    self._skip_tag = None
+                return
+            if tag not in self._open:
+                return
+            # An element enclosing the skipped one closed, so it was left unclosed
+            self._skip_tag = None
+        if tag in self._open:
+            # Also closes anything left open inside it
+            del self._open[len(self._open) - 1 - self._open[::-1].index(tag):]
+        if tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._skip_tag is not None:
+            return
+        text = _SPACES.sub(" ", data)
+        if not self._buf or self._buf.endswith((" ", "\n")):
+            text = text.lstrip()
+        if text:
+            self._buf += text
+            self._cut()
+
+    def _break(self):
+        self._buf = self._buf.rstrip(" ")
+        if self._buf and not self._buf.endswith("\n"):
+            self._buf += "\n"
+
+    def _cut(self):
+        size = self.chunk_size
+        while len(self._buf) > size:
+            window = self._buf[:size + 1]
+            cut = window.rfind("\n")
+            if cut < size // 2:
+                cut = max(window.rfind(". "), window.rfind("? "), window.rfind("! "))
+                cut = cut + 1 if cut >= 0 else -1
+            if cut < size // 2:
+                cut = window.rfind(" ")
+            if cut < size // 2:
+                cut = size
+            chunk = self._buf[:cut].strip()
+            if chunk:
+                self._ready.append(chunk)
+            self._buf = self._buf[cut:].lstrip()
+
+    def feed(self, data: str) -> List[str]:
+        super().feed(data)
+        ready, self._ready = self._ready, []
+        return ready
+
+    def close(self) -> List[str]:
+        super().close()
+        self._cut()
+        tail = self._buf.strip()
+        self._buf = ""
+        ready, self._ready = self._ready, []
+        return ready + ([tail] if tail else [])
+
+
+def extract_chunks(html: str, chunk_size: int = 1000) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Whole-document form returning (text, chunk bounds), the shape
+    `scrape_cache.fetch_cached` stores.
+    """
+    extractor = StreamingExtractor(chunk_size)
+    chunks = extractor.feed(html) + extractor.close()
+    text = "\n".join(chunks)
+    bounds, start = [], 0
+    for chunk in chunks:
+        bounds.append((start, start + len(chunk)))
+        start += len(chunk) + 1
+    return text, bounds
+
+
+async def stream_documents(engine, url: str, chunk_size: int = 1000,
+                           max_bytes: int = FETCH_MAX_BYTES) -> AsyncIterator[Document]:
+    """
+    Yield `Document` chunks of a page while it is still downloading.
+
+    Downstream work (dedupe, embedding) can start on the first chunks before
+    the last bytes arrive. Reading stops at `max_bytes`; a failed or timed-out
+    download ends the stream after whatever chunks it already produced.
+    """
+    extractor = StreamingExtractor(chunk_size)
+    index = 0
+
+    def doc(text: str) -> Document:
+        return Document(page_content=text, metadata={"source": url, "chunk": index})
+
+    try:
+        async for text in engine.stream_text(url, max_bytes=max_bytes):
+            for chunk in extractor.feed(text):
+                yield doc(chunk)
+                index += 1
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        logger.warning(f"Streaming scrape of {url} stopped: {type(e).__name__}: {e}")
+    for chunk in extractor.close():
+        yield doc(chunk)
+        index += 1
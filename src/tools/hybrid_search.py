@@ -0,0 +1,204 @@
+"""Incremental BM25 index and rank fusion for hybrid retrieval"""
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Default retrieval mode for VectorStore searches: dense, sparse or hybrid
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+# Each ranking contributes this many times k candidates to the fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+# Standard RRF damping constant
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Chunks read per page when rebuilding an index from its Chroma collection
+SPARSE_SEED_PAGE = int(os.getenv("SPARSE_SEED_PAGE", "5000"))
+
+# Keeps versions and model names ("3.1", "gpt-4o", "x200") as single terms
+_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if "." in token or "-" in token:
+            # Also index the parts, so "gpt" matches "gpt-4o"
+            tokens.extend(p for p in re.split(r"[.\-]", token) if p)
+    return tokens
+
+
+def doc_key(doc: Document) -> str:
+    """
+    Stable id shared by the dense and sparse rankings.
+
+    A hash of the chunk text: Chroma results carry their storage id but
+    chunks indexed straight from the scraper carry none, so ids cannot match.
+    """
+    return hashlib.sha1(doc.page_content.encode()).hexdigest()
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index that supports adds and removes.
+
+    Term statistics are kept incrementally, so indexing a batch of chunks
+    costs time proportional to the batch, not the collection.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._docs: Dict[str, Document] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add_documents(self, docs: Iterable[Document]):
+        with self._lock:
+            for doc in docs:
+                key = doc_key(doc)
+                if key in self._docs:
+                    self._remove(key)
+                counts = Counter(tokenize(doc.page_content))
+                for term, tf in counts.items():
+                    self._postings[term][key] = tf
+                length = sum(counts.values())
+                self._lengths[key] = length
+                self._total_length += length
+                self._docs[key] = doc
+
+    def remove(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for term in set(tokenize(doc.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        with self._lock:
+            n = len(self._docs)
+            if n == 0:
+                return []
+            avg_length = self._total_length / n
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                    scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+            top = sorted(scores.items(), key=lambda kv: -kv[1])[:k]
+            return [(self._docs[key], score) for key, score in top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int,
+                           rrf_k: int = RRF_K) -> List[Document]:
+    """Fuse ranked lists by summing 1 / (rrf_k + rank); robust to incomparable scores"""
+    scores: Dict[str, float] = defaultdict(float)
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc_key(doc)
+            scores[key] += 1 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key, _ in sorted(scores.items(), key=lambda kv: -kv[1])[:k]]
+
+
+def hybrid_search(index: BM25Index, dense_search: Callable[[str, int], List[Document]],
+                  query: str, k: int, mode: str = SEARCH_MODE,
+                  candidates: int = HYBRID_CANDIDATES) -> List[Document]:
+    """
+    Search in `mode`: "dense" (the vector store alone), "sparse" (BM25 alone)
+    or "hybrid" (both, fused with RRF).
+    """
+    if mode == "dense":
+        return dense_search(query, k)
+    if mode == "sparse":
+        return [doc for doc, _ in index.search(query, k)]
+    depth = k * candidates
+    dense = dense_search(query, depth)
+    sparse = [doc for doc, _ in index.search(query, depth)]
+    return reciprocal_rank_fusion([dense, sparse], k)
+
+
+def _stored_documents(source, page: int = SPARSE_SEED_PAGE) -> Iterable[Document]:
+    """Every chunk of a Chroma collection, read a page at a time"""
+    offset = 0
+    while True:
+        batch = source.get(include=["documents", "metadatas"], limit=page, offset=offset)
+        texts = batch.get("documents") or []
+        metadatas = batch.get("metadatas") or [None] * len(texts)
+        for doc_id, text, meta in zip(batch.get("ids") or [], texts, metadatas):
+            if text:
+                yield Document(page_content=text, metadata=meta or {}, id=doc_id)
+        if len(texts) < page:
+            return
+        offset += page
+
+
+class SparseIndexes:
+    """
+    One BM25 index per Chroma collection, maintained alongside it.
+
+    Indexes live in memory only. Pass the Chroma collection to `get` and an
+    index missing after a restart is rebuilt from the stored chunks on
+    first access.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection: str, source=None) -> BM25Index:
+        index = self._indexes.get(collection)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._indexes.get(collection)
+            if index is None:
+                index = BM25Index()
+                if source is not None:
+                    try:
+                        index.add_documents(_stored_documents(source))
+                    except Exception as e:
+                        logger.warning(f"Could not seed BM25 index for {collection}: {e}")
+                    else:
+                        logger.info(f"Seeded BM25 index for {collection} with {len(index)} chunks")
+                self._indexes[collection] = index
+        return index
+
+    def forget(self, collection: str):
+        self._indexes.pop(collection, None)
+
+    def stats(self) -> dict:
+        return {
+            "collections": len(self._indexes),
+            "documents": sum(len(i) for i in self._indexes.values()),
+        }
+
+
+sparse_indexes = SparseIndexes()
@@ -0,0 +1,252 @@
+"""Persistent on-disk cache of extracted page text with HTTP revalidation"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "./scrape_cache")
+SCRAPE_CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", "512"))
+# Entries younger than this are served without revalidating
+SCRAPE_CACHE_FRESH = int(os.getenv("SCRAPE_CACHE_FRESH", "3600"))
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the cache key: no fragment, tracking params or default port"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    chunks: List[Tuple[int, int]]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def chunk_texts(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.chunks]
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """
+    URL -> extracted text + chunk boundaries, stored on disk.
+
+    A SQLite index maps normalized URLs to a content hash; the text lives in
+    one zlib-compressed blob per distinct content, so mirrored pages share
+    storage. Total blob size is capped with least-recently-used eviction.
+    """
+
+    def __init__(self, directory: str = SCRAPE_CACHE_DIR,
+                 max_bytes: int = int(SCRAPE_CACHE_MAX_MB * 1024 * 1024),
+                 fresh_for: int = SCRAPE_CACHE_FRESH):
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_access ON pages(last_access);
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+        """)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.truncated = 0
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.blob_dir / content_hash[:2] / f"{content_hash}.zz"
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, etag, last_modified, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key))
+            self._db.commit()
+        content_hash, etag, last_modified, fetched_at = row
+        try:
+            data = json.loads(zlib.decompress(self._blob_path(content_hash).read_bytes()))
+        except (OSError, zlib.error, ValueError):
+            self.delete(url)
+            return None
+        return CachedPage(url, data["text"], [tuple(c) for c in data["chunks"]], etag, last_modified, fetched_at)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.fresh_for
+
+    def put(self, url: str, text: str, chunks: List[Tuple[int, int]],
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> CachedPage:
+        key = normalize_url(url)
+        content_hash = hashlib.sha256(text.encode()).hexdigest()
+        path = self._blob_path(content_hash)
+        now = time.time()
+        with self._lock:
+            known = self._db.execute("SELECT 1 FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+            if not known:
+                blob = zlib.compress(json.dumps({"text": text, "chunks": chunks}).encode(), 6)
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(blob)
+                tmp.replace(path)
+                # Another process sharing the directory may have stored the same content meanwhile
+                self._db.execute("INSERT OR IGNORE INTO blobs (content_hash, size) VALUES (?, ?)",
+                                 (content_hash, len(blob)))
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, etag, last_modified, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content_hash, etag, last_modified, now, now),
+            )
+            self._db.commit()
+            self._evict()
+        return CachedPage(url, text, chunks, etag, last_modified, now)
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Mark an entry fresh after a 304 Not Modified"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, normalize_url(url)),
+            )
+            self._db.commit()
+
+    def delete(self, url: str):
+        with self._lock:
+            self._db.execute("DELETE FROM pages WHERE url = ?", (normalize_url(url),))
+            self._drop_orphans()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used pages in batches until orphaned blobs free enough space
+        while total > self.max_bytes:
+            urls = self._db.execute("SELECT url FROM pages ORDER BY last_access LIMIT 32").fetchall()
+            if not urls:
+                break
+            self._db.executemany("DELETE FROM pages WHERE url = ?", urls)
+            self._drop_orphans()
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self._db.commit()
+
+    def _drop_orphans(self):
+        orphans = self._db.execute(
+            "SELECT content_hash FROM blobs WHERE content_hash NOT IN (SELECT content_hash FROM pages)"
+        ).fetchall()
+        for (content_hash,) in orphans:
+            try:
+                self._blob_path(content_hash).unlink()
+            except FileNotFoundError:
+                pass
+        self._db.executemany("DELETE FROM blobs WHERE content_hash = ?", orphans)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pages, = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+            blobs, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"pages": pages, "blobs": blobs, "bytes": size,
+                "hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                "truncated": self.truncated}
+
+    def close(self):
+        self._db.close()
+
+
+async def fetch_cached(engine, cache: ScrapeCache, url: str,
+                       extract: Callable[[str], Tuple[str, List[Tuple[int, int]]]]) -> Optional[CachedPage]:
+    """
+    Return extracted text and chunk boundaries for `url`, using the cache.
+
+    Fresh entries skip the network and the HTML parse entirely. Stale ones are
+    revalidated with a conditional GET; only a changed page is re-parsed with
+    `extract(html) -> (text, chunk_bounds)`. If the fetch fails, a stale entry
+    is still better than nothing and is returned. Pages cut off at the
+    download budget are returned but never cached, so a partial body is not
+    served as the whole page later.
+    """
+    page = await asyncio.to_thread(cache.get, url)
+    if page is not None and cache.is_fresh(page):
+        cache.hits += 1
+        return page
+
+    result = await engine.fetch(url, headers=page.conditional_headers() if page else None)
+    if page is not None and result.status == 304:
+        cache.revalidated += 1
+        await asyncio.to_thread(cache.touch, url, result.headers.get("etag"), result.headers.get("last-modified"))
+        return page
+    if not result.ok:
+        return page
+
+    cache.misses += 1
+    text, chunks = await asyncio.to_thread(extract, result.text)
+    if result.truncated:
+        cache.truncated += 1
+        return CachedPage(url, text, chunks, None, None, time.time())
+    return await asyncio.to_thread(
+        cache.put, url, text, chunks, result.headers.get("etag"), result.headers.get("last-modified")
+    )
+
+
+_cache: Optional[ScrapeCache] = None
+
+
+def get_scrape_cache() -> ScrapeCache:
+    global _cache
+    if _cache is None:
+        _cache = ScrapeCache()
+    return _cache
+
+
+def scrape_cache_stats() -> Optional[dict]:
+    """Stats of this process's cache, or None if nothing has opened it (and created its directory)"""
+    return _cache.stats() if _cache is not None else None
@@ -0,0 +1,216 @@
+"""TTL cache with stale-while-revalidate in front of web search"""
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Results younger than this are served as-is
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+# Past the TTL, results are still served for this long while a refresh runs in the background
+SEARCH_CACHE_STALE = int(os.getenv("SEARCH_CACHE_STALE", "86400"))
+SEARCH_CACHE_MAX = int(os.getenv("SEARCH_CACHE_MAX", "2000"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+_PUNCT = re.compile(r"[^\w\s.+#-]")
+_SPACES = re.compile(r"\s+")
+
+TAVILY_CALLS = Counter("tavily_calls_total", "Tavily search calls")
+
+SearchFn = Callable[[str, int], Union[List[dict], Awaitable[List[dict]]]]
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and punctuation differences should not miss the cache"""
+    return _SPACES.sub(" ", _PUNCT.sub(" ", query.lower())).strip(" .")
+
+
+class SearchCache:
+    """
+    Search results keyed on normalized query + max_results.
+
+    An in-process LRU sits in front of Redis (when REDIS_URL is set), so
+    workers share results. Fresh entries are returned directly; stale ones
+    are returned immediately and refreshed in the background; concurrent
+    misses for the same key share one upstream call. If the upstream call
+    fails, a stale entry is still returned.
+    """
+
+    def __init__(self, ttl: int = SEARCH_CACHE_TTL, stale: int = SEARCH_CACHE_STALE,
+                 max_entries: int = SEARCH_CACHE_MAX, redis_url: Optional[str] = REDIS_URL,
+                 prefix: str = "research:search:"):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._entries: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: set = set()
+        # The loop holds only weak references to tasks; keep background refreshes alive until done
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.client = None
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self.client = aioredis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis unavailable, search cache is per-process: {e}")
+
+    def key(self, query: str, max_results: int) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+        return f"{digest}:{max_results}"
+
+    async def _load(self, key: str) -> Optional[Tuple[float, List[dict]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self.client is None:
+            return None
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Search cache read failed: {e}")
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        entry = (data["fetched_at"], data["results"])
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[float, List[dict]]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _store(self, key: str, results: List[dict]):
+        entry = (time.time(), results)
+        self._remember(key, entry)
+        if self.client is None:
+            return
+        try:
+            await self.client.set(self.prefix + key, json.dumps({"fetched_at": entry[0], "results": results}),
+                                  ex=self.ttl + self.stale)
+        except Exception as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    async def _call(self, key: str, query: str, max_results: int, search: SearchFn) -> List[dict]:
+        # Cache hits, stale hits and coalesced callers never get here
+        TAVILY_CALLS.inc()
+        if inspect.iscoroutinefunction(search):
+            results = await search(query, max_results)
+        else:
+            results = await asyncio.to_thread(search, query, max_results)
+        await self._store(key, results)
+        return results
+
+    def _done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Retrieve the outcome so a failure nobody awaited is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, key: str, query: str, max_results: int, search: SearchFn) -> List[dict]:
+        """
+        One upstream call per key at a time. It runs as its own task, so a
+        caller that disconnects does not cancel it for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(key, query, max_results, search))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: str, query: str, max_results: int, search: SearchFn):
+        try:
+            await self._fetch(key, query, max_results, search)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Background search refresh failed for {query!r}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def search(self, query: str, max_results: int, search: SearchFn) -> List[dict]:
+        key = self.key(query, max_results)
+        entry = await self._load(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.ensure_future(self._refresh(key, query, max_results, search))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                return entry[1]
+        self.misses += 1
+        try:
+            return await self._fetch(key, query, max_results, search)
+        except Exception:
+            self.errors += 1
+            if entry is not None:
+                # Expired past the stale window, but better than nothing
+                return entry[1]
+            raise
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    async def close(self):
+        for task in self._refresh_tasks:
+            task.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+
+
+_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        _cache = SearchCache()
+    return _cache
+
+
+def cached_search(search: SearchFn) -> Callable[..., Awaitable[List[dict]]]:
+    """
+    Wrap a search function (e.g. `search_web`) with the process-wide cache:
+
+        search = cached_search(search_web)
+        results = await search(query, max_results=5)
+    """
+    async def wrapper(query: str, max_results: int = 5) -> List[dict]:
+        return await get_search_cache().search(query, max_results, search)
+    return wrapper
@@ -46,3 +46,128 @@ async def test_research_endpoint_success(mock_agent, client):
     assert "response" in data
     assert "sources" in data
     assert "session_id" in data
+
+def test_research_stream_endpoint(client):
+    """NDJSON stream ends with a result event carrying the answer"""
+    import json
+    from langchain_core.messages import AIMessage
+
+    async def fake_events(state, config=None, version="v2"):
+        yield {"event": "on_chain_end", "name": "LangGraph", "metadata": {}, "parent_ids": [],
+               "data": {"output": {"messages": [AIMessage(content="Streamed answer")],
+                                   "research_findings": [{"url": "https://test.com"}]}}}
+
+    with patch('src.agent.graph.agent.astream_events', fake_events):
+        response = client.post("/research/stream", json={
+            "query": "How do solid-state batteries differ from lithium-ion?"
+        }, headers={"X-API-Key": "test"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[-1]["type"] == "result"
+    assert events[-1]["answer"] == "Streamed answer"
+    assert events[-1]["sources"] == [{"title": "Source", "url": "https://test.com"}]
+
+def test_metrics_prometheus_format(client):
+    """Metrics are served in Prometheus text exposition format"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "research_request_duration_seconds" in response.text
+    assert "research_node_duration_seconds" in response.text
+
+def test_stats_requires_key_and_metrics_survive_job_store_outage(client, monkeypatch):
+    """/stats is behind the API key; /metrics drops the job gauge when the store is down"""
+    monkeypatch.setattr("src.api.main.VALID_API_KEY", "test")
+    assert client.get("/stats").status_code == 403
+    assert client.get("/stats", headers={"X-API-Key": "test"}).status_code == 200
+
+    async def unreachable():
+        raise ConnectionError("job store down")
+
+    monkeypatch.setattr("src.api.main._jobs.depth", unreachable)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "research_request_duration_seconds" in response.text
+
+def test_ready_endpoint_separate_from_health(client, monkeypatch):
+    """/ready is 503 naming the component that is not loaded; /health stays up regardless"""
+    from src.api.readiness import FAILED, READY, Readiness
+
+    readiness = Readiness()
+    readiness.declare("agent").status = READY
+    vector_store = readiness.declare("vector_store")
+    vector_store.status, vector_store.error = FAILED, "chroma unavailable"
+    readiness.declare("http_pool", required=False)
+    monkeypatch.setattr("src.api.main._readiness", readiness)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    data = response.json()
+    assert data["ready"] is False
+    assert data["components"]["vector_store"] == {
+        "status": "failed", "required": True, "seconds": None, "error": "chroma unavailable"
+    }
+    assert data["components"]["agent"]["status"] == "ready"
+    assert client.get("/health").status_code == 200
+
+    # Optional components still loading do not hold readiness back
+    vector_store.status, vector_store.error = READY, None
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["components"]["http_pool"]["status"] == "pending"
+
+@patch('src.agent.graph.agent.ainvoke')
+def test_research_batch_endpoint(mock_agent, client, monkeypatch):
+    """Duplicates run once; results stream as NDJSON and end with a summary"""
+    import json
+    # A trusted key skips the daily quota earlier tests have used up
+    monkeypatch.setattr("src.api.main.VALID_API_KEY", "test")
+    from langchain_core.messages import AIMessage
+    mock_agent.return_value = {
+        "messages": [AIMessage(content="Batch answer")],
+        "research_findings": [{"url": "https://test.com"}],
+        "error": None
+    }
+
+    response = client.post("/research/batch", json={"queries": [
+        "What are the main uses of heat pumps in cold climates?",
+        "what are the main uses of heat pumps in cold climates",
+        "How does retrieval augmented generation reduce hallucination?",
+    ]}, headers={"X-API-Key": "test"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    results = [e for e in events if e["type"] == "result"]
+    assert sorted(i for e in results for i in e["indices"]) == [0, 1, 2]
+    assert events[-1]["type"] == "summary"
+    assert events[-1]["unique"] == 2
+    assert mock_agent.call_count <= 2
+
+
+@patch('src.agent.graph.agent.ainvoke')
+def test_research_batch_charges_rate_limit_per_query(mock_agent, client, monkeypatch):
+    """Each unique query takes one request from the per-minute limit"""
+    import json
+    from langchain_core.messages import AIMessage
+    from src.api.ratelimit import RateLimiter
+    monkeypatch.setattr("src.api.main.VALID_API_KEY", "test")
+    monkeypatch.setattr("src.api.main._limiter", RateLimiter("2/minute", daily_quota=100, redis_url=None))
+    mock_agent.return_value = {
+        "messages": [AIMessage(content="Batch answer")],
+        "research_findings": [],
+        "error": None
+    }
+
+    response = client.post("/research/batch", json={"queries": [
+        "What are the main uses of heat pumps in cold climates?",
+        "How does retrieval augmented generation reduce hallucination?",
+        "Which grid storage technologies are cheapest per kilowatt hour?",
+    ]}, headers={"X-API-Key": "test"})
+
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [e["status"] for e in events if e["type"] == "error"] == [429]
+    assert client.post("/research/batch", json={"queries": ["What are heat pumps used for today?"]},
+                       headers={"X-API-Key": "test"}).status_code == 429
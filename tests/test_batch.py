@@ -0,0 +1,82 @@
+"""Test batch research orchestration"""
+import asyncio
+import time
+
+import pytest
+from langchain_core.documents import Document
+from src.api.batch import SharedRetrieval, build_retrieval, group_queries, run_batch
+
+
+def test_group_queries_dedupes_by_normalized_text():
+    groups = group_queries([
+        "What is RAG?", "what is rag", "How do heat pumps work?", "  What is RAG?!  ",
+    ])
+    assert groups == [("What is RAG?", [0, 1, 3]), ("How do heat pumps work?", [2])]
+
+
+@pytest.mark.asyncio
+async def test_shared_retrieval_fetches_each_query_and_url_once():
+    calls = {"search": 0, "scrape": 0}
+
+    async def search(query, max_results):
+        calls["search"] += 1
+        await asyncio.sleep(0.01)
+        return [{"url": "https://a.test/x?utm_source=feed"}]
+
+    async def scrape(url):
+        calls["scrape"] += 1
+        await asyncio.sleep(0.01)
+        return [Document(page_content="chunk", metadata={"source": url})]
+
+    shared = SharedRetrieval(search, scrape)
+    results = await asyncio.gather(*(shared.search(q) for q in ("Solid state batteries", "solid state  batteries?")))
+    # Same query modulo punctuation and case, concurrent: one upstream call
+    assert calls["search"] == 1 and results[0] == results[1]
+    await asyncio.gather(shared.scrape("https://a.test/x"), shared.scrape("https://a.test/x?utm_source=feed"))
+    assert calls["scrape"] == 1
+    assert shared.stats() == {"shared_search": True, "searches": 2, "search_hits": 1, "scrapes": 2, "scrape_hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_build_retrieval_takes_an_injected_search():
+    queries = []
+
+    async def search(query, max_results):
+        queries.append(query)
+        return [{"url": "https://b.test/"}]
+
+    shared = build_retrieval(search)
+    assert await shared.search("Distinct batch retrieval query 7f3a") == [{"url": "https://b.test/"}]
+    assert queries == ["Distinct batch retrieval query 7f3a"]
+
+    scrape_only = SharedRetrieval(None, lambda url: None)
+    assert not scrape_only.stats()["shared_search"]
+    with pytest.raises(RuntimeError):
+        await scrape_only.search("anything")
+
+
+@pytest.mark.asyncio
+async def test_run_batch_streams_in_completion_order_with_bounded_concurrency():
+    running = {"now": 0, "peak": 0}
+
+    async def handle(query, slot):
+        if query == "cached":
+            return {"type": "result", "cached": True}
+        async with slot:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+        if query == "bad":
+            raise RuntimeError("synthesis failed")
+        return {"type": "result", "cached": False}
+
+    groups = [("slow", [0]), ("bad", [1]), ("cached", [2, 3])] + [(f"q{i}", [4 + i]) for i in range(4)]
+    started = time.perf_counter()
+    events = [e async for e in run_batch(groups, handle, concurrency=2)]
+    assert events[0]["query"] == "cached" and events[0]["indices"] == [2, 3]
+    assert running["peak"] == 2
+    assert {e["query"] for e in events if e["type"] == "error"} == {"bad"}
+    assert len(events) == len(groups)
+    # 6 runs, 2 at a time, 0.05 s each
+    assert time.perf_counter() - started < 0.3
@@ -0,0 +1,127 @@
+"""Test response cache backends"""
+import pytest
+from src.api.cache import MemoryCache, CacheStats
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    """Reading an entry keeps it alive past older ones"""
+    cache = MemoryCache(max_size=2, ttl=0)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+
+    await cache.set("c", 3)
+
+    assert await cache.get("a") == 1
+    assert await cache.get("b") is None
+    assert await cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl(monkeypatch):
+    """Expired entries are treated as misses"""
+    import src.api.cache as cache_mod
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+
+    cache = MemoryCache(max_size=10, ttl=5)
+    await cache.set("k", "v")
+    assert await cache.get("k") == "v"
+
+    now[0] += 6
+    assert await cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_cache_stats_snapshot():
+    """Hit ratio and p50 latencies are reported"""
+    stats = CacheStats()
+    stats.record_hit(0.002)
+    stats.record_miss(4.0)
+    stats.record_miss(6.0)
+
+    snap = stats.snapshot()
+    assert snap["hits"] == 1
+    assert snap["misses"] == 2
+    assert snap["hit_ratio"] == pytest.approx(1 / 3, rel=1e-3)
+    assert snap["p50_miss_ms"] == 5000.0
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_matches_near_duplicates():
+    """Queries above the threshold resolve to the stored cache key"""
+    from src.api.semantic_cache import SemanticCache
+
+    vectors = {
+        "solid state batteries": [1.0, 0.0, 0.0],
+        "solid-state battery advances": [0.95, 0.05, 0.0],
+        "python packaging": [0.0, 1.0, 0.0],
+    }
+    cache = SemanticCache(lambda q: vectors[q], threshold=0.9, max_entries=2)
+
+    vec = await cache.embed("Solid state batteries")
+    cache.add("groq|brief", vec, "key-1")
+
+    key, score = cache.lookup("groq|brief", await cache.embed("solid-state battery advances"))
+    assert key == "key-1"
+    assert score > 0.9
+
+    key, _ = cache.lookup("groq|brief", await cache.embed("python packaging"))
+    assert key is None
+
+    # Buckets are isolated per provider/depth
+    key, _ = cache.lookup("openai|brief", vec)
+    assert key is None
+
+
+@pytest.mark.asyncio
+async def test_search_cache_coalesces_and_revalidates():
+    """Identical searches share one call; stale entries are served while refreshing"""
+    import asyncio
+    from prometheus_client import REGISTRY
+    from src.tools.search_cache import SearchCache
+
+    def upstream_calls():
+        return REGISTRY.get_sample_value("tavily_calls_total") or 0
+
+    calls = []
+    before = upstream_calls()
+
+    async def search(query, max_results):
+        calls.append(query)
+        await asyncio.sleep(0.02)
+        return [{"url": f"https://r{len(calls)}.test", "content": query}]
+
+    cache = SearchCache(ttl=3600, stale=3600, redis_url=None)
+
+    results = await asyncio.gather(
+        cache.search("Solid state batteries?", 5, search),
+        cache.search("  solid STATE batteries ", 5, search),
+    )
+    assert results[0] == results[1]
+    assert len(calls) == 1 and cache.stats()["coalesced"] == 1
+    assert upstream_calls() - before == 1
+
+    # Different max_results is a different key
+    await cache.search("solid state batteries", 3, search)
+    assert len(calls) == 2
+
+    # Past the TTL: old results come back at once, a refresh runs behind them
+    cache.ttl = 0
+    stale = await cache.search("solid state batteries", 5, search)
+    assert stale == results[0]
+    assert len(cache._refresh_tasks) == 1
+    await asyncio.sleep(0.05)
+    assert not cache._refresh_tasks
+    assert len(calls) == 3
+    cache.ttl = 3600
+    assert await cache.search("solid state batteries", 5, search) != stale
+
+    # Upstream failure past the stale window still serves the last result
+    async def failing(query, max_results):
+        raise RuntimeError("tavily down")
+
+    cache.ttl = cache.stale = 0
+    assert await cache.search("solid state batteries", 5, failing)
+    assert cache.stats()["errors"] == 1
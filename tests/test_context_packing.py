@@ -0,0 +1,44 @@
+"""Test synthesis context packing"""
+from langchain_core.documents import Document
+from src.agent.context_packing import estimate_tokens, pack_context, trim_to_sentences
+
+
+def _doc(text, source):
+    return Document(page_content=text, metadata={"source": source})
+
+
+def test_pack_context_fits_budget_and_prefers_diverse_relevant_chunks():
+    """Packing stays within budget, skips duplicates and irrelevant text, records savings"""
+    battery = "Solid state batteries use a solid electrolyte instead of a liquid one. " * 6
+    mirror = battery
+    safety = "Solid state batteries reduce fire risk because the electrolyte does not burn. " * 6
+    unrelated = "The football season opens next week with three new stadiums. " * 6
+    docs = [_doc(battery, "a"), _doc(mirror, "b"), _doc(safety, "c"), _doc(unrelated, "d")]
+
+    packed = pack_context("solid state batteries electrolyte safety", docs, budget=200)
+
+    assert packed.tokens <= 200
+    assert sum(estimate_tokens(d.page_content) for d in packed.documents) == packed.tokens
+    sources = [d.metadata["source"] for d in packed.documents]
+    assert sources[0] in ("a", "c")
+    # The mirror is redundant and the off-topic chunk is least relevant
+    assert "c" in sources and not {"a", "b"} <= set(sources) and "d" not in sources
+    assert packed.saved_tokens == packed.input_tokens - packed.tokens > 0
+    assert all(d.page_content.endswith(".") for d in packed.documents)
+    assert packed.render().startswith("[1] ")
+
+
+def test_depth_sets_budget():
+    """Larger depths get larger budgets"""
+    docs = [_doc(f"Finding number {i} about grid storage costs falling. " * 20, str(i)) for i in range(40)]
+    brief = pack_context("grid storage costs", docs, depth="brief")
+    comprehensive = pack_context("grid storage costs", docs, depth="comprehensive")
+    assert brief.tokens <= brief.budget < comprehensive.budget
+    assert comprehensive.tokens > brief.tokens
+
+
+def test_trim_to_sentences():
+    """Trimming keeps whole sentences when possible"""
+    text = "First sentence here. Second sentence is a bit longer. Third one."
+    assert trim_to_sentences(text, 100) == text
+    assert trim_to_sentences(text, 8) == "First sentence here."
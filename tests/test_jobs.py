@@ -0,0 +1,114 @@
+"""Test research job queue"""
+import asyncio
+import pytest
+from src.api.jobs import JobManager, MemoryJobStore, QueueFull, PRIORITY_API_KEY, PRIORITY_ANONYMOUS
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_by_priority():
+    """API-key jobs are drained before anonymous ones queued earlier"""
+    order = []
+
+    async def handler(request):
+        order.append(request["query"])
+        return {"answer": request["query"].upper()}
+
+    manager = JobManager(MemoryJobStore(), handler, workers=1)
+    anon = await manager.submit({"query": "anon"}, PRIORITY_ANONYMOUS)
+    keyed = await manager.submit({"query": "keyed"}, PRIORITY_API_KEY)
+    await manager.start()
+
+    job = await manager.wait(anon["job_id"], timeout=1)
+    await manager.stop()
+
+    assert order == ["keyed", "anon"]
+    assert job["status"] == "done"
+    assert job["result"] == {"answer": "ANON"}
+    assert (await manager.get(keyed["job_id"]))["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error():
+    """Handler exceptions mark the job failed without killing the worker"""
+    async def handler(request):
+        if request["query"] == "bad":
+            raise ValueError("provider down")
+        return {"answer": "ok"}
+
+    manager = JobManager(MemoryJobStore(), handler, workers=1)
+    await manager.start()
+    bad = await manager.submit({"query": "bad"}, PRIORITY_ANONYMOUS)
+    good = await manager.submit({"query": "good"}, PRIORITY_ANONYMOUS)
+
+    bad_job = await manager.wait(bad["job_id"], timeout=1)
+    good_job = await manager.wait(good["job_id"], timeout=1)
+    await manager.stop()
+
+    assert bad_job["status"] == "failed"
+    assert bad_job["error"] == "provider down"
+    assert good_job["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_queue_rejects_when_full():
+    """Submissions beyond the pending cap raise QueueFull"""
+    manager = JobManager(MemoryJobStore(max_pending=1), handler=None, workers=0)
+    await manager.submit({"query": "a"}, PRIORITY_ANONYMOUS)
+    with pytest.raises(QueueFull):
+        await manager.submit({"query": "b"}, PRIORITY_ANONYMOUS)
+    assert await manager.depth() == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_store_errors_and_renews_leases():
+    """A failing store call backs off instead of killing the worker; running jobs heartbeat"""
+    class FlakyStore(MemoryJobStore):
+        def __init__(self):
+            super().__init__()
+            self.lease = 0.03
+            self.saves_failed = 0
+            self.renewals = 0
+
+        async def save(self, job):
+            if job["status"] == "running" and not self.saves_failed:
+                self.saves_failed += 1
+                raise ConnectionError("redis down")
+            await super().save(job)
+
+        async def renew(self, job):
+            self.renewals += 1
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return {"answer": "ok"}
+
+    store = FlakyStore()
+    manager = JobManager(store, handler, workers=1, retry_max=0.01)
+    await manager.start()
+    lost = await manager.submit({"query": "lost"}, PRIORITY_ANONYMOUS)
+    kept = await manager.submit({"query": "kept"}, PRIORITY_ANONYMOUS)
+
+    job = await manager.wait(kept["job_id"], timeout=1)
+    await manager.stop()
+
+    assert manager.worker_errors == 1
+    assert (await manager.get(lost["job_id"]))["status"] != "done"
+    assert job["status"] == "done"
+    assert store.renewals >= 2
+
+
+@pytest.mark.asyncio
+async def test_start_survives_unreachable_store():
+    """A failing initial recover is logged and workers still start"""
+    class DownStore(MemoryJobStore):
+        async def recover(self):
+            raise ConnectionError("redis unreachable")
+
+    async def handler(request):
+        return {"answer": "ok"}
+
+    manager = JobManager(DownStore(), handler, workers=1)
+    await manager.start()
+    job = await manager.submit({"query": "q"}, PRIORITY_ANONYMOUS)
+    assert (await manager.wait(job["job_id"], timeout=1))["status"] == "done"
+    await manager.stop()
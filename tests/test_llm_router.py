@@ -0,0 +1,87 @@
+"""Test LLM provider routing"""
+import asyncio
+import time
+
+import pytest
+from src.agent.llm_router import LLMRouter, ProviderUnavailable
+
+
+def _stub_llm(delays, failing=(), calls=None):
+    """Stub provider call: sleeps for the provider's next delay, or raises"""
+    async def call(provider):
+        if calls is not None:
+            calls.append(provider)
+        if provider in failing:
+            raise RuntimeError(f"{provider} 503")
+        await asyncio.sleep(delays[provider].pop(0) if isinstance(delays[provider], list) else delays[provider])
+        return f"answer from {provider}"
+    return call
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_beats_slow_primary():
+    """In fastest mode a stalled primary is hedged after its p95 and the loser is cancelled"""
+    router = LLMRouter(["groq", "openai"], hedge_after=0.05)
+    # Warm up latency history: groq is usually the fastest
+    for _ in range(5):
+        await router.route(_stub_llm({"groq": 0.01, "openai": 0.03}), preferred="groq")
+        await router.route(_stub_llm({"groq": 0.01, "openai": 0.03}), preferred="openai")
+    assert router.ranked()[0] == "groq"
+
+    started = time.perf_counter()
+    answer = await router.route(_stub_llm({"groq": 2.0, "openai": 0.03}), mode="fastest")
+    elapsed = time.perf_counter() - started
+    assert answer == "answer from openai"
+    assert elapsed < 0.5
+    assert router.stats()["hedges"] == 1 and router.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pinned_mode_falls_back_and_breaker_opens():
+    """Failures fall back to the next provider and trip the breaker, which later half-opens"""
+    router = LLMRouter(["groq", "openai"], max_failures=3, cooldown=0.1)
+    calls = []
+    stub = _stub_llm({"groq": 0.0, "openai": 0.0}, failing={"groq"}, calls=calls)
+    for _ in range(3):
+        assert await router.route(stub, preferred="groq") == "answer from openai"
+    assert router.stats()["providers"]["groq"]["breaker"] == "open"
+
+    # While open, groq is skipped without being called
+    calls.clear()
+    await router.route(stub, preferred="groq")
+    assert calls == ["openai"]
+
+    # After the cooldown one probe goes through; success closes the breaker
+    await asyncio.sleep(0.12)
+    assert await router.route(_stub_llm({"groq": 0.0, "openai": 0.0}), preferred="groq") == "answer from groq"
+    assert router.stats()["providers"]["groq"]["breaker"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_all_providers_failing():
+    """With every provider failing the caller gets ProviderUnavailable"""
+    router = LLMRouter(["groq", "openai"])
+    with pytest.raises(ProviderUnavailable):
+        await router.route(_stub_llm({}, failing={"groq", "openai"}), preferred="groq")
+
+
+@pytest.mark.asyncio
+async def test_health_is_tracked_per_model():
+    """A failing model opens its own breaker, not its provider's other models"""
+    router = LLMRouter(["groq", "openai"], max_failures=2)
+    big = {"groq": "llama-70b", "openai": "gpt-4o"}
+    small = {"groq": "llama-8b", "openai": "gpt-4o-mini"}
+
+    async def call(provider):
+        raise RuntimeError("overloaded")
+
+    for _ in range(2):
+        with pytest.raises(ProviderUnavailable):
+            await router.route(call, preferred="groq", models=big)
+    providers = router.stats()["providers"]
+    assert providers["groq:llama-70b"]["breaker"] == "open"
+    assert "groq:llama-8b" not in providers
+
+    answer = await router.route(_stub_llm({"groq": 0.0, "openai": 0.0}), preferred="groq", models=small)
+    assert answer == "answer from groq"
+    assert router.stats()["providers"]["groq:llama-8b"]["breaker"] == "closed"
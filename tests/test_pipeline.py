@@ -0,0 +1,79 @@
+"""Test pipelined research orchestration"""
+import asyncio
+import time
+
+import pytest
+from langchain_core.documents import Document
+from src.agent.pipeline import PipelineServices, run_pipeline, split_query
+
+
+def _services(page_delays, indexed):
+    async def search(sub_query):
+        await asyncio.sleep(0.01)
+        return [{"url": url, "content": f"snippet for {url}"} for url in page_delays]
+
+    async def scrape(url):
+        for i in range(3):
+            await asyncio.sleep(page_delays[url] / 3)
+            yield Document(page_content=f"{url} chunk {i}", metadata={"source": url})
+
+    async def index(chunks):
+        indexed.append(len(chunks))
+
+    async def synthesize(query, docs):
+        return f"{len(docs)} docs"
+
+    return PipelineServices(search, scrape, index, synthesize)
+
+
+@pytest.mark.asyncio
+async def test_synthesis_does_not_wait_for_slowest_page():
+    """Synthesis starts once enough pages are in; a slow page is abandoned"""
+    delays = {"https://a.test": 0.03, "https://b.test": 0.03, "https://slow.test": 5.0}
+    indexed = []
+    started = time.perf_counter()
+    result = await run_pipeline("solid state batteries", _services(delays, indexed),
+                                min_pages=2, min_chunks=6, deadline=10)
+
+    assert time.perf_counter() - started < 1.0
+    assert result.pages_scraped == 2
+    assert "https://slow.test" in result.sources  # its search snippet still counts
+    assert not any("slow.test chunk" in d.page_content for d in result.documents)
+    assert result.answer == f"{len(result.documents)} docs"
+    assert result.timings["first_chunk"] <= result.timings["sufficient"] <= result.timings["answer"]
+    # Chunks were indexed in several batches as they arrived, not once at the end
+    assert len(indexed) > 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_latency():
+    """With too few pages, the deadline still starts synthesis"""
+    delays = {"https://slow.test": 5.0}
+    result = await run_pipeline("q", _services(delays, []), min_pages=3, deadline=0.1)
+    assert result.pages_scraped == 0
+    assert result.answer == "1 docs"
+
+
+def test_split_query():
+    """Conjunct parts become extra sub-queries"""
+    assert split_query("solid state batteries and hydrogen fuel cells") == [
+        "solid state batteries and hydrogen fuel cells", "solid state batteries", "hydrogen fuel cells",
+    ]
+    assert split_query("python") == ["python"]
+
+
+@pytest.mark.asyncio
+async def test_synthesis_gets_packed_context():
+    """Synthesis sees the chunks packed into the depth's budget, not every chunk"""
+    delays = {f"https://{i}.test": 0.01 for i in range(4)}
+    services = _services(delays, [])
+
+    async def scrape(url):
+        for i in range(3):
+            yield Document(page_content=f"{url} passage {i}. " + "Long filler sentence here. " * 60,
+                           metadata={"source": url})
+
+    services.scrape = scrape
+    result = await run_pipeline("q", services, min_pages=4, deadline=2, depth="brief")
+    assert len(result.documents) == 16
+    assert result.answer != "16 docs"
@@ -0,0 +1,80 @@
+"""Test rate limiting and daily quota engine"""
+import pytest
+from src.api.ratelimit import RateLimiter, RateLimited, MemoryBackend, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60)
+    assert parse_rate("100/hours") == (100, 3600)
+
+
+@pytest.mark.asyncio
+async def test_window_limit_per_ip():
+    """Requests beyond the window limit are rejected with a retry hint"""
+    limiter = RateLimiter("2/minute", daily_quota=10, redis_url=None)
+    await limiter.hit("1.1.1.1")
+    await limiter.hit("1.1.1.1")
+    with pytest.raises(RateLimited) as exc:
+        await limiter.hit("1.1.1.1")
+    assert 0 < exc.value.retry_after <= 61
+
+    # Other IPs are unaffected
+    await limiter.hit("2.2.2.2")
+
+
+@pytest.mark.asyncio
+async def test_quota_refund_for_uncharged_requests():
+    """Refunded reservations (cache hits, failures) don't use up the quota"""
+    limiter = RateLimiter("100/minute", daily_quota=1, redis_url=None)
+    charge = await limiter.reserve("1.1.1.1")
+    await limiter.refund(charge)
+    await limiter.reserve("1.1.1.1")
+    with pytest.raises(RateLimited):
+        await limiter.reserve("1.1.1.1")
+
+
+@pytest.mark.asyncio
+async def test_refund_after_midnight_leaves_new_day_alone(monkeypatch):
+    """A charge is refunded to the UTC day it was taken from"""
+    import src.api.ratelimit as rl
+    day = ["2026-10-18"]
+    monkeypatch.setattr(rl, "quota_day", lambda: day[0])
+
+    limiter = RateLimiter("100/minute", daily_quota=1, redis_url=None)
+    yesterday = await limiter.reserve("1.1.1.1")
+    day[0] = "2026-10-19"
+    await limiter.reserve("1.1.1.1")
+    await limiter.refund(yesterday)
+    with pytest.raises(RateLimited):
+        await limiter.reserve("1.1.1.1")
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_forgets_idle_ips(monkeypatch):
+    """Stale IPs are swept so memory tracks only active clients"""
+    import src.api.ratelimit as rl
+    now = [1000.0]
+    monkeypatch.setattr(rl.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rl, "_SWEEP_EVERY", 100)
+
+    backend = MemoryBackend()
+    for i in range(10_000):
+        await backend.hit(f"10.0.{i // 256}.{i % 256}", limit=10, window=60)
+    now[0] += 120
+    for _ in range(100):
+        await backend.hit("1.1.1.1", limit=1000, window=60)
+
+    assert backend.size() == 1
+
+
+def test_client_ip_trusts_forwarded_only_from_proxies():
+    """X-Forwarded-For is ignored unless the peer is a configured proxy"""
+    from src.api.ratelimit import client_ip, parse_proxies
+
+    proxies = parse_proxies("10.0.0.0/8, 127.0.0.1")
+    # Direct client: a spoofed header changes nothing
+    assert client_ip("203.0.113.7", "1.2.3.4", proxies) == "203.0.113.7"
+    assert client_ip("203.0.113.7", "1.2.3.4") == "203.0.113.7"
+    # Behind the proxy chain: the rightmost untrusted hop, not the client-supplied left end
+    assert client_ip("10.0.0.2", "6.6.6.6, 198.51.100.4, 10.0.0.9", proxies) == "198.51.100.4"
+    assert client_ip("127.0.0.1", None, proxies) == "127.0.0.1"
@@ -0,0 +1,119 @@
+"""Test bounded session store"""
+import pytest
+from src.api.sessions import SessionManager
+
+
+class FakeMemory:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.messages = []
+
+    def add_message(self, role, content):
+        self.messages.append((role, content))
+
+
+@pytest.mark.asyncio
+async def test_sessions_evicted_least_recently_used():
+    """The session cap drops the least recently used session"""
+    store = SessionManager(FakeMemory, redis_url=None, max_sessions=2)
+    await store.add_message("a", "user", "hi")
+    await store.add_message("b", "user", "hi")
+    await store.get("a")
+    await store.add_message("c", "user", "hi")
+
+    assert len(store) == 2
+    assert (await store.get("a")).messages == [("user", "hi")]
+    assert store.stats()["evictions"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_expire_when_idle(monkeypatch):
+    """Sessions idle past the TTL are dropped"""
+    import src.api.sessions as sessions_mod
+    now = [1000.0]
+    monkeypatch.setattr(sessions_mod.time, "time", lambda: now[0])
+
+    store = SessionManager(FakeMemory, redis_url=None, idle_ttl=60)
+    await store.add_message("a", "user", "hi")
+    now[0] += 61
+    await store.add_message("b", "user", "hi")
+
+    assert len(store) == 1
+    assert (await store.get("a")).messages == []
+
+
+@pytest.mark.asyncio
+async def test_long_conversations_are_compacted():
+    """Old turns fold into a bounded summary; recent ones stay verbatim"""
+    store = SessionManager(FakeMemory, redis_url=None, max_messages=4, summary_chars=300)
+    for i in range(20):
+        await store.add_message("s", "user", f"Question {i}. With more detail that is dropped.")
+
+    memory = await store.get("s")
+    assert len(memory.messages) <= 5
+    role, summary = memory.messages[0]
+    assert role == "system"
+    assert "With more detail" not in summary
+    assert len(summary) < 400
+    assert memory.messages[-1] == ("user", "Question 19. With more detail that is dropped.")
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the session store, shareable between workers"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, *keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def set(self, key, value, ex=None):
+                self.ops.append(lambda: redis.data.__setitem__(key, value.encode()) or True)
+
+            def incr(self, key):
+                def op():
+                    redis.data[key] = str(int(redis.data.get(key, 0)) + 1).encode()
+                    return int(redis.data[key])
+                self.ops.append(op)
+
+            def expire(self, key, seconds):
+                self.ops.append(lambda: True)
+
+            async def execute(self):
+                return [op() for op in self.ops]
+
+        return Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_cached_session_reloads_after_another_worker_writes():
+    """A local copy is rechecked against the Redis version on every access"""
+    redis = FakeRedis()
+    worker_a = SessionManager(FakeMemory, redis_url=None)
+    worker_b = SessionManager(FakeMemory, redis_url=None)
+    worker_a.client = worker_b.client = redis
+
+    await worker_a.add_message("s", "user", "first")
+    await worker_b.add_message("s", "user", "second")
+    assert (await worker_a.get("s")).messages == [("user", "first"), ("user", "second")]
+    assert worker_a.stats()["reloads"] == 1
+
+    # Unchanged in Redis: the cached copy is served
+    await worker_a.get("s")
+    assert worker_a.stats()["reloads"] == 1
@@ -0,0 +1,65 @@
+"""Test in-flight request coalescing"""
+import asyncio
+import pytest
+from src.api.singleflight import SingleFlight
+
+
+async def _no_shared():
+    return None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    """N identical concurrent calls execute the function once"""
+    flight = SingleFlight(redis_url=None)
+    calls = 0
+
+    async def run():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    results = await asyncio.gather(*[flight.do("k", run, _no_shared) for _ in range(5)])
+
+    assert calls == 1
+    assert [r for r, _ in results] == ["answer"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert flight.stats()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    """A failing run raises in every coalesced caller and is not remembered"""
+    flight = SingleFlight(redis_url=None)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    results = await asyncio.gather(*[flight.do("k", boom, _no_shared) for _ in range(3)],
+                                   return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def ok():
+        return "recovered"
+
+    assert await flight.do("k", ok, _no_shared) == ("recovered", False)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_run():
+    """The leader disconnecting leaves the run going for followers"""
+    flight = SingleFlight(redis_url=None)
+
+    async def run():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    leader = asyncio.ensure_future(flight.do("k", run, _no_shared))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", run, _no_shared))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == ("answer", True)
@@ -0,0 +1,85 @@
+"""Test research event streaming"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from langchain_core.messages import AIMessage
+from src.api.streaming import research_events, EventChannel
+
+
+class FakeAgent:
+    """Replays a fixed astream_events sequence"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, state, config=None, version="v2"):
+        for ev in self.events:
+            yield ev
+
+
+def _node(kind, name, output=None):
+    return {"event": kind, "name": name, "metadata": {"langgraph_node": name},
+            "data": {"output": output}, "parent_ids": ["root"]}
+
+
+@pytest.mark.asyncio
+async def test_research_events_yields_stages_tokens_and_result():
+    """Stage events, synthesis tokens and the final answer are emitted in order"""
+    findings = [{"url": "https://a.com", "title": "A"}, {"url": "https://a.com"}]
+    final = {"messages": [AIMessage(content="Hello world")], "research_findings": findings}
+    agent = FakeAgent([
+        _node("on_chain_start", "research_node"),
+        _node("on_chain_end", "research_node", {"research_findings": findings}),
+        _node("on_chain_start", "synthesis_node"),
+        {"event": "on_chat_model_stream", "name": "ChatGroq",
+         "metadata": {"langgraph_node": "synthesis_node"},
+         "data": {"chunk": SimpleNamespace(content="Hello")}},
+        _node("on_chain_end", "synthesis_node"),
+        {"event": "on_chain_end", "name": "LangGraph", "metadata": {},
+         "data": {"output": final}, "parent_ids": []},
+    ])
+
+    events = [e async for e in research_events(agent, {})]
+
+    assert [e["type"] for e in events] == ["stage", "sources", "stage", "stage", "token", "stage", "result"]
+    assert events[1]["sources"] == [{"title": "A", "url": "https://a.com"}]
+    assert events[4]["text"] == "Hello"
+    assert events[-1]["answer"] == "Hello world"
+
+
+@pytest.mark.asyncio
+async def test_event_channel_merges_tokens_for_slow_clients():
+    """Tokens queued behind a slow send are coalesced into one message"""
+    sent = []
+    gate = asyncio.Event()
+
+    async def slow_send(msg):
+        await gate.wait()
+        sent.append(msg)
+
+    channel = EventChannel(slow_send, send_timeout=1)
+    channel.put({"type": "stage", "stage": "synthesis", "status": "start"})
+    await asyncio.sleep(0)
+    for word in ["a", "b", "c"]:
+        channel.put({"type": "token", "text": word})
+    gate.set()
+    await channel.close()
+
+    assert sent == [
+        {"type": "stage", "stage": "synthesis", "status": "start"},
+        {"type": "token", "text": "abc"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_event_channel_fails_producer_on_send_timeout():
+    """A client that stops reading stops the producer"""
+    async def stuck_send(msg):
+        await asyncio.sleep(10)
+
+    channel = EventChannel(stuck_send, send_timeout=0.01)
+    channel.put({"type": "token", "text": "x"})
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        channel.put({"type": "token", "text": "y"})
@@ -35,3 +35,556 @@ async def test_web_scraper():
     assert len(chunks) > 0
     assert all(isinstance(chunk, Document) for chunk in chunks)
     assert all(len(chunk.page_content) <= 500 for chunk in chunks)
+
+
+def _slow_transport(delays, body=b"<html>ok</html>"):
+    """Mock transport that answers each host after a fixed delay"""
+    import asyncio
+    import httpx
+
+    async def handler(request):
+        await asyncio.sleep(delays.get(request.url.host, 0))
+        return httpx.Response(200, content=body, headers={"content-type": "text/html; charset=utf-8"})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_runs_concurrently():
+    """Wall time tracks the slowest page, results stream as they complete"""
+    import time
+    from src.tools.fetch import FetchEngine
+
+    delays = {f"h{i}.test": 0.1 for i in range(9)}
+    delays["slow.test"] = 0.3
+    engine = FetchEngine(transport=_slow_transport(delays))
+    urls = [f"https://{host}/page" for host in delays]
+
+    started = time.perf_counter()
+    results = [r async for r in engine.fetch_many(urls)]
+    elapsed = time.perf_counter() - started
+    await engine.close()
+
+    assert len(results) == 10
+    assert all(r.ok for r in results)
+    assert results[-1].url == "https://slow.test/page"
+    assert elapsed < 0.6
+
+
+@pytest.mark.asyncio
+async def test_fetch_budgets():
+    """Slow pages time out and large pages are truncated at the byte budget"""
+    from src.tools.fetch import FetchEngine
+
+    engine = FetchEngine(transport=_slow_transport({"slow.test": 1}, body=b"x" * 5000),
+                         page_timeout=0.1, max_bytes=1000)
+    slow = await engine.fetch("https://slow.test/")
+    big = await engine.fetch("https://big.test/")
+    await engine.close()
+
+    assert not slow.ok and "timeout" in slow.error
+    assert big.truncated and len(big.content) == 1000
+
+
+@pytest.mark.asyncio
+async def test_fetch_failures_become_results():
+    """Any exception is reported on the result; unknown charsets decode as utf-8"""
+    import httpx
+    from prometheus_client import REGISTRY
+    from src.tools.fetch import FetchEngine
+
+    failures_before = REGISTRY.get_sample_value("scrape_failures_total") or 0
+
+    def handler(request):
+        if request.url.host == "broken.test":
+            raise RuntimeError("boom")
+        return httpx.Response(200, content="caf\u00e9".encode(), headers={"content-type": "text/html; charset=bogus"})
+
+    engine = FetchEngine(transport=httpx.MockTransport(handler))
+    broken = await engine.fetch("https://broken.test/")
+    page = await engine.fetch("https://ok.test/")
+    await engine.close()
+
+    assert not broken.ok and "boom" in broken.error
+    assert engine.failures == 1
+    assert REGISTRY.get_sample_value("scrape_failures_total") - failures_before == 1
+    assert page.text == "caf\u00e9"
+
+@pytest.mark.asyncio
+async def test_scrape_cache_revalidates_and_dedupes(tmp_path):
+    """Fresh hits skip the network; 304s reuse the entry; mirrors share a blob"""
+    import httpx
+    from src.tools.fetch import FetchEngine
+    from src.tools.scrape_cache import ScrapeCache, fetch_cached, normalize_url
+
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<p>Same article</p>", headers={"etag": '"v1"'})
+
+    parses = []
+
+    def extract(html):
+        parses.append(html)
+        return "Same article", [(0, 4), (5, 12)]
+
+    engine = FetchEngine(transport=httpx.MockTransport(handler))
+    cache = ScrapeCache(directory=str(tmp_path), fresh_for=3600)
+
+    page = await fetch_cached(engine, cache, "https://news.test/a?utm_source=x#top", extract)
+    assert page.chunk_texts() == ["Same", "article"]
+    assert normalize_url("https://NEWS.test:443/a#top") == "https://news.test/a"
+
+    # Fresh: no request, no parse
+    await fetch_cached(engine, cache, "https://news.test/a", extract)
+    assert len(requests_seen) == 1 and len(parses) == 1
+
+    # Stale: conditional GET answered with 304, still no parse
+    cache.fresh_for = 0
+    again = await fetch_cached(engine, cache, "https://news.test/a", extract)
+    assert again.text == "Same article"
+    assert requests_seen[-1].headers["if-none-match"] == '"v1"'
+    assert len(parses) == 1
+
+    # A mirror with identical content shares storage
+    await fetch_cached(engine, cache, "https://mirror.test/a", extract)
+    stats = cache.stats()
+    assert stats["pages"] == 2 and stats["blobs"] == 1
+    await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_scrape_cache_skips_truncated_pages(tmp_path):
+    """Bodies cut off at the byte budget are returned but not cached"""
+    import httpx
+    from src.tools.fetch import FetchEngine
+    from src.tools.scrape_cache import ScrapeCache, fetch_cached
+
+    engine = FetchEngine(transport=httpx.MockTransport(lambda r: httpx.Response(200, text="x" * 500)),
+                         max_bytes=100)
+    cache = ScrapeCache(directory=str(tmp_path))
+    page = await fetch_cached(engine, cache, "https://big.test/", lambda html: (html, [(0, len(html))]))
+    await engine.close()
+
+    assert len(page.text) == 100
+    assert cache.get("https://big.test/") is None
+    assert cache.stats()["truncated"] == 1
+
+
+def test_embedding_cache_embeds_only_misses(tmp_path):
+    """Repeated texts come from the shared file; compaction keeps the newest rows"""
+    from langchain_core.embeddings import Embeddings
+    from src.tools.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    class CountingEmbeddings(Embeddings):
+        def __init__(self):
+            self.embedded = []
+
+        def embed_documents(self, texts):
+            self.embedded.extend(texts)
+            return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    inner = CountingEmbeddings()
+    cache = EmbeddingCache(directory=str(tmp_path), max_rows=4)
+    embeddings = CachedEmbeddings(inner, cache, "test-model")
+
+    first = embeddings.embed_documents(["alpha", "beta", "alpha"])
+    second = embeddings.embed_documents(["beta", "gamma"])
+    assert inner.embedded == ["alpha", "beta", "gamma"]
+    assert first[1] == second[0] == [4.0, 1.0, 0.5]
+
+    # A second process opening the same directory sees the rows without embedding
+    other = CachedEmbeddings(inner, EmbeddingCache(directory=str(tmp_path), max_rows=4), "test-model")
+    before = len(inner.embedded)
+    assert other.embed_query("gamma") == [5.0, 1.0, 0.5]
+    assert len(inner.embedded) == before
+
+    # Growing past 1.25x max_rows compacts down to the newest max_rows
+    embeddings.embed_documents(["d", "e", "f"])
+    assert cache.stats()["rows"] == 4
+    assert embeddings.embed_query("f") == [1.0, 1.0, 0.5]
+    # The other process picks up the compacted files with rows still aligned to keys
+    assert other.embed_query("e") == [1.0, 1.0, 0.5] and other.embed_query("gamma") == [5.0, 1.0, 0.5]
+    assert len(inner.embedded) == before + 3
+
+    # Writers (compaction included) wait while a reader holds the shared lock
+    import threading
+    writer = threading.Thread(target=cache.put_many, args=([b"k" * 16], [[0.0, 0.0, 0.0]]))
+    with other.cache._file_lock(shared=True):
+        writer.start()
+        writer.join(0.1)
+        assert writer.is_alive()
+    writer.join(1)
+    assert not writer.is_alive()
+
+
+def test_embedding_cache_rounds_misses_and_tracks_compaction_generation(tmp_path):
+    """A miss returns the stored float16 vector; a compaction is seen even if the inode is reused"""
+    import numpy as np
+    from langchain_core.embeddings import Embeddings
+    from src.tools.embedding_cache import CachedEmbeddings, EmbeddingCache, content_key
+
+    class FixedEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            return [[0.1, 0.2, 0.3] for _ in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    cache = EmbeddingCache(directory=str(tmp_path), dtype="float16")
+    embeddings = CachedEmbeddings(FixedEmbeddings(), cache, "test-model")
+    miss = embeddings.embed_query("alpha")
+    assert miss == embeddings.embed_query("alpha") != [0.1, 0.2, 0.3]
+
+    # Rewrite both files in place, keeping their inodes, as a compaction would
+    other = EmbeddingCache(directory=str(tmp_path))
+    key = content_key("test-model", "beta")
+    with cache._file_lock():
+        with open(cache.vectors_path, "r+b") as f:
+            f.write(np.ones(3, dtype=np.float16).tobytes())
+        with open(cache.keys_path, "r+b") as f:
+            f.write(key)
+        cache._write_meta(generation=cache._generation + 1)
+    assert list(other.get_many([key])[0]) == [1.0, 1.0, 1.0]
+    assert other.get_many([content_key("test-model", "alpha")]) == [None]
+
+
+@pytest.mark.asyncio
+async def test_embedding_service_batches_concurrent_callers():
+    """Concurrent callers share micro-batches and each gets its own vectors back"""
+    import asyncio
+    import threading
+    from langchain_core.embeddings import Embeddings
+    from src.tools.embedding_service import BatchedEmbeddings, EmbeddingService
+
+    class RecordingEmbeddings(Embeddings):
+        def __init__(self):
+            self.batches = []
+
+        def embed_documents(self, texts):
+            self.batches.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    inner = RecordingEmbeddings()
+    loaded_on = []
+
+    def load():
+        loaded_on.append(threading.get_ident())
+        return inner
+
+    service = EmbeddingService(load, max_batch=8, max_wait=0.05)
+
+    texts = ["x" * n for n in range(1, 13)]
+    results = await asyncio.gather(*(service.embed_query(t) for t in texts))
+    assert results == [[float(len(t))] for t in texts]
+    # 12 single-text callers fit in two batches of at most 8
+    assert [len(b) for b in inner.batches] == [8, 4]
+    assert service.stats()["batches"] == 2
+    # The model is loaded on the executor, never on the event loop thread
+    assert loaded_on and loaded_on[0] != threading.get_ident()
+
+    # Sync callers on a worker thread (e.g. Chroma) join the same loop
+    sync = BatchedEmbeddings(service)
+    vectors = await asyncio.to_thread(sync.embed_documents, ["ab", "abc"])
+    assert vectors == [[2.0], [3.0]]
+    await service.close()
+
+
+def test_embedding_service_loads_model_once():
+    """Threads racing on the first access share a single model load"""
+    import threading
+    import time
+    from src.tools.embedding_service import EmbeddingService
+
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    service = EmbeddingService(load)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(service.model)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert all(m is models[0] for m in models)
+
+
+@pytest.mark.asyncio
+async def test_stream_documents_drops_boilerplate_and_respects_caps():
+    """Chunks flow while downloading, skip nav/script, fit chunk_size and stop at the byte cap"""
+    import httpx
+    from src.tools.fetch import FetchEngine
+    from src.tools.html_stream import extract_chunks, stream_documents
+
+    paragraph = "<p>" + "Solid state batteries store more energy. " * 10 + "</p>"
+    page = (
+        "<html><head><script>var tracking = 1;</script><style>p{}</style></head><body>"
+        "<nav><ul><li>Home</li><li>About</li></ul></nav>"
+        "<div class='cookie-banner'>Accept cookies</div>"
+        + paragraph * 200 +
+        "<footer>Copyright</footer></body></html>"
+    ).encode()
+
+    async def body():
+        for i in range(0, len(page), 4096):
+            yield page[i:i + 4096]
+
+    engine = FetchEngine(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=body(), headers={"content-type": "text/html"})
+    ))
+
+    docs = [d async for d in stream_documents(engine, "https://news.test/a", chunk_size=300)]
+    assert docs and all(len(d.page_content) <= 300 for d in docs)
+    text = " ".join(d.page_content for d in docs)
+    for boilerplate in ("tracking", "Home", "Accept cookies", "Copyright"):
+        assert boilerplate not in text
+    assert [d.metadata["chunk"] for d in docs] == list(range(len(docs)))
+
+    capped = [d async for d in stream_documents(engine, "https://news.test/a", chunk_size=300, max_bytes=5000)]
+    assert 0 < len(capped) < len(docs)
+
+    text, bounds = extract_chunks(paragraph, chunk_size=100)
+    assert all(text[a:b].endswith(".") for a, b in bounds)
+    await engine.close()
+
+    # An unclosed boilerplate element ends with the element that encloses it
+    text, _ = extract_chunks(
+        "<main><p>Intro</p><div class='sidebar'><div>Related</div></main>"
+        "<article><p>Body text survives.</p></article></body>"
+    )
+    assert "Intro" in text and "Body text survives." in text and "Related" not in text
+
+
+def test_extract_chunks_keeps_content_roots_and_article_headers():
+    """Boilerplate hints never drop html/body/main/article; only page-level header/footer are chrome"""
+    from src.tools.html_stream import extract_chunks
+
+    text, _ = extract_chunks('<body class="post-template-default single single-post no-sidebar">'
+                             "<p>Post body.</p></body>")
+    assert text == "Post body."
+
+    text, _ = extract_chunks('<main class="site-main has-share-buttons"><p>Main text.</p>'
+                             '<div class="share-buttons">Tweet</div></main>')
+    assert text == "Main text."
+
+    text, _ = extract_chunks("<header><a>Site menu</a></header><article><header><h1>Title</h1></header>"
+                             "<p>Story.</p><footer>By a reporter</footer></article><footer>Copyright</footer>")
+    assert "Title" in text and "Story." in text and "By a reporter" in text
+    assert "Site menu" not in text and "Copyright" not in text
+
+
+def test_deduper_drops_near_duplicates_per_collection():
+    """Mirrored chunks are dropped within a request and against the collection"""
+    from src.tools.dedupe import ChunkDeduper
+
+    article = (
+        "Researchers reported a solid state battery cell that retained ninety percent of its "
+        "capacity after one thousand cycles, using a sulfide electrolyte and a lithium metal "
+        "anode, and said pilot production could begin within two years at a plant in Nevada"
+    )
+    mirror = article.replace("Nevada", "Nevada.")
+    unrelated = "The python packaging authority published new guidance on lock files and wheels"
+
+    deduper = ChunkDeduper(threshold=0.9)
+    kept, dropped = deduper.filter(
+        [Document(page_content=t) for t in (article, mirror, unrelated)], "research_1"
+    )
+    assert [d.page_content for d in kept] == [article, unrelated]
+    assert dropped == 1
+    assert "simhash" in kept[0].metadata
+
+    # Already stored in this collection, but not in another one
+    _, dropped = deduper.filter([Document(page_content=article)], "research_1")
+    assert dropped == 1
+    _, dropped = deduper.filter([Document(page_content=article)], "research_2")
+    assert dropped == 0
+
+    # Fingerprints persisted in chunk metadata restore the collection after a restart
+    class StoredCollection:
+        def __init__(self, metadatas):
+            self.metadatas = metadatas
+            self.pages = 0
+
+        def get(self, include, limit, offset):
+            assert include == ["metadatas"]
+            self.pages += 1
+            return {"metadatas": self.metadatas[offset:offset + limit]}
+
+    stored = StoredCollection([None] + [d.metadata for d in kept])
+    fresh = ChunkDeduper(threshold=0.9)
+    assert fresh.filter([Document(page_content=mirror)], "research_1", source=stored)[1] == 1
+    assert fresh.stats()["dropped"] == 1 and fresh.stats()["fingerprints"] == 2
+    # Seeded once per collection, not on every call
+    fresh.filter([Document(page_content=unrelated)], "research_1", source=stored)
+    assert stored.pages == 1
+
+
+def test_hybrid_search_recovers_exact_terms():
+    """BM25 finds exact identifiers dense search misses; RRF keeps both"""
+    from src.tools.hybrid_search import BM25Index, doc_key, hybrid_search, reciprocal_rank_fusion
+
+    docs = [
+        Document(page_content="Firmware v3.2.1 for the AX-240 fixes a bootloader fault", id="fw"),
+        Document(page_content="The Arclight sensor lasts fourteen hours on one charge", id="battery"),
+        Document(page_content="Pricing for enterprise buyers starts at ninety dollars", id="price"),
+    ]
+    index = BM25Index()
+    index.add_documents(docs)
+
+    # A dense retriever that ignores version strings entirely
+    def dense_search(query, k):
+        return [docs[1], docs[2], docs[0]][:k]
+
+    assert [d.id for d in hybrid_search(index, dense_search, "AX-240 v3.2.1", 1, mode="sparse")] == ["fw"]
+    fused = hybrid_search(index, dense_search, "AX-240 v3.2.1 battery", 2, mode="hybrid")
+    assert {d.id for d in fused} == {"fw", "battery"}
+
+    # Chroma hits carry storage ids, scraped chunks none: both key on the text
+    stored = Document(page_content=docs[0].page_content, id="chroma-uuid")
+    fused = reciprocal_rank_fusion([[stored], [Document(page_content=docs[0].page_content)]], 2)
+    assert len(fused) == 1
+
+    # Incremental removal keeps statistics consistent
+    index.remove([doc_key(docs[0])])
+    assert len(index) == 2
+    assert index.search("AX-240", 3) == []
+
+
+def test_sparse_indexes_seed_from_the_collection_after_restart():
+    """A missing index is rebuilt from the Chroma collection on first access"""
+    from src.tools.hybrid_search import SparseIndexes
+
+    texts = [f"Chunk {i} about the AX-{i} sensor" for i in range(5)]
+
+    class FakeCollection:
+        def __init__(self):
+            self.reads = 0
+
+        def get(self, include, limit, offset):
+            self.reads += 1
+            page = texts[offset:offset + limit]
+            return {"ids": [f"id{offset + i}" for i in range(len(page))], "documents": page,
+                    "metadatas": [{"source": "s"}] * len(page)}
+
+    collection = FakeCollection()
+    indexes = SparseIndexes()
+    index = indexes.get("research_1", collection)
+    assert len(index) == 5
+    assert index.search("AX-3", 1)[0][0].page_content == texts[3]
+    # Seeded once; later lookups reuse the index
+    assert indexes.get("research_1", collection) is index and collection.reads == 1
+    assert len(indexes.get("research_2")) == 0
+
+
+def test_collection_lifecycle_expires_and_evicts(tmp_path):
+    """Idle collections expire; caps evict least recently used whole collections"""
+    import time
+    from src.tools.collection_lifecycle import CollectionLifecycle, collection_name
+
+    class FakeCollection:
+        def __init__(self, size):
+            self.size = size
+
+        def count(self):
+            return self.size
+
+    class FakeClient:
+        def __init__(self, sizes):
+            self.collections = {name: FakeCollection(size) for name, size in sizes.items()}
+
+        def list_collections(self):
+            return list(self.collections)
+
+        def get_collection(self, name):
+            return self.collections[name]
+
+        def delete_collection(self, name):
+            del self.collections[name]
+
+    client = FakeClient({"stale": 10, "old": 40, "recent": 40, "newest": 40})
+    dropped = []
+    lifecycle = CollectionLifecycle(client, directory=str(tmp_path), ttl=3600,
+                                    max_vectors=100, on_drop=dropped.append)
+    for name in ("stale", "old", "recent", "newest"):
+        lifecycle.touch(name)
+        time.sleep(0.01)
+    lifecycle._db.execute("UPDATE collections SET last_access = 0 WHERE name = 'stale'")
+
+    result = lifecycle.sweep()
+    assert dropped == ["stale", "old"]
+    assert sorted(client.collections) == ["newest", "recent"]
+    assert result["vectors"] == 80
+    assert lifecycle.stats()["expired"] == 1 and lifecycle.stats()["evicted"] == 1
+
+    assert collection_name(session_id="abc/1") == "session_abc_1"
+    assert collection_name(query="Solid state") == collection_name(query="solid state ")
+
+
+def test_collection_lifecycle_size_cap_evicts_only_what_it_must(tmp_path):
+    """Going one collection over the byte cap evicts one collection, not all but one"""
+    import sqlite3
+    import time
+    from src.tools.collection_lifecycle import CollectionLifecycle, _directory_bytes
+
+    db = sqlite3.connect(str(tmp_path / "chroma.sqlite3"))
+    db.execute("CREATE TABLE segments (id TEXT PRIMARY KEY)")
+    db.execute("CREATE TABLE embeddings (collection TEXT, data BLOB)")
+    names = [f"c{i}" for i in range(6)]
+    for name in names:
+        db.execute("INSERT INTO embeddings VALUES (?, ?)", (name, b"x" * 200_000))
+    db.commit()
+
+    class FakeCollection:
+        def count(self):
+            return 1
+
+    class FakeClient:
+        def list_collections(self):
+            return [row[0] for row in db.execute("SELECT DISTINCT collection FROM embeddings")]
+
+        def get_collection(self, name):
+            return FakeCollection()
+
+        def delete_collection(self, name):
+            db.execute("DELETE FROM embeddings WHERE collection = ?", (name,))
+            db.commit()
+
+    dropped = []
+    lifecycle = CollectionLifecycle(FakeClient(), directory=str(tmp_path), on_drop=dropped.append)
+    for name in names:
+        lifecycle.touch(name)
+        time.sleep(0.01)
+    lifecycle.max_bytes = _directory_bytes(tmp_path) - 100_000
+
+    result = lifecycle.sweep()
+    assert dropped == ["c0"]
+    assert result["collections"] == 5 and result["bytes"] <= lifecycle.max_bytes
+    lifecycle.close()
+    db.close()
+
+
+def test_collection_lifecycle_single_sweep_leader(tmp_path):
+    """Only one lifecycle per directory sweeps; another takes over when it closes"""
+    from src.tools.collection_lifecycle import CollectionLifecycle
+
+    first = CollectionLifecycle(object(), directory=str(tmp_path))
+    second = CollectionLifecycle(object(), directory=str(tmp_path))
+    assert first.lead() and first.lead()
+    assert not second.lead()
+    first.close()
+    assert second.lead()
+    second.close()
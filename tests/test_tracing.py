@@ -0,0 +1,54 @@
+"""Test request tracing"""
+import asyncio
+import pytest
+from src.api import tracing
+from src.api.tracing import Trace, span, instrument
+
+
+class FakeScraper:
+    async def scrape_url(self, url):
+        await asyncio.sleep(0.01)
+        return [url]
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_and_break_down_time():
+    """Spans record parents and sum per name in the breakdown"""
+    instrument(FakeScraper, "scrape_url")
+    trace = Trace("req-1", "POST /research")
+    token = tracing._current_trace.set(trace)
+    try:
+        with span("scrape_node"):
+            await asyncio.gather(FakeScraper().scrape_url("a"), FakeScraper().scrape_url("b"))
+    finally:
+        tracing._current_trace.reset(token)
+
+    data = trace.to_dict()
+    names = [s["name"] for s in data["spans"]]
+    assert names == ["scrape_node", "FakeScraper.scrape_url", "FakeScraper.scrape_url"]
+    assert all(s["parent"] == 0 for s in data["spans"][1:])
+    assert data["breakdown_ms"]["FakeScraper.scrape_url"] >= 20
+
+
+@pytest.mark.asyncio
+async def test_instrumented_methods_work_untraced():
+    """Outside a trace, instrumented methods behave normally"""
+    instrument(FakeScraper, "scrape_url")
+    assert await FakeScraper().scrape_url("x") == ["x"]
+    with span("noop") as s:
+        assert s is None
+
+
+def test_trace_files_stay_under_trace_dir(tmp_path):
+    """Client request ids cannot name files outside TRACE_DIR"""
+    from src.api.tracing import TraceStore, request_id_from
+
+    assert request_id_from("abc-123_x") == "abc-123_x"
+    for bad in ("../escaped", "a/b", "x" * 65, "", None):
+        assert request_id_from(bad) != bad and len(request_id_from(bad)) == 32
+
+    store = TraceStore(directory=str(tmp_path / "traces"))
+    store.add(Trace("../escaped", "GET /"))
+    store.add(Trace("ok-id", "GET /"))
+    assert not (tmp_path / "escaped.json").exists()
+    assert sorted(p.name for p in (tmp_path / "traces").iterdir()) == ["ok-id.json"]